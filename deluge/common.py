@@ -897,6 +897,66 @@ def create_magnet_uri(infohash, name=None, trackers=None):
     return ''.join(uri)
 
 
+def encode_piece_runs(pieces):
+    """Run-length encode the states of torrent pieces.
+
+    Each byte value of the encoded form is a run of up to 64 pieces, with the
+    piece state in the two high bits and the run length minus one in the low six
+    bits. The runs are a list of ints, not bytes, as bytes that are valid UTF-8
+    are decoded to str by the RPC transport.
+
+    Args:
+        pieces (bytes): The piece states, one byte per piece with values 0-3.
+
+    Returns:
+        list of int: The run-length encoded piece states.
+
+    """
+    runs = []
+    for match in re.finditer(rb'(.)\1*', pieces, re.DOTALL):
+        state = pieces[match.start()] << 6
+        full_runs, length = divmod(match.end() - match.start(), 64)
+        runs.extend([state | 63] * full_runs)
+        if length:
+            runs.append(state | length - 1)
+    return runs
+
+
+def iter_piece_runs(runs):
+    """Iterate over the runs of run-length encoded piece states.
+
+    Args:
+        runs (list of int): The run-length encoded piece states.
+
+    Yields:
+        tuple: The piece state and number of pieces of each run.
+
+    """
+    state = length = None
+    for run in runs:
+        if run >> 6 == state:
+            length += (run & 63) + 1
+            continue
+        if state is not None:
+            yield state, length
+        state, length = run >> 6, (run & 63) + 1
+    if state is not None:
+        yield state, length
+
+
+def decode_piece_runs(runs):
+    """Decode run-length encoded piece states.
+
+    Args:
+        runs (list of int): The run-length encoded piece states.
+
+    Returns:
+        bytes: The piece states, one byte per piece.
+
+    """
+    return b''.join(bytes([state]) * length for state, length in iter_piece_runs(runs))
+
+
 def get_path_size(path):
     """
     Gets the size in bytes of 'path'
@@ -20,14 +20,14 @@
 import threading
 import time
 from collections import defaultdict
-from functools import partial
-from typing import Any, Callable
+from typing import Any, Callable, List
 
-from twisted.internet import reactor, task, threads
+from twisted.internet import reactor, threads
 
 import deluge.component as component
 from deluge._libtorrent import lt
 from deluge.common import decode_bytes
+from deluge.core.perfstats import CATEGORY_ALERT, LATENCY_BUCKETS, CallStats
 
 log = logging.getLogger(__name__)
 
@@ -59,8 +59,13 @@ def __init__(self):
 
         # handlers is a dictionary of lists {"alert_type": [handler1,h2,..]}
         self.handlers = defaultdict(list)
+        # batch_handlers is a dictionary of lists {"alert_type": [handler1,h2,..]}
+        self.batch_handlers = defaultdict(list)
+        # Handler calls taking longer than this are logged as a warning.
         self.handlers_timeout_secs = 2
-        self.delayed_calls = []
+        # The calls and latency histogram of each handler by 'alert_type:handler'.
+        self.handler_stats = defaultdict(CallStats)
+        self.perf_stats = component.get('PerfStats')
         self._event = threading.Event()
 
     def update(self):
@@ -73,9 +78,6 @@ def start(self):
         thread.start()
         self._event.set()
 
-    def stop(self):
-        self.cancel_delayed_calls()
-
     def pause(self):
         self._event.clear()
 
@@ -84,29 +86,13 @@ def resume(self):
 
     def wait_for_alert_in_thread(self):
         while self._component_state not in ('Stopping', 'Stopped'):
-            if self.check_delayed_calls():
-                time.sleep(0.05)
-                continue
-
             if self.session.wait_for_alert(1000) is None:
                 continue
+            # The popped alerts are only valid until the next pop so this thread
+            # waits for the reactor to finish handling them.
             if self._event.wait():
                 threads.blockingCallFromThread(reactor, self.maybe_handle_alerts)
 
-    def on_delayed_call_timeout(self, result, timeout, **kwargs):
-        log.warning('Alert handler was timed-out before being called %s', kwargs)
-
-    def cancel_delayed_calls(self):
-        """Cancel all delayed handlers."""
-        for delayed_call in self.delayed_calls:
-            delayed_call.cancel()
-        self.delayed_calls = []
-
-    def check_delayed_calls(self) -> bool:
-        """Returns True if any handler calls are delayed."""
-        self.delayed_calls = [dc for dc in self.delayed_calls if not dc.called]
-        return len(self.delayed_calls) > 0
-
     def maybe_handle_alerts(self) -> None:
         if self._component_state != 'Started':
             return
@@ -130,6 +116,28 @@ def register_handler(self, alert_type: str, handler: Callable[[Any], None]) -> N
         self.handlers[alert_type].append(handler)
         log.debug('Registered handler for alert %s', alert_type)
 
+    def register_batch_handler(
+        self, alert_type: str, handler: Callable[[List[Any]], None]
+    ) -> None:
+        """
+        Registers a function that will be called once with all the 'alert_type'
+        alerts pop'd in handle_alerts. The handler function should look like:
+        handler(alerts) where 'alerts' is a list of the libtorrent alert objects.
+
+        Batch handlers are called after the handlers registered with
+        `register_handler` have been called for each of the pop'd alerts.
+
+        Args:
+            alert_type: String representation of the libtorrent alert name.
+                Can be supplied with or without `_alert` suffix.
+            handler: Callback function for the list of alerts.
+        """
+        if alert_type and alert_type.endswith('_alert'):
+            alert_type = alert_type[: -len('_alert')]
+
+        self.batch_handlers[alert_type].append(handler)
+        log.debug('Registered batch handler for alert %s', alert_type)
+
     def deregister_handler(self, handler: Callable[[Any], None]):
         """
         De-registers the `handler` function from all alert types.
@@ -140,6 +148,48 @@ def deregister_handler(self, handler: Callable[[Any], None]):
         for alert_type_handlers in self.handlers.values():
             with contextlib.suppress(ValueError):
                 alert_type_handlers.remove(handler)
+        for alert_type_handlers in self.batch_handlers.values():
+            with contextlib.suppress(ValueError):
+                alert_type_handlers.remove(handler)
+
+    def get_handler_stats(self) -> dict:
+        """
+        Get the call counts and latency histograms of the alert handlers.
+
+        Unlike the PerfStats alert category, these are always recorded.
+
+        Returns:
+            The bucket bounds in seconds of the histograms and the stats of
+            each handler by 'alert_type:handler', see `CallStats`.
+        """
+        return {
+            'latency_buckets': list(LATENCY_BUCKETS),
+            'handlers': {
+                name: stats.to_dict() for name, stats in self.handler_stats.items()
+            },
+        }
+
+    def _call_handler(self, handler, arg, alert_type, num_alerts=1):
+        start = time.perf_counter()
+        try:
+            handler(arg)
+        except Exception:
+            log.exception('Error in %s alert handler %s', alert_type, handler)
+        duration = time.perf_counter() - start
+
+        name = getattr(handler, '__qualname__', repr(handler))
+        stats_name = f'{alert_type}:{name}'
+        self.handler_stats[stats_name].add(duration)
+        if self.perf_stats.enabled:
+            self.perf_stats.record(CATEGORY_ALERT, stats_name, duration)
+        if duration > self.handlers_timeout_secs:
+            log.warning(
+                'Alert handler %s took %.2fs for %s %s alerts',
+                name,
+                duration,
+                num_alerts,
+                alert_type,
+            )
 
     def handle_alerts(self):
         """
@@ -158,32 +208,33 @@ def handle_alerts(self):
                 num_alerts,
             )
 
+        debug = log.isEnabledFor(logging.DEBUG)
+        batches = defaultdict(list)
         for alert in alerts:
             alert_type = alert.what()
 
             # Display the alert message
-            if log.isEnabledFor(logging.DEBUG):
+            if debug:
                 log.debug('%s: %s', alert_type, decode_bytes(alert.message()))
 
+            if alert_type in self.batch_handlers:
+                batches[alert_type].append(alert)
+
             if alert_type not in self.handlers:
                 continue
 
             # Call any handlers for this alert type
             for handler in self.handlers[alert_type]:
-                if log.isEnabledFor(logging.DEBUG):
+                if debug:
                     log.debug('Handling alert: %s', alert_type)
-                d = task.deferLater(reactor, 0, handler, alert)
-                on_handler_timeout = partial(
-                    self.on_delayed_call_timeout,
-                    handler=handler.__qualname__,
-                    alert_type=alert_type,
-                )
-                d.addTimeout(
-                    self.handlers_timeout_secs,
-                    reactor,
-                    onTimeoutCancel=on_handler_timeout,
-                )
-                self.delayed_calls.append(d)
+                self._call_handler(handler, alert, alert_type)
+
+        # Call the batch handlers once for all the alerts of their type.
+        for alert_type, alert_batch in batches.items():
+            for handler in self.batch_handlers[alert_type]:
+                if debug:
+                    log.debug('Handling %s alerts: %s', len(alert_batch), alert_type)
+                self._call_handler(handler, alert_batch, alert_type, len(alert_batch))
 
     def set_alert_queue_size(self, queue_size):
         """Sets the maximum size of the libtorrent alert queue"""
@@ -7,6 +7,7 @@
 # See LICENSE for more details.
 #
 
+import bisect
 import glob
 import logging
 import os
@@ -34,10 +35,11 @@
 )
 from deluge.core.eventmanager import EventManager
 from deluge.core.filtermanager import FilterManager
+from deluge.core.perfstats import CATEGORY_LOOPING_CALL, PerfStats
 from deluge.core.pluginmanager import PluginManager
 from deluge.core.preferencesmanager import PreferencesManager
 from deluge.core.rpcserver import export
-from deluge.core.torrentmanager import TorrentManager
+from deluge.core.torrentmanager import TorrentManager, get_push_diff_id
 from deluge.decorators import deprecated, maybe_coroutine
 from deluge.error import (
     AddTorrentError,
@@ -103,6 +105,9 @@
 
 DELUGE_VER = deluge.common.get_version()
 
+# The default number of torrents in a get_torrents_status_page page.
+TORRENTS_STATUS_PAGE_SIZE = 1000
+
 
 class Core(component.Component):
     def __init__(
@@ -131,6 +136,7 @@ def __init__(
         self.session.add_extension('smart_ban')
 
         # Create the components
+        self.perfstats = PerfStats()
         self.eventmanager = EventManager()
         self.preferencesmanager = PreferencesManager()
         self.alertmanager = AlertManager()
@@ -196,12 +202,20 @@ def __init__(
         self.session_status.update({k: 0.0 for k in hit_ratio_keys})
 
         self.session_status_timer_interval = 0.5
-        self.session_status_timer = task.LoopingCall(self.session.post_session_stats)
+        self.session_status_timer = task.LoopingCall(
+            self.perfstats.wrap(
+                CATEGORY_LOOPING_CALL,
+                self.session.post_session_stats,
+                'Core.post_session_stats',
+            )
+        )
         self.alertmanager.register_handler(
             'session_stats', self._on_alert_session_stats
         )
         self.session_rates_timer_interval = 2
-        self.session_rates_timer = task.LoopingCall(self._update_session_rates)
+        self.session_rates_timer = task.LoopingCall(
+            self.perfstats.wrap(CATEGORY_LOOPING_CALL, self._update_session_rates)
+        )
 
     def start(self):
         """Starts the core"""
@@ -646,6 +660,49 @@ def get_session_status(self, keys: List[str]) -> Dict[str, Union[int, float]]:
                     log.debug('Session status key not valid: %s', key)
         return status
 
+    @export(AUTH_LEVEL_ADMIN)
+    def get_perf_stats(self, categories: List[str] = None) -> Dict[str, Any]:
+        """Get the call counts and times recorded by the daemon instrumentation.
+
+        The stats are grouped by category: the alert handlers ('alert'), the
+        RPC methods ('rpc'), the event handlers ('event') and the timer
+        functions ('looping_call').
+
+        Args:
+            categories: The categories to get, defaults to all of them.
+
+        Returns:
+            The recording state, the histogram bucket bounds and a dict of
+            the stats by category and name, each with the keys 'calls',
+            'total_time', 'max_time' and 'histogram'.
+        """
+        return self.perfstats.get_stats(categories)
+
+    @export(AUTH_LEVEL_ADMIN)
+    def set_perf_stats_enabled(self, enabled: bool) -> None:
+        """Start or stop recording the daemon call counts and times.
+
+        Args:
+            enabled: If the calls are recorded.
+        """
+        self.perfstats.set_enabled(enabled)
+
+    @export(AUTH_LEVEL_ADMIN)
+    def reset_perf_stats(self) -> None:
+        """Clear the recorded daemon call counts and times."""
+        self.perfstats.reset()
+
+    @export(AUTH_LEVEL_ADMIN)
+    def get_alert_handler_stats(self) -> Dict[str, Any]:
+        """Get the call counts and latency histograms of the alert handlers.
+
+        Returns:
+            The histogram bucket bounds in seconds and the stats of each
+            handler by 'alert_type:handler', with the keys 'calls',
+            'total_time', 'max_time' and 'histogram'.
+        """
+        return self.alertmanager.get_handler_stats()
+
     @export
     def force_reannounce(self, torrent_ids: List[str]) -> None:
         log.debug('Forcing reannouncment to: %s', torrent_ids)
@@ -663,11 +720,17 @@ def pause_torrent(self, torrent_id: str) -> None:
 
     @export
     def pause_torrents(self, torrent_ids: List[str] = None) -> None:
-        """Pauses a list of torrents"""
+        """Pauses a list of torrents
+
+        The state changes are emitted in one event and the state is saved once.
+        """
         if not torrent_ids:
             torrent_ids = self.torrentmanager.get_torrent_list()
-        for torrent_id in torrent_ids:
-            self.pause_torrent(torrent_id)
+        log.debug('Pausing %s torrents', len(torrent_ids))
+        with self.torrentmanager.batch_state_changes():
+            for torrent_id in torrent_ids:
+                self.torrentmanager[torrent_id].pause()
+        self.torrentmanager.schedule_save_state()
 
     @export
     def connect_peer(self, torrent_id: str, ip: str, port: int):
@@ -678,9 +741,11 @@ def connect_peer(self, torrent_id: str, ip: str, port: int):
     @export
     def move_storage(self, torrent_ids: List[str], dest: str):
         log.debug('Moving storage %s to %s', torrent_ids, dest)
-        for torrent_id in torrent_ids:
-            if not self.torrentmanager[torrent_id].move_storage(dest):
-                log.warning('Error moving torrent %s to %s', torrent_id, dest)
+        with self.torrentmanager.batch_state_changes():
+            for torrent_id in torrent_ids:
+                if not self.torrentmanager[torrent_id].move_storage(dest):
+                    log.warning('Error moving torrent %s to %s', torrent_id, dest)
+        self.torrentmanager.schedule_save_state()
 
     @export
     def pause_session(self) -> None:
@@ -694,8 +759,9 @@ def resume_session(self) -> None:
         """Resume the entire session"""
         if self.session.is_paused():
             self.session.resume()
-            for torrent_id in self.torrentmanager.torrents:
-                self.torrentmanager[torrent_id].update_state()
+            with self.torrentmanager.batch_state_changes():
+                for torrent in self.torrentmanager.torrents.values():
+                    torrent.update_state()
             component.get('EventManager').emit(SessionResumedEvent())
 
     @export
@@ -714,11 +780,17 @@ def resume_torrent(self, torrent_id: str) -> None:
 
     @export
     def resume_torrents(self, torrent_ids: List[str] = None) -> None:
-        """Resumes a list of torrents"""
+        """Resumes a list of torrents
+
+        The state changes are emitted in one event and the state is saved once.
+        """
         if not torrent_ids:
             torrent_ids = self.torrentmanager.get_torrent_list()
-        for torrent_id in torrent_ids:
-            self.resume_torrent(torrent_id)
+        log.debug('Resuming %s torrents', len(torrent_ids))
+        with self.torrentmanager.batch_state_changes():
+            for torrent_id in torrent_ids:
+                self.torrentmanager[torrent_id].resume()
+        self.torrentmanager.schedule_save_state()
 
     def create_torrent_status(
         self,
@@ -761,6 +833,55 @@ def get_torrent_status(
             all_keys=not keys,
         )
 
+    @export
+    def get_torrent_file_progress_delta(
+        self, torrent_id: str, version: int = 0
+    ) -> Tuple[int, Dict[int, float]]:
+        """Get the progress of the torrent files changed since a version.
+
+        Args:
+            torrent_id: The torrent ID.
+            version: The version returned by a previous call, 0 for all files.
+
+        Returns:
+            The current version and the changed file progress (0.0 -> 1.0)
+            by file index.
+        """
+        return self.torrentmanager[torrent_id].get_file_progress_delta(version)
+
+    @export
+    def get_torrent_file_tree(
+        self,
+        torrent_id: str,
+        path: str = '',
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Get a page of the directories and files in a torrent directory.
+
+        The directory sizes, progress and priorities are aggregated from a
+        cached index of the torrent files so large torrents can be browsed
+        one directory page at a time.
+
+        Args:
+            torrent_id: The torrent ID.
+            path: The directory path, '' for the root.
+            offset: The index of the first child to return.
+            limit: The maximum number of children to return.
+
+        Returns:
+            The directory with the total number of children and the page of
+            children, directories before files.
+
+        Raises:
+            InvalidPathError: If the directory does not exist in the torrent.
+        """
+        torrent = self.torrentmanager[torrent_id]
+        try:
+            return torrent.get_file_tree(path, offset, limit)
+        except KeyError:
+            raise InvalidPathError('Path "%s" is not in the torrent.' % path)
+
     @export
     @maybe_coroutine
     async def get_torrents_status(
@@ -778,6 +899,152 @@ async def get_torrents_status(
                 status_dict[key].update(self.pluginmanager.get_status(key, plugin_keys))
         return status_dict
 
+    @staticmethod
+    def _sort_item(value, torrent_id):
+        """The sort order item of a torrent.
+
+        Torrents without a value sort first and torrents with equal values sort
+        by torrent ID.
+        """
+        if value is None:
+            return False, 0, torrent_id
+        return True, value, torrent_id
+
+    def _get_sort_items(self, torrent_ids, sort_key):
+        """Get the sort order items of the torrents by the status key."""
+        if not sort_key:
+            return sorted(self._sort_item('', torrent_id) for torrent_id in torrent_ids)
+
+        status_dict, plugin_keys = self.torrentmanager.build_torrents_status(
+            torrent_ids, [sort_key]
+        )
+        items = []
+        for torrent_id, status in status_dict.items():
+            if plugin_keys:
+                status = self.pluginmanager.get_status(torrent_id, plugin_keys)
+            items.append(self._sort_item(status.get(sort_key), torrent_id))
+        items.sort()
+        return items
+
+    @export
+    @maybe_coroutine
+    async def get_torrents_status_page(
+        self,
+        filter_dict: dict,
+        keys: List[str],
+        sort_key: str = None,
+        reverse: bool = False,
+        cursor: Optional[List[Any]] = None,
+        limit: int = TORRENTS_STATUS_PAGE_SIZE,
+    ) -> Dict[str, Any]:
+        """Get the status of the torrents matching filter_dict one page at a time.
+
+        The torrents are sorted by the sort_key status value, then by torrent ID,
+        and a page starts after the cursor returned with the previous page, so
+        torrents added or removed between the calls do not shift the pages.
+
+        Args:
+            filter_dict: The filter the torrents must match.
+            keys: The status keys to get, empty for all keys.
+            sort_key: The status key to sort the torrents by, defaults to
+                the torrent ID.
+            reverse: Sort in descending order.
+            cursor: The cursor returned with the previous page, None for the
+                first page.
+            limit: The maximum number of torrents in the page.
+
+        Returns:
+            The page of torrents in sort order, the total number of matching
+            torrents and the cursor of the next page, None for the last page.
+
+            The format of the dict::
+
+                {
+                    "torrents": [[torrent_id, status_dict], ...],
+                    "total": int,
+                    "cursor": list or None,
+                }
+        """
+        all_keys = not keys
+        torrent_ids = self.filtermanager.filter_torrent_ids(filter_dict)
+        items = self._get_sort_items(torrent_ids, sort_key)
+
+        cursor_item = None if cursor is None else self._sort_item(*cursor)
+        if reverse:
+            end = len(items)
+            if cursor_item:
+                end = bisect.bisect_left(items, cursor_item)
+            page_items = items[max(end - limit, 0) : end][::-1]
+            more = end > limit
+        else:
+            start = 0
+            if cursor_item:
+                start = bisect.bisect_right(items, cursor_item)
+            page_items = items[start : start + limit]
+            more = start + limit < len(items)
+
+        page_ids = [item[2] for item in page_items]
+        status_dict, plugin_keys = await self.torrentmanager.torrents_status_update(
+            page_ids, keys
+        )
+        # Ask the plugin manager to fill in the plugin keys
+        if len(plugin_keys) > 0 or all_keys:
+            for key in status_dict:
+                status_dict[key].update(self.pluginmanager.get_status(key, plugin_keys))
+
+        next_cursor = None
+        if more and page_items:
+            not_none, value, torrent_id = page_items[-1]
+            next_cursor = [value if not_none else None, torrent_id]
+        return {
+            'torrents': [
+                [torrent_id, status_dict[torrent_id]]
+                for torrent_id in page_ids
+                if torrent_id in status_dict
+            ],
+            'total': len(items),
+            'cursor': next_cursor,
+        }
+
+    @export
+    def subscribe_torrents_status(
+        self, filter_dict: dict, keys: List[str], max_rate: float = 1.0
+    ) -> dict:
+        """Subscribe to the status changes of torrents matching filter_dict.
+
+        Instead of polling get_torrents_status, the changed status values are
+        pushed to the session in a TorrentsStatusChangedEvent, so the client
+        must register a handler for that event. A new subscription replaces the
+        previous one of the session.
+
+        Args:
+            filter_dict: The filter the torrents must match.
+            keys: The status keys to push, empty for all keys.
+            max_rate: The maximum number of pushes per second.
+
+        Returns:
+            The current status of the matching torrents.
+        """
+        session_id = component.get('RPCServer').get_session_id()
+        # A new subscription starts the pushed diffs from the full status.
+        self.torrentmanager.subscribe_status(session_id, filter_dict, keys, max_rate)
+        all_keys = not keys
+        torrent_ids = self.filtermanager.filter_torrent_ids(dict(filter_dict))
+        status_dict, plugin_keys = self.torrentmanager.build_torrents_status(
+            torrent_ids, keys, diff=True, session_id=get_push_diff_id(session_id)
+        )
+        if len(plugin_keys) > 0 or all_keys:
+            for key in status_dict:
+                status_dict[key].update(self.pluginmanager.get_status(key, plugin_keys))
+
+        return status_dict
+
+    @export
+    def unsubscribe_torrents_status(self) -> None:
+        """Stop pushing torrent status changes to the session."""
+        session_id = component.get('RPCServer').get_session_id()
+        self.torrentmanager.unsubscribe_status(session_id)
+
     @export
     def get_filter_tree(
         self, show_zero_hits: bool = True, hide_cat: List[str] = None
@@ -874,8 +1141,10 @@ def disable_plugin(self, plugin: str) -> 'defer.Deferred[bool]':
     @export
     def force_recheck(self, torrent_ids: List[str]) -> None:
         """Forces a data recheck on torrent_ids"""
-        for torrent_id in torrent_ids:
-            self.torrentmanager[torrent_id].force_recheck()
+        with self.torrentmanager.batch_state_changes():
+            for torrent_id in torrent_ids:
+                self.torrentmanager[torrent_id].force_recheck()
+        self.torrentmanager.schedule_save_state()
 
     @export
     def set_torrent_options(
@@ -894,15 +1163,19 @@ def set_torrent_options(
         if isinstance(torrent_ids, str):
             torrent_ids = [torrent_ids]
 
-        for torrent_id in torrent_ids:
-            self.torrentmanager[torrent_id].set_options(options)
+        with self.torrentmanager.batch_state_changes():
+            for torrent_id in torrent_ids:
+                self.torrentmanager[torrent_id].set_options(options)
+        self.filtermanager.update_index(torrent_ids)
+        self.torrentmanager.schedule_save_state()
 
     @export
     def set_torrent_trackers(
         self, torrent_id: str, trackers: List[Dict[str, Any]]
     ) -> None:
         """Sets a torrents tracker list. trackers will be ``[{"url", "tier"}]``"""
-        return self.torrentmanager[torrent_id].set_trackers(trackers)
+        self.torrentmanager[torrent_id].set_trackers(trackers)
+        self.filtermanager.update_index([torrent_id], ['tracker_host'])
 
     @export
     def get_magnet_uri(self, torrent_id: str) -> str:
@@ -1135,19 +1408,27 @@ def rename_folder(
 
         return self.torrentmanager[torrent_id].rename_folder(folder, new_folder)
 
+    def _queue_changed(self):
+        """Emit one queue change for a bulk queue operation and save the state."""
+        component.get('EventManager').emit(TorrentQueueChangedEvent())
+        self.torrentmanager.schedule_save_state()
+
     @export
     def queue_top(self, torrent_ids: List[str]) -> None:
         log.debug('Attempting to queue %s to top', torrent_ids)
+        queue_changed = False
         # torrent_ids must be sorted in reverse before moving to preserve order
         for torrent_id in sorted(
             torrent_ids, key=self.torrentmanager.get_queue_position, reverse=True
         ):
             try:
-                # If the queue method returns True, then we should emit a signal
+                # If the queue method returns True, then the queue has changed
                 if self.torrentmanager.queue_top(torrent_id):
-                    component.get('EventManager').emit(TorrentQueueChangedEvent())
+                    queue_changed = True
             except KeyError:
                 log.warning('torrent_id: %s does not exist in the queue', torrent_id)
+        if queue_changed:
+            self._queue_changed()
 
     @export
     def queue_up(self, torrent_ids: List[str]) -> None:
@@ -1157,6 +1438,7 @@ def queue_up(self, torrent_ids: List[str]) -> None:
             for torrent_id in torrent_ids
         )
         torrent_moved = True
+        queue_changed = False
         prev_queue_position = None
         # torrent_ids must be sorted before moving.
         for queue_position, torrent_id in sorted(torrents):
@@ -1168,11 +1450,13 @@ def queue_up(self, torrent_ids: List[str]) -> None:
                     log.warning(
                         'torrent_id: %s does not exist in the queue', torrent_id
                     )
-            # If the torrent moved, then we should emit a signal
+            # If the torrent moved, then the queue has changed
             if torrent_moved:
-                component.get('EventManager').emit(TorrentQueueChangedEvent())
+                queue_changed = True
             else:
                 prev_queue_position = queue_position
+        if queue_changed:
+            self._queue_changed()
 
     @export
     def queue_down(self, torrent_ids: List[str]) -> None:
@@ -1182,6 +1466,7 @@ def queue_down(self, torrent_ids: List[str]) -> None:
             for torrent_id in torrent_ids
         )
         torrent_moved = True
+        queue_changed = False
         prev_queue_position = None
         # torrent_ids must be sorted before moving.
         for queue_position, torrent_id in sorted(torrents, reverse=True):
@@ -1193,25 +1478,30 @@ def queue_down(self, torrent_ids: List[str]) -> None:
                     log.warning(
                         'torrent_id: %s does not exist in the queue', torrent_id
                     )
-            # If the torrent moved, then we should emit a signal
+            # If the torrent moved, then the queue has changed
             if torrent_moved:
-                component.get('EventManager').emit(TorrentQueueChangedEvent())
+                queue_changed = True
             else:
                 prev_queue_position = queue_position
+        if queue_changed:
+            self._queue_changed()
 
     @export
     def queue_bottom(self, torrent_ids: List[str]) -> None:
         log.debug('Attempting to queue %s to bottom', torrent_ids)
+        queue_changed = False
         # torrent_ids must be sorted before moving to preserve order
         for torrent_id in sorted(
             torrent_ids, key=self.torrentmanager.get_queue_position
         ):
             try:
-                # If the queue method returns True, then we should emit a signal
+                # If the queue method returns True, then the queue has changed
                 if self.torrentmanager.queue_bottom(torrent_id):
-                    component.get('EventManager').emit(TorrentQueueChangedEvent())
+                    queue_changed = True
             except KeyError:
                 log.warning('torrent_id: %s does not exist in the queue', torrent_id)
+        if queue_changed:
+            self._queue_changed()
 
     @export
     def glob(self, path: str) -> List[str]:
@@ -7,8 +7,10 @@
 #
 
 import logging
+import time
 
 import deluge.component as component
+from deluge.core.perfstats import CATEGORY_EVENT, get_callable_name
 
 log = logging.getLogger(__name__)
 
@@ -17,28 +19,57 @@ class EventManager(component.Component):
     def __init__(self):
         component.Component.__init__(self, 'EventManager')
         self.handlers = {}
+        self.perf_stats = component.get('PerfStats')
 
     def emit(self, event):
         """
         Emits the event to interested clients.
 
+        An event emitted in place of other events, e.g. TorrentStatesChangedEvent,
+        is split into those events for the handlers of objects not registered
+        for the event itself.
+
         :param event: DelugeEvent
         """
         # Emit the event to the interested clients
         component.get('RPCServer').emit_event(event)
         # Call any handlers for the event
-        if event.name in self.handlers:
-            for handler in self.handlers[event.name]:
-                # log.debug('Running handler %s for event %s with args: %s', event.name, handler, event.args)
-                try:
-                    handler(*event.args)
-                except Exception as ex:
-                    log.error(
-                        'Event handler %s failed in %s with exception %s',
-                        event.name,
-                        handler,
-                        ex,
-                    )
+        handlers = self.handlers.get(event.name, [])
+        self._call_handlers(event, handlers)
+
+        replaces = getattr(event, 'replaces', None)
+        if replaces and self.handlers.get(replaces):
+            owners = {getattr(handler, '__self__', handler) for handler in handlers}
+            split_handlers = [
+                handler
+                for handler in self.handlers[replaces]
+                if getattr(handler, '__self__', handler) not in owners
+            ]
+            if split_handlers:
+                for split_event in event.split():
+                    self._call_handlers(split_event, split_handlers)
+
+    def _call_handlers(self, event, handlers):
+        perf_stats = self.perf_stats if self.perf_stats.enabled else None
+        for handler in handlers:
+            # log.debug('Running handler %s for event %s with args: %s', event.name, handler, event.args)
+            if perf_stats:
+                start = time.perf_counter()
+            try:
+                handler(*event.args)
+            except Exception as ex:
+                log.error(
+                    'Event handler %s failed in %s with exception %s',
+                    event.name,
+                    handler,
+                    ex,
+                )
+            if perf_stats:
+                perf_stats.record(
+                    CATEGORY_EVENT,
+                    f'{event.name}:{get_callable_name(handler)}',
+                    time.perf_counter() - start,
+                )
 
     def register_event_handler(self, event, handler):
         """
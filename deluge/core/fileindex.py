@@ -0,0 +1,269 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Index of the files of a torrent and the directory tree of their paths."""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+# The aggregate priority of a directory with files of different priorities.
+MIXED_PRIORITY = 9
+
+
+class FileIndex:
+    """Holds the files of a torrent with a precomputed directory tree.
+
+    The directories are numbered in the order they are found so a parent always
+    has a lower id than its children, and the directory aggregates are summed up
+    the tree in one pass of the directories in reverse order.
+
+    The done bytes and priority aggregates of the directories are cached and
+    only the directories above a changed file are updated, so a page of
+    children does not depend on the number of files.
+
+    Args:
+        files (list of dict): The files, as returned by `convert_lt_files`.
+
+    Attributes:
+        files (list of dict): The files, must not be modified.
+        sizes (list of int): The size of each file.
+        dir_paths (list of str): The path of each directory, the root is ''.
+        dir_ids (dict): The directory ids ``{path: dir_id}``.
+        dir_sizes (list of int): The total size of the files in each directory.
+        done (list of int): The bytes downloaded of each file.
+        priorities (list of int): The priority of each file, None if not set.
+
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.sizes = [_file['size'] for _file in files]
+
+        self.dir_paths = ['']
+        self.dir_ids = {'': 0}
+        self._dir_parents = [-1]
+        self._dir_dirs = [[]]
+        self._dir_files = [[]]
+        self._file_dirs = []
+        for _file in files:
+            dirname, sep, dummy_name = _file['path'].rpartition('/')
+            dir_id = self.dir_ids.get(dirname) if sep else 0
+            if dir_id is None:
+                dir_id = self._add_dir(dirname)
+            self._file_dirs.append(dir_id)
+            self._dir_files[dir_id].append(_file['index'])
+
+        self.dir_sizes = self.sum_dirs(self.sizes)
+
+        self.done = [0] * len(files)
+        self._dir_done = [0] * len(self.dir_paths)
+        self.priorities = [None] * len(files)
+        # The number of files of each priority in each directory {priority: count}.
+        self._dir_priority_counts = self.count_dir_priorities(self.priorities)
+
+    def __len__(self):
+        return len(self.files)
+
+    def _add_dir(self, path):
+        parent, sep, dummy_name = path.rpartition('/')
+        parent_id = self.dir_ids.get(parent) if sep else 0
+        if parent_id is None:
+            parent_id = self._add_dir(parent)
+
+        dir_id = len(self.dir_paths)
+        self.dir_paths.append(path)
+        self.dir_ids[path] = dir_id
+        self._dir_parents.append(parent_id)
+        self._dir_dirs.append([])
+        self._dir_files.append([])
+        self._dir_dirs[parent_id].append(dir_id)
+        return dir_id
+
+    def sum_dirs(self, values):
+        """Sum the values of the files for each directory.
+
+        Args:
+            values (list of int): A value for each file.
+
+        Returns:
+            list: The sum of the values of the files in each directory.
+
+        """
+        totals = [0] * len(self.dir_paths)
+        for dir_id, value in zip(self._file_dirs, values):
+            totals[dir_id] += value
+
+        parents = self._dir_parents
+        for dir_id in range(len(totals) - 1, 0, -1):
+            totals[parents[dir_id]] += totals[dir_id]
+        return totals
+
+    def count_dir_priorities(self, priorities):
+        """Count the files of each priority in each directory.
+
+        Args:
+            priorities (list of int): The priority of each file.
+
+        Returns:
+            list: The ``{priority: count}`` of the files in each directory.
+
+        """
+        counts = [{} for dummy_path in self.dir_paths]
+        for dir_id, priority in zip(self._file_dirs, priorities):
+            counts[dir_id][priority] = counts[dir_id].get(priority, 0) + 1
+
+        parents = self._dir_parents
+        for dir_id in range(len(counts) - 1, 0, -1):
+            parent_counts = counts[parents[dir_id]]
+            for priority, count in counts[dir_id].items():
+                parent_counts[priority] = parent_counts.get(priority, 0) + count
+        return counts
+
+    def _iter_file_dirs(self, index):
+        """The directory of a file and the directories above it."""
+        dir_id = self._file_dirs[index]
+        while dir_id != -1:
+            yield dir_id
+            dir_id = self._dir_parents[dir_id]
+
+    def set_done(self, done):
+        """Set the bytes downloaded of all the files.
+
+        Args:
+            done (list of int): The bytes downloaded of each file.
+
+        """
+        self.done = list(done)
+        self._dir_done = self.sum_dirs(self.done)
+
+    def set_file_done(self, index, done):
+        """Set the bytes downloaded of a file.
+
+        Args:
+            index (int): The file index.
+            done (int): The bytes downloaded of the file.
+
+        """
+        delta = done - self.done[index]
+        if not delta:
+            return
+        self.done[index] = done
+        for dir_id in self._iter_file_dirs(index):
+            self._dir_done[dir_id] += delta
+
+    def set_priorities(self, priorities):
+        """Set the priorities of the files, only the changed files are updated.
+
+        Args:
+            priorities (list of int): The priority of each file.
+
+        """
+        if len(priorities) != len(self.priorities):
+            log.debug('Ignoring %d file priorities', len(priorities))
+            return
+
+        for index, (priority, prev_priority) in enumerate(
+            zip(priorities, self.priorities)
+        ):
+            if priority == prev_priority:
+                continue
+            self.priorities[index] = priority
+            for dir_id in self._iter_file_dirs(index):
+                counts = self._dir_priority_counts[dir_id]
+                counts[prev_priority] -= 1
+                if not counts[prev_priority]:
+                    del counts[prev_priority]
+                counts[priority] = counts.get(priority, 0) + 1
+
+    def get_dir_priority(self, dir_id):
+        """Get the aggregate priority of a directory.
+
+        Args:
+            dir_id (int): The directory id.
+
+        Returns:
+            int: The priority of the files in the directory, `MIXED_PRIORITY`
+                if they have different priorities or None if it has no files.
+
+        """
+        counts = self._dir_priority_counts[dir_id]
+        if len(counts) == 1:
+            return next(iter(counts))
+        return MIXED_PRIORITY if counts else None
+
+    def get_children(self, path, offset=0, limit=None):
+        """Get a page of the directories and files in a directory.
+
+        The progress and priorities are those set with `set_done`,
+        `set_file_done` and `set_priorities`.
+
+        Args:
+            path (str): The directory path, '' for the root.
+            offset (int): The index of the first child to return.
+            limit (int, optional): The maximum number of children to return.
+
+        Returns:
+            dict: The directory with the number of children and the page of
+                children, directories before files.
+
+            The format of the dict::
+
+                {
+                    "path": str,
+                    "size": int,
+                    "progress": float,
+                    "priority": int,
+                    "total": int,
+                    "children": [
+                        {"type": "dir", "path": str, "size": int, "progress": float,
+                         "priority": int},
+                        {"type": "file", "index": int, "path": str, "size": int,
+                         "offset": int, "progress": float, "priority": int},
+                        ...
+                    ]
+                }
+
+        Raises:
+            KeyError: If the directory does not exist.
+
+        """
+        dir_id = self.dir_ids[path.strip('/')]
+
+        def dir_entry(child_id):
+            size = self.dir_sizes[child_id]
+            return {
+                'type': 'dir',
+                'path': self.dir_paths[child_id],
+                'size': size,
+                'progress': self._dir_done[child_id] / size if size else 1.0,
+                'priority': self.get_dir_priority(child_id),
+            }
+
+        children = self._dir_dirs[dir_id] + self._dir_files[dir_id]
+        num_dirs = len(self._dir_dirs[dir_id])
+        end = len(children) if limit is None else offset + limit
+        page = []
+        for position in range(offset, min(end, len(children))):
+            if position < num_dirs:
+                page.append(dir_entry(children[position]))
+            else:
+                index = children[position]
+                size = self.sizes[index]
+                page.append(
+                    dict(
+                        self.files[index],
+                        type='file',
+                        progress=self.done[index] / size if size else 0.0,
+                        priority=self.priorities[index],
+                    )
+                )
+
+        tree = dir_entry(dir_id)
+        del tree['type']
+        tree['total'] = len(children)
+        tree['children'] = page
+        return tree
@@ -76,24 +76,6 @@ def filter_by_name(torrent_ids, search_string):
             yield torrent_id
 
 
-def tracker_error_filter(torrent_ids, values):
-    filtered_torrent_ids = []
-    tm = component.get('TorrentManager')
-
-    # If this is a tracker_host, then we need to filter on it
-    if values[0] != 'Error':
-        for torrent_id in torrent_ids:
-            if values[0] == tm[torrent_id].get_status(['tracker_host'])['tracker_host']:
-                filtered_torrent_ids.append(torrent_id)
-        return filtered_torrent_ids
-
-    # Check torrent's tracker_status for 'Error:' and return those torrent_ids
-    for torrent_id in torrent_ids:
-        if 'Error:' in tm[torrent_id].get_status(['tracker_status'])['tracker_status']:
-            filtered_torrent_ids.append(torrent_id)
-    return filtered_torrent_ids
-
-
 class FilterManager(component.Component):
     """FilterManager"""
 
@@ -106,6 +88,11 @@ def __init__(self, core):
         self.register_filter('keyword', filter_keywords)
         self.register_filter('name', filter_by_name)
         self.tree_fields = {}
+        # Inverted index of the tree fields {field: {value: set(torrent_id)}}
+        self.index = {}
+        # The indexed values of each torrent {torrent_id: {field: value}}
+        self.indexed_values = {}
+        self.tracker_errors = set()
 
         self.register_tree_field('state', self._init_state_tree)
 
@@ -114,13 +101,144 @@ def _init_tracker_tree():
 
         self.register_tree_field('tracker_host', _init_tracker_tree)
 
-        self.register_filter('tracker_host', tracker_error_filter)
+        self.register_filter('tracker_host', self.filter_tracker_host)
 
         def _init_users_tree():
             return {'': 0}
 
         self.register_tree_field('owner', _init_users_tree)
 
+        event_manager = component.get('EventManager')
+        event_manager.register_event_handler('TorrentAddedEvent', self.on_torrent_added)
+        event_manager.register_event_handler(
+            'TorrentRemovedEvent', self.on_torrent_removed
+        )
+        event_manager.register_event_handler(
+            'TorrentStateChangedEvent', self.on_torrent_state_changed
+        )
+        event_manager.register_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrent_states_changed
+        )
+        event_manager.register_event_handler(
+            'TorrentTrackerStatusEvent', self.on_torrent_tracker_status
+        )
+
+    def start(self):
+        self.index = {field: {} for field in self.tree_fields}
+        self.indexed_values = {}
+        self.tracker_errors = {
+            torrent_id
+            for torrent_id, torrent in self.torrents.torrents.items()
+            if 'Error:' in torrent.tracker_status
+        }
+        self.update_index(list(self.torrents.torrents))
+
+    def update_index(self, torrent_ids, fields=None):
+        """Update the indexed values of torrents.
+
+        Must be called when a tree field value changes without an event that
+        the FilterManager handles, e.g. plugins that register a tree field.
+
+        Args:
+            torrent_ids (list of str): The torrent IDs to update.
+            fields (list of str, optional): The tree fields to update, defaults
+                to all tree fields.
+
+        """
+        if fields is None:
+            fields = list(self.index)
+        else:
+            fields = [field for field in fields if field in self.index]
+        torrent_ids = [
+            torrent_id
+            for torrent_id in torrent_ids
+            if torrent_id in self.torrents.torrents
+        ]
+        if not fields or not torrent_ids:
+            return
+
+        torrent_keys, plugin_keys = self.torrents.separate_keys(fields, torrent_ids)
+        for torrent_id in torrent_ids:
+            status = self.core.create_torrent_status(
+                torrent_id, torrent_keys, plugin_keys
+            )
+            for field in fields:
+                if field in status:
+                    self._set_index_value(torrent_id, field, status[field])
+
+    def _set_index_value(self, torrent_id, field, value):
+        values = self.indexed_values.setdefault(torrent_id, {})
+        if field in values:
+            old_value = values[field]
+            if old_value == value:
+                return
+            self._discard_index_value(torrent_id, field, old_value)
+        values[field] = value
+        self.index[field].setdefault(value, set()).add(torrent_id)
+
+    def _discard_index_value(self, torrent_id, field, value):
+        buckets = self.index.get(field)
+        if buckets is None or value not in buckets:
+            return
+        buckets[value].discard(torrent_id)
+        if not buckets[value]:
+            del buckets[value]
+
+    def on_torrent_added(self, torrent_id, from_state):
+        self.update_index([torrent_id])
+
+    def on_torrent_removed(self, torrent_id):
+        for field, value in self.indexed_values.pop(torrent_id, {}).items():
+            self._discard_index_value(torrent_id, field, value)
+        self.tracker_errors.discard(torrent_id)
+
+    def on_torrent_state_changed(self, torrent_id, state):
+        # The torrent is indexed once the TorrentAddedEvent is emitted.
+        if torrent_id in self.indexed_values and 'state' in self.index:
+            torrent = self.torrents.torrents[torrent_id]
+            self._set_index_value(torrent_id, 'state', torrent.state)
+
+    def on_torrent_states_changed(self, torrent_states):
+        for torrent_id, state in torrent_states.items():
+            self.on_torrent_state_changed(torrent_id, state)
+
+    def on_torrent_tracker_status(self, torrent_id, status):
+        if torrent_id not in self.indexed_values:
+            return
+        if 'Error:' in status:
+            self.tracker_errors.add(torrent_id)
+        else:
+            self.tracker_errors.discard(torrent_id)
+        # The tracker host is looked up again after a tracker status change.
+        self.update_index([torrent_id], ['tracker_host'])
+
+    def filter_index(self, torrent_ids, field, values):
+        """Filter torrents on the indexed values of a tree field.
+
+        Args:
+            torrent_ids (list of str): The torrent IDs to filter.
+            field (str): The tree field.
+            values (list): The field values to match.
+
+        Returns:
+            list: The torrent IDs with any of the values.
+
+        """
+        buckets = self.index[field]
+        matched = set().union(*[buckets[value] for value in values if value in buckets])
+        return [torrent_id for torrent_id in torrent_ids if torrent_id in matched]
+
+    def filter_tracker_host(self, torrent_ids, values):
+        """Filter on tracker_host or on torrents with a tracker error."""
+        if values[0] != 'Error':
+            return self.filter_index(torrent_ids, 'tracker_host', values[:1])
+
+        return [
+            torrent_id
+            for torrent_id in torrent_ids
+            if torrent_id in self.tracker_errors
+        ]
+
     def filter_torrent_ids(self, filter_dict):
         """
         returns a list of torrent_id's matching filter_dict.
@@ -171,20 +289,30 @@ def filter_torrent_ids(self, filter_dict):
         if not filter_dict:
             return torrent_ids
 
+        # Indexed tree fields
+        for field, values in list(filter_dict.items()):
+            if field in self.index:
+                torrent_ids = self.filter_index(torrent_ids, field, values)
+                del filter_dict[field]
+
+        if not filter_dict:
+            return torrent_ids
+
         torrent_keys, plugin_keys = self.torrents.separate_keys(
             list(filter_dict), torrent_ids
         )
         # Leftover filter arguments, default filter on status fields.
-        for torrent_id in list(torrent_ids):
+        filtered_torrent_ids = []
+        for torrent_id in torrent_ids:
             status = self.core.create_torrent_status(
                 torrent_id, torrent_keys, plugin_keys
             )
-            for field, values in filter_dict.items():
-                if field in status and status[field] in values:
-                    continue
-                elif torrent_id in torrent_ids:
-                    torrent_ids.remove(torrent_id)
-        return torrent_ids
+            if all(
+                field in status and status[field] in values
+                for field, values in filter_dict.items()
+            ):
+                filtered_torrent_ids.append(torrent_id)
+        return filtered_torrent_ids
 
     def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
         """
@@ -197,22 +325,27 @@ def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
             for cat in hide_cat:
                 tree_keys.remove(cat)
 
-        torrent_keys, plugin_keys = self.torrents.separate_keys(tree_keys, torrent_ids)
-        items = {field: self.tree_fields[field]() for field in tree_keys}
+        # Only count the torrents visible to the user if not all of them.
+        visible_ids = None
+        if len(torrent_ids) != len(self.torrents.torrents):
+            visible_ids = set(torrent_ids)
 
-        for torrent_id in list(torrent_ids):
-            status = self.core.create_torrent_status(
-                torrent_id, torrent_keys, plugin_keys
-            )  # status={key:value}
-            for field in tree_keys:
-                value = status[field]
-                items[field][value] = items[field].get(value, 0) + 1
+        items = {field: self.tree_fields[field]() for field in tree_keys}
+        for field in tree_keys:
+            for value, value_ids in self.index[field].items():
+                if visible_ids is None:
+                    count = len(value_ids)
+                else:
+                    count = len(value_ids & visible_ids)
+                if count:
+                    items[field][value] = items[field].get(value, 0) + count
 
         if 'tracker_host' in items:
             items['tracker_host']['All'] = len(torrent_ids)
-            items['tracker_host']['Error'] = len(
-                tracker_error_filter(torrent_ids, ('Error',))
-            )
+            if visible_ids is None:
+                items['tracker_host']['Error'] = len(self.tracker_errors)
+            else:
+                items['tracker_host']['Error'] = len(self.tracker_errors & visible_ids)
 
         if not show_zero_hits:
             for cat in ['state', 'owner', 'tracker_host']:
@@ -244,22 +377,36 @@ def deregister_filter(self, filter_id):
         del self.registered_filters[filter_id]
 
     def register_tree_field(self, field, init_func=lambda: {}):
+        """Register a field for the filter tree and index its torrent values.
+
+        Note:
+            The index is updated on torrent add, remove and state change, so any
+            other changes to the field values must be passed to `update_index`.
+
+        """
         self.tree_fields[field] = init_func
+        self.index[field] = {}
+        for values in self.indexed_values.values():
+            values.pop(field, None)
+        self.update_index(list(self.indexed_values), [field])
 
     def deregister_tree_field(self, field):
         if field in self.tree_fields:
             del self.tree_fields[field]
+        if field in self.index:
+            del self.index[field]
+            for values in self.indexed_values.values():
+                values.pop(field, None)
 
     def filter_state_active(self, torrent_ids):
-        for torrent_id in list(torrent_ids):
+        active_torrent_ids = []
+        for torrent_id in torrent_ids:
             status = self.torrents[torrent_id].get_status(
                 ['download_payload_rate', 'upload_payload_rate']
             )
             if status['download_payload_rate'] or status['upload_payload_rate']:
-                pass
-            else:
-                torrent_ids.remove(torrent_id)
-        return torrent_ids
+                active_torrent_ids.append(torrent_id)
+        return active_torrent_ids
 
     def _hide_state_items(self, state_items):
         """For hide(show)-zero hits"""
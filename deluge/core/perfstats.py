@@ -0,0 +1,197 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Runtime instrumentation of the daemon call paths.
+
+The call counts and times are recorded by category, e.g. the RPC methods, and by
+name within the category. Recording is off by default and the instrumented call
+sites only check the `PerfStats.enabled` flag while it is off.
+
+"""
+
+import bisect
+import functools
+import logging
+import time
+from collections import defaultdict
+
+import deluge.component as component
+
+log = logging.getLogger(__name__)
+
+# The alert handlers by alert type and handler name.
+CATEGORY_ALERT = 'alert'
+# The exported RPC methods, timed until the response is sent.
+CATEGORY_RPC = 'rpc'
+# The EventManager handlers by event and handler name.
+CATEGORY_EVENT = 'event'
+# The functions called by the daemon timers.
+CATEGORY_LOOPING_CALL = 'looping_call'
+CATEGORIES = (CATEGORY_ALERT, CATEGORY_RPC, CATEGORY_EVENT, CATEGORY_LOOPING_CALL)
+
+# The upper bounds in seconds of the call time histogram buckets.
+LATENCY_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+
+
+def get_callable_name(func):
+    """The qualified name of a function or method, for use as a stats name."""
+    return getattr(func, '__qualname__', None) or repr(func)
+
+
+class CallStats:
+    """The call count and times of an instrumented call site.
+
+    Attributes:
+        calls (int): The number of calls.
+        total_time (float): The total time in seconds spent in the calls.
+        max_time (float): The longest call in seconds.
+        histogram (list of int): The number of calls in each `LATENCY_BUCKETS`
+            bucket, with a last bucket for longer calls.
+
+    """
+
+    __slots__ = ('calls', 'total_time', 'max_time', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, duration):
+        self.calls += 1
+        self.total_time += duration
+        if duration > self.max_time:
+            self.max_time = duration
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'total_time': self.total_time,
+            'max_time': self.max_time,
+            'histogram': list(self.histogram),
+        }
+
+
+class PerfStats(component.Component):
+    """Records the call counts and times of the daemon call paths.
+
+    Attributes:
+        enabled (bool): If calls are recorded, can be changed at runtime.
+        stats (dict): The `CallStats` by category and name.
+
+    """
+
+    def __init__(self):
+        component.Component.__init__(self, 'PerfStats')
+        self.enabled = False
+        self.stats = {category: defaultdict(CallStats) for category in CATEGORIES}
+        self._enabled_time = None
+
+    def set_enabled(self, enabled):
+        """Start or stop recording the calls.
+
+        The stats are kept when recording stops and are only cleared by `reset`.
+
+        Args:
+            enabled (bool): If calls are recorded.
+
+        """
+        if enabled == self.enabled:
+            return
+        log.info('Performance stats recording %s', 'on' if enabled else 'off')
+        self.enabled = enabled
+        self._enabled_time = time.time() if enabled else None
+
+    def reset(self):
+        """Clear the recorded stats."""
+        for category_stats in self.stats.values():
+            category_stats.clear()
+        if self.enabled:
+            self._enabled_time = time.time()
+
+    def record(self, category, name, duration):
+        """Record a call, callers should check `enabled` first.
+
+        Args:
+            category (str): The stats category, one of `CATEGORIES`.
+            name (str): The name of the call site.
+            duration (float): The call time in seconds.
+
+        """
+        self.stats[category][name].add(duration)
+
+    def wrap(self, category, func, name=None):
+        """Wrap a function to record its calls while recording is enabled.
+
+        Args:
+            category (str): The stats category, one of `CATEGORIES`.
+            func (callable): The function to wrap.
+            name (str, optional): The stats name, defaults to the function name.
+
+        Returns:
+            callable: The wrapped function.
+
+        """
+        if name is None:
+            name = get_callable_name(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(category, name, time.perf_counter() - start)
+
+        return wrapper
+
+    def get_stats(self, categories=None):
+        """Get the recorded stats.
+
+        Args:
+            categories (list of str, optional): The categories to return,
+                defaults to all of them.
+
+        Returns:
+            dict: The recording state and the stats of each category by name,
+                with the histogram bucket bounds.
+
+            The format of the dict::
+
+                {
+                    "enabled": bool,
+                    "enabled_time": float or None,
+                    "latency_buckets": [float, ...],
+                    "stats": {
+                        category: {
+                            name: {"calls": int, "total_time": float,
+                                   "max_time": float, "histogram": [int, ...]},
+                            ...
+                        },
+                        ...
+                    }
+                }
+
+        """
+        if categories is None:
+            categories = CATEGORIES
+        return {
+            'enabled': self.enabled,
+            'enabled_time': self._enabled_time,
+            'latency_buckets': list(LATENCY_BUCKETS),
+            'stats': {
+                category: {
+                    name: stats.to_dict()
+                    for name, stats in self.stats[category].items()
+                }
+                for category in categories
+                if category in self.stats
+            },
+        }
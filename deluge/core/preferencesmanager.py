@@ -21,6 +21,7 @@
 import deluge.component as component
 import deluge.configmanager
 from deluge._libtorrent import lt
+from deluge.core.perfstats import CATEGORY_LOOPING_CALL
 from deluge.event import ConfigValueChangedEvent
 
 GeoIP = None
@@ -415,7 +416,11 @@ def _on_set_new_release_check(self, key, value):
                 self.new_release_timer.stop()
             # Set a timer to check for a new release every 3 days
             self.new_release_timer = LoopingCall(
-                self._on_set_new_release_check, 'new_release_check', True
+                component.get('PerfStats').wrap(
+                    CATEGORY_LOOPING_CALL, self._on_set_new_release_check
+                ),
+                'new_release_check',
+                True,
             )
             self.new_release_timer.start(72 * 60 * 60, False)
         else:
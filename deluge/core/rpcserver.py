@@ -11,6 +11,7 @@
 import logging
 import os
 import sys
+import time
 import traceback
 from collections import namedtuple
 from types import FunctionType
@@ -26,6 +27,7 @@
     AUTH_LEVEL_DEFAULT,
     AUTH_LEVEL_NONE,
 )
+from deluge.core.perfstats import CATEGORY_RPC
 from deluge.crypto_utils import check_ssl_keys, get_context_factory
 from deluge.error import (
     BadLoginError,
@@ -36,12 +38,20 @@
     _ClientSideRecreateError,
 )
 from deluge.event import ClientDisconnectedEvent
-from deluge.transfer import DelugeTransferProtocol
+from deluge.transfer import DelugeTransferProtocol, get_codec_names, select_codec
 
 RPC_RESPONSE = 1
 RPC_ERROR = 2
 RPC_EVENT = 3
 
+# Events that supersede a previous event of the same name and torrent.
+COALESCED_EVENTS = {
+    'TorrentStateChangedEvent',
+    'TorrentTrackerStatusEvent',
+    'TorrentQueueChangedEvent',
+}
+# The TorrentStatesChangedEvent is also coalesced, see `add_event`.
+
 log = logging.getLogger(__name__)
 
 TCallable = TypeVar('TCallable', bound=Callable)
@@ -125,6 +135,12 @@ def __init__(self):
         super().__init__()
         # namedtuple subclass with auth_level, username for the connected session.
         self.AuthLevel = namedtuple('SessionAuthlevel', 'auth_level, username')
+        # Set if the client can receive multiple events in one RPC_EVENT.
+        self.event_batch = False
+        # Events waiting to be sent as (event_name, args), None if superseded.
+        self._event_batch = []
+        # The index of coalesced events in the batch {(event_name, torrent_id): index}
+        self._event_batch_keys = {}
 
     def message_received(self, request):
         """
@@ -164,6 +180,9 @@ def sendData(self, data):  # NOQA: N802
         :type data: object
 
         """
+        if self._event_batch and data[0] != RPC_EVENT:
+            # Events emitted before a response are received before it.
+            self.flush_events()
         try:
             self.transfer_message(data)
         except Exception as ex:
@@ -171,6 +190,66 @@ def sendData(self, data):  # NOQA: N802
             log.exception(ex)
             raise
 
+    def add_event(self, event):
+        """
+        Adds the event to the batch of events to send to the client.
+
+        An event in `COALESCED_EVENTS` replaces a batched event with the same
+        name and torrent. A TorrentStatesChangedEvent is merged with a batched
+        one, and replaces the batched TorrentStateChangedEvent of its torrents.
+
+        :param event: the event to send
+        :type event: :class:`deluge.event.DelugeEvent`
+        """
+        if event.name == 'TorrentStatesChangedEvent':
+            self._add_states_event(event.args[0])
+            return
+        if event.name == 'TorrentStateChangedEvent':
+            index = self._event_batch_keys.get(('TorrentStatesChangedEvent', None))
+            if index is not None:
+                torrent_states = self._event_batch[index][1][0]
+                torrent_states.pop(event.args[0], None)
+                if not torrent_states:
+                    self._event_batch[index] = None
+                    del self._event_batch_keys[('TorrentStatesChangedEvent', None)]
+        if event.name in COALESCED_EVENTS:
+            key = (event.name, event.args[0] if event.args else None)
+            if key in self._event_batch_keys:
+                self._event_batch[self._event_batch_keys[key]] = None
+            self._event_batch_keys[key] = len(self._event_batch)
+        self._event_batch.append((event.name, event.args))
+
+    def _add_states_event(self, torrent_states):
+        # A copy of the torrent states as the batched event is changed.
+        batched_states = {}
+        key = ('TorrentStatesChangedEvent', None)
+        index = self._event_batch_keys.pop(key, None)
+        if index is not None:
+            batched_states.update(self._event_batch[index][1][0])
+            self._event_batch[index] = None
+        batched_states.update(torrent_states)
+        for torrent_id in torrent_states:
+            index = self._event_batch_keys.pop(
+                ('TorrentStateChangedEvent', torrent_id), None
+            )
+            if index is not None:
+                self._event_batch[index] = None
+        self._event_batch_keys[key] = len(self._event_batch)
+        self._event_batch.append(('TorrentStatesChangedEvent', [batched_states]))
+
+    def flush_events(self):
+        """
+        Sends the batched events to the client in one RPC_EVENT.
+        """
+        events = [event for event in self._event_batch if event is not None]
+        self._event_batch = []
+        self._event_batch_keys = {}
+        if len(events) == 1:
+            self.sendData((RPC_EVENT, *events[0]))
+        elif events:
+            # A RPC_EVENT without an event name holds a list of events.
+            self.sendData((RPC_EVENT, None, events))
+
     def connectionMade(self):  # NOQA: N802
         """
         This method is called when a new client connects.
@@ -262,7 +341,21 @@ def send_error():
 
         if method == 'daemon.info':
             # This is a special case and used in the initial connection process
-            self.sendData((RPC_RESPONSE, request_id, deluge.common.get_version()))
+            codecs = kwargs.get('codecs')
+            if codecs is None:
+                self.sendData((RPC_RESPONSE, request_id, deluge.common.get_version()))
+                return
+            # The client lists the codecs it can receive, in order of preference,
+            # and gets the codecs the daemon can receive in return.
+            self.set_transfer_codec(select_codec(codecs), kwargs.get('compress_level'))
+            self.event_batch = kwargs.get('event_batch', False)
+            self.sendData(
+                (
+                    RPC_RESPONSE,
+                    request_id,
+                    (deluge.common.get_version(), get_codec_names()),
+                )
+            )
             return
         elif method == 'daemon.login':
             # This is a special case and used in the initial connection process
@@ -324,6 +417,17 @@ def send_error():
                 return
 
         log.debug('RPC dispatch %s', method)
+        perf_stats = self.factory.perf_stats
+        if perf_stats and perf_stats.enabled:
+            start = time.perf_counter()
+
+            def record_call(result):
+                perf_stats.record(CATEGORY_RPC, method, time.perf_counter() - start)
+                return result
+
+        else:
+            record_call = None
+
         try:
             method_auth_requirement = self.factory.methods[method]._rpcserver_auth_level
             auth_level = self.factory.authorized_sessions[
@@ -346,6 +450,8 @@ def send_error():
             # for the client
             if not isinstance(ex, DelugeError):
                 log.exception('Exception calling RPC request: %s', ex)
+            if record_call:
+                record_call(None)
         else:
             # Check if the return value is a deferred, since we'll need to
             # wait for it to fire before sending the RPC_RESPONSE
@@ -366,8 +472,12 @@ def on_fail(failure):
                     return failure
 
                 ret.addCallbacks(on_success, on_fail)
+                if record_call:
+                    ret.addBoth(record_call)
             else:
                 self.sendData((RPC_RESPONSE, request_id, ret))
+                if record_call:
+                    record_call(None)
 
 
 class RPCServer(component.Component):
@@ -384,11 +494,24 @@ class RPCServer(component.Component):
     :type allow_remote: bool
     :param listen: if False, will not start listening.. This is only useful in Classic Mode
     :type listen: bool
+    :param event_batch_window: the seconds to collect events for before sending
+        them in one message, 0 sends every event immediately
+    :type event_batch_window: float
     """
 
-    def __init__(self, port=58846, interface='', allow_remote=False, listen=True):
+    def __init__(
+        self,
+        port=58846,
+        interface='',
+        allow_remote=False,
+        listen=True,
+        event_batch_window=0.05,
+    ):
         component.Component.__init__(self, 'RPCServer')
 
+        self.event_batch_window = event_batch_window
+        self._event_batch_call = None
+
         self.factory = Factory()
         self.factory.protocol = DelugeRPCProtocol
         self.factory.session_id = -1
@@ -402,6 +525,8 @@ def __init__(self, port=58846, interface='', allow_remote=False, listen=True):
         self.factory.session_protocols = {}
         # Holds the interested event list for the sessions
         self.factory.interested_events = {}
+        # The PerfStats component of the Core, set when the RPCServer starts.
+        self.factory.perf_stats = None
 
         self.listen = listen
         if not listen:
@@ -549,18 +674,27 @@ def emit_event(self, event):
         """
         Emits the event to interested clients.
 
+        An event emitted in place of other events, e.g. TorrentStatesChangedEvent,
+        is sent as those events to the clients only interested in them.
+
         :param event: the event to emit
         :type event: :class:`deluge.event.DelugeEvent`
         """
         log.debug('intevents: %s', self.factory.interested_events)
+        replaces = getattr(event, 'replaces', None)
+        split_events = None
         # Use copy of `interested_events` since it can mutate while iterating.
         for session_id, interest in self.factory.interested_events.copy().items():
             if event.name in interest:
                 log.debug('Emit Event: %s %s', event.name, event.args)
                 # This session is interested so send a RPC_EVENT
-                self.factory.session_protocols[session_id].sendData(
-                    (RPC_EVENT, event.name, event.args)
-                )
+                self._send_event(session_id, event)
+            elif replaces in interest:
+                # The session only handles the events this event replaces.
+                if split_events is None:
+                    split_events = event.split()
+                for split_event in split_events:
+                    self._send_event(session_id, split_event)
 
     def emit_event_for_session_id(self, session_id, event):
         """
@@ -598,9 +732,47 @@ def emit_event_for_session_id(self, session_id, event):
             event.args,
             session_id,
         )
-        self.factory.session_protocols[session_id].sendData(
-            (RPC_EVENT, event.name, event.args)
-        )
+        self._send_event(session_id, event)
+
+    def _send_event(self, session_id, event):
+        """
+        Sends the event to the session or adds it to the session's event batch.
+
+        :param session_id: the session to send the event to
+        :type session_id: int
+        :param event: the event to send
+        :type event: :class:`deluge.event.DelugeEvent`
+        """
+        protocol = self.factory.session_protocols[session_id]
+        if not protocol.event_batch or self.event_batch_window <= 0:
+            protocol.sendData((RPC_EVENT, event.name, event.args))
+            return
+
+        protocol.add_event(event)
+        if not self._event_batch_call or not self._event_batch_call.active():
+            self._event_batch_call = reactor.callLater(
+                self.event_batch_window, self.flush_events
+            )
+
+    def flush_events(self):
+        """
+        Sends the batched events of all sessions.
+        """
+        if self._event_batch_call and self._event_batch_call.active():
+            self._event_batch_call.cancel()
+        self._event_batch_call = None
+
+        for protocol in list(self.factory.session_protocols.values()):
+            protocol.flush_events()
+
+    def start(self):
+        # The Core, which creates the PerfStats component, is not always created
+        # before the RPCServer.
+        try:
+            self.factory.perf_stats = component.get('PerfStats')
+        except KeyError:
+            self.factory.perf_stats = None
 
     def stop(self):
+        self.flush_events()
         self.factory.state = 'stopping'
@@ -0,0 +1,421 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Append-only journal files of values keyed by id.
+
+Each record in the file is a header with the length and CRC32 of the data,
+followed by the data of a ``(key, value)`` pair. A value of None removes the key.
+Loading replays the records so the last record of a key wins.
+
+The journals are only appended to, with each write synced to disk, and are
+rewritten by an atomic replace, so unlike the old state files no ``.bak`` copy
+of the previous save is kept. The journals are archived after a bad shutdown.
+
+"""
+
+import logging
+import os
+import pickle
+import shutil
+import struct
+import threading
+import zlib
+
+log = logging.getLogger(__name__)
+
+RECORD_HEADER_FORMAT = '!II'
+RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER_FORMAT)
+# The minimum number of records before the journal is compacted.
+COMPACT_MIN_RECORDS = 1000
+
+
+def pack_record(record_data):
+    """Prefix the record data with the journal record header."""
+    header = struct.pack(
+        RECORD_HEADER_FORMAT, len(record_data), zlib.crc32(record_data)
+    )
+    return header + record_data
+
+
+class StateJournal:
+    """Stores values by key in an append-only journal file.
+
+    Only changed values are appended to the journal, and the journal is
+    rewritten with one record per key once it holds more than twice as many
+    records as keys.
+
+    Args:
+        filepath (str): The journal file path.
+
+    Attributes:
+        entries (dict): The values in the journal ``{key: value}``.
+
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.entries = {}
+        self._record_count = 0
+
+    def exists(self):
+        return os.path.isfile(self.filepath)
+
+    def load(self):
+        """Load the values from the journal file.
+
+        An incomplete last record, e.g. from a crash during a write, is truncated
+        from the file. A damaged record is skipped by its length, and the journal
+        is then rewritten with the loaded records, keeping the damaged file as a
+        ``.bak`` copy.
+
+        Returns:
+            dict: The values in the journal.
+
+        """
+        self.entries = {}
+        self._record_count = 0
+        try:
+            with open(self.filepath, 'rb') as _file:
+                data = _file.read()
+        except OSError as ex:
+            log.error('Unable to load %s: %s', self.filepath, ex)
+            return {}
+
+        offset = 0
+        num_damaged = 0
+        while offset + RECORD_HEADER_SIZE <= len(data):
+            length, crc = struct.unpack_from(RECORD_HEADER_FORMAT, data, offset)
+            data_offset = offset + RECORD_HEADER_SIZE
+            if data_offset + length > len(data):
+                break
+            offset = data_offset + length
+            record = self._read_record(data[data_offset:offset], crc)
+            if record is None:
+                num_damaged += 1
+                continue
+            key, value = record
+            self._record_count += 1
+            if value is None:
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = value
+
+        if num_damaged:
+            log.warning(
+                'Skipped %s damaged records in %s, the damaged file is kept as %s',
+                num_damaged,
+                self.filepath,
+                self.filepath + '.bak',
+            )
+            try:
+                shutil.copyfile(self.filepath, self.filepath + '.bak')
+            except OSError as ex:
+                log.error('Unable to backup %s: %s', self.filepath, ex)
+            else:
+                # Rewrite the journal so new records follow the loaded records.
+                self.compact()
+        elif offset < len(data):
+            log.warning(
+                'Discarding incomplete record at offset %s in %s',
+                offset,
+                self.filepath,
+            )
+            try:
+                os.truncate(self.filepath, offset)
+            except OSError as ex:
+                log.error('Unable to truncate %s: %s', self.filepath, ex)
+
+        log.info('Loaded %s entries from %s', len(self.entries), self.filepath)
+        return dict(self.entries)
+
+    @staticmethod
+    def _read_record(record_data, crc):
+        if zlib.crc32(record_data) != crc:
+            return None
+        try:
+            return pickle.loads(record_data, encoding='utf8')
+        except (EOFError, pickle.UnpicklingError, ValueError) as ex:
+            log.debug('Unable to unpickle journal record: %s', ex)
+            return None
+
+    @staticmethod
+    def _pack_record(key, value):
+        return pack_record(pickle.dumps((key, value), protocol=2))
+
+    def write(self, changes):
+        """Append the changed values to the journal.
+
+        Args:
+            changes (dict): The changed values ``{key: value}``, None for a
+                removed key.
+
+        Returns:
+            bool: True if the changes were written.
+
+        """
+        if not changes:
+            return True
+
+        records = [self._pack_record(key, value) for key, value in changes.items()]
+        try:
+            with open(self.filepath, 'ab', 0) as _file:
+                _file.write(b''.join(records))
+                _file.flush()
+                os.fsync(_file.fileno())
+        except (OSError, pickle.PicklingError) as ex:
+            log.error('Unable to save %s: %s', self.filepath, ex)
+            return False
+
+        self._record_count += len(records)
+        for key, value in changes.items():
+            if value is None:
+                self.entries.pop(key, None)
+            else:
+                self.entries[key] = value
+
+        if self._record_count > max(2 * len(self.entries), COMPACT_MIN_RECORDS):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Rewrite the journal with one record for each key.
+
+        Returns:
+            bool: True if the journal was rewritten.
+
+        """
+        filepath_tmp = self.filepath + '.tmp'
+        log.debug(
+            'Compacting %s from %s records to %s',
+            self.filepath,
+            self._record_count,
+            len(self.entries),
+        )
+        try:
+            with open(filepath_tmp, 'wb', 0) as _file:
+                _file.write(
+                    b''.join(
+                        self._pack_record(key, value)
+                        for key, value in self.entries.items()
+                    )
+                )
+                _file.flush()
+                os.fsync(_file.fileno())
+            os.replace(filepath_tmp, self.filepath)
+        except (OSError, pickle.PicklingError) as ex:
+            log.error('Unable to compact %s: %s', self.filepath, ex)
+            return False
+
+        self._record_count = len(self.entries)
+        return True
+
+
+class ResumeDataJournal(StateJournal):
+    """Stores bencoded torrent resume data in an append-only journal file.
+
+    Loading the journal only scans the record headers for the location of the
+    resume data of each torrent, the data itself is read by `get` when the
+    torrent is added to the session.
+
+    The record data is the length of the torrent ID as one byte, the torrent ID
+    and the resume data, with empty resume data for a removed torrent.
+
+    Args:
+        filepath (str): The journal file path.
+
+    Attributes:
+        entries (dict): The location of each record ``{torrent_id: (offset, size)}``.
+
+    """
+
+    def __init__(self, filepath):
+        super().__init__(filepath)
+        self._read_file = None
+        # The record locations are used by both the main and the save thread.
+        self._lock = threading.Lock()
+
+    def __contains__(self, torrent_id):
+        return torrent_id in self.entries
+
+    def close(self):
+        with self._lock:
+            self._close_read_file()
+
+    def _close_read_file(self):
+        if self._read_file:
+            self._read_file.close()
+            self._read_file = None
+
+    def load(self):
+        """Scan the journal file for the resume data records.
+
+        Returns:
+            dict: The location of each torrent record.
+
+        """
+        with self._lock:
+            self._close_read_file()
+            self.entries = {}
+            self._record_count = 0
+            try:
+                with open(self.filepath, 'rb') as _file:
+                    file_size = os.fstat(_file.fileno()).st_size
+                    offset = 0
+                    while offset < file_size:
+                        record = self._scan_record(_file, offset, file_size)
+                        if record is None:
+                            break
+                        torrent_id, size, removed = record
+                        self._record_count += 1
+                        if removed:
+                            self.entries.pop(torrent_id, None)
+                        else:
+                            self.entries[torrent_id] = (offset, size)
+                        offset += size
+            except OSError as ex:
+                log.error('Unable to load %s: %s', self.filepath, ex)
+                self.entries = {}
+                return {}
+
+            if offset < file_size:
+                log.warning(
+                    'Discarding incomplete records at offset %s in %s',
+                    offset,
+                    self.filepath,
+                )
+                try:
+                    os.truncate(self.filepath, offset)
+                except OSError as ex:
+                    log.error('Unable to truncate %s: %s', self.filepath, ex)
+
+        log.info('Found %s entries in %s', len(self.entries), self.filepath)
+        return dict(self.entries)
+
+    @staticmethod
+    def _scan_record(_file, offset, file_size):
+        _file.seek(offset)
+        header = _file.read(RECORD_HEADER_SIZE + 1)
+        if len(header) < RECORD_HEADER_SIZE + 1:
+            return None
+        length, dummy_crc = struct.unpack_from(RECORD_HEADER_FORMAT, header)
+        size = RECORD_HEADER_SIZE + length
+        key_length = header[RECORD_HEADER_SIZE]
+        if offset + size > file_size or key_length + 1 > length:
+            return None
+        torrent_id = _file.read(key_length).decode('ascii', 'replace')
+        return torrent_id, size, length == key_length + 1
+
+    def get(self, torrent_id):
+        """Read the resume data of a torrent from the journal file.
+
+        Args:
+            torrent_id (str): The torrent ID.
+
+        Returns:
+            bytes: The bencoded resume data or None if not found or damaged.
+
+        """
+        with self._lock:
+            location = self.entries.get(torrent_id)
+            if location is None:
+                return None
+            offset, size = location
+            try:
+                if not self._read_file:
+                    self._read_file = open(self.filepath, 'rb')
+                self._read_file.seek(offset)
+                record = self._read_file.read(size)
+            except OSError as ex:
+                log.error('Unable to read %s: %s', self.filepath, ex)
+                return None
+
+        record_data = record[RECORD_HEADER_SIZE:]
+        if zlib.crc32(record_data) != struct.unpack_from('!I', record, 4)[0]:
+            log.warning('Damaged resume data for %s in %s', torrent_id, self.filepath)
+            return None
+        return record_data[record_data[0] + 1 :]
+
+    @staticmethod
+    def _pack_record(torrent_id, resume_data):
+        key = torrent_id.encode('ascii')
+        return pack_record(bytes([len(key)]) + key + (resume_data or b''))
+
+    def write(self, changes):
+        """Append the changed resume data to the journal.
+
+        Args:
+            changes (dict): The changed resume data ``{torrent_id: resume_data}``,
+                None for a removed torrent.
+
+        Returns:
+            bool: True if the changes were written.
+
+        """
+        if not changes:
+            return True
+
+        records = [self._pack_record(key, value) for key, value in changes.items()]
+        with self._lock:
+            try:
+                with open(self.filepath, 'ab', 0) as _file:
+                    offset = _file.seek(0, os.SEEK_END)
+                    _file.write(b''.join(records))
+                    _file.flush()
+                    os.fsync(_file.fileno())
+            except OSError as ex:
+                log.error('Unable to save %s: %s', self.filepath, ex)
+                return False
+
+            self._record_count += len(records)
+            for (key, value), record in zip(changes.items(), records):
+                if value is None:
+                    self.entries.pop(key, None)
+                else:
+                    self.entries[key] = (offset, len(record))
+                offset += len(record)
+
+            if self._record_count > max(2 * len(self.entries), COMPACT_MIN_RECORDS):
+                self._compact()
+        return True
+
+    def compact(self):
+        """Rewrite the journal with one record for each torrent.
+
+        Returns:
+            bool: True if the journal was rewritten.
+
+        """
+        with self._lock:
+            return self._compact()
+
+    def _compact(self):
+        filepath_tmp = self.filepath + '.tmp'
+        log.debug(
+            'Compacting %s from %s records to %s',
+            self.filepath,
+            self._record_count,
+            len(self.entries),
+        )
+        entries = {}
+        try:
+            with open(self.filepath, 'rb') as _file, open(
+                filepath_tmp, 'wb'
+            ) as _file_tmp:
+                for key, (offset, size) in self.entries.items():
+                    _file.seek(offset)
+                    entries[key] = (_file_tmp.tell(), size)
+                    _file_tmp.write(_file.read(size))
+                _file_tmp.flush()
+                os.fsync(_file_tmp.fileno())
+            self._close_read_file()
+            os.replace(filepath_tmp, self.filepath)
+        except OSError as ex:
+            log.error('Unable to compact %s: %s', self.filepath, ex)
+            return False
+
+        self.entries = entries
+        self._record_count = len(entries)
+        return True
@@ -24,15 +24,12 @@
 
 import deluge.component as component
 from deluge._libtorrent import lt
-from deluge.common import decode_bytes
+from deluge.common import decode_bytes, encode_piece_runs
 from deluge.configmanager import ConfigManager, get_config_dir
 from deluge.core.authmanager import AUTH_LEVEL_ADMIN
+from deluge.core.fileindex import FileIndex
 from deluge.decorators import deprecated
-from deluge.event import (
-    TorrentFolderRenamedEvent,
-    TorrentStateChangedEvent,
-    TorrentTrackerStatusEvent,
-)
+from deluge.event import TorrentFolderRenamedEvent, TorrentTrackerStatusEvent
 
 log = logging.getLogger(__name__)
 
@@ -47,6 +44,10 @@
     'checking_resume_data': 'Checking',
 }
 
+# Translates the piece codes, completed * 2 + available, to the piece states:
+# 0 missing, 1 available from peers, 2 downloading and 3 completed.
+PIECE_STATES_TABLE = bytes([0, 1, 3, 3]) + bytes(252)
+
 
 def sanitize_filepath(filepath, folder=False):
     """Returns a sanitized filepath to pass to libtorrent rename_file().
@@ -204,9 +205,11 @@ class Torrent:
         torrent_info: store the torrent info.
         has_metadata (bool): True if the metadata for the torrent is available, False otherwise.
         status_funcs (dict): The function mappings to get torrent status
-        prev_status (dict): Previous status dicts returned for this torrent. We use this to return
-            dicts that only contain changes from the previous.
-            {session_id: status_dict, ...}
+        status_versions (dict): The version of each status key, the version is
+            increased when the value of the key changes. {key: version, ...}
+        prev_status (dict): The status version and keys last returned to each session. We use
+            this to return dicts that only contain changes from the previous.
+            {session_id: (version, keys), ...}
         waiting_on_folder_rename (list of dict): A list of Deferreds for file indexes we're waiting for file_rename
             alerts on. This is so we can send one folder_renamed signal instead of multiple file_renamed signals.
             [{index: Deferred, ...}, ...]
@@ -267,8 +270,16 @@ def __init__(self, handle, options, state=None, filename=None, magnet=None):
         self.forcing_recheck = False
         self.forcing_recheck_paused = False
         self.status_funcs = None
+        self.status_versions = {}
+        self._status_values = {}
+        self._status_version = 0
         self.prev_status = {}
         self.waiting_on_folder_rename = []
+        self._file_index = None
+        # The libtorrent file progress in bytes and the version each file last changed.
+        self._file_progress = []
+        self._file_progress_versions = []
+        self._file_progress_version = 0
 
         self._create_status_funcs()
         self.set_options(self.options)
@@ -293,9 +304,11 @@ def on_metadata_received(self):
         """Process the metadata received alert for this torrent"""
         self.has_metadata = True
         self.torrent_info = self.handle.get_torrent_info()
+        self.reset_file_index()
         if self.options['prioritize_first_last_pieces']:
             self.set_prioritize_first_last_pieces(True)
         self.write_torrentfile()
+        component.get('TorrentManager').mark_state_changed(self.torrent_id)
 
     # --- Options methods ---
     def set_options(self, options):
@@ -319,6 +332,7 @@ def set_options(self, options):
                 else:
                     # Update config options that do not have funcs
                     self.options[key] = value
+        component.get('TorrentManager').mark_state_changed(self.torrent_id)
 
     def get_options(self):
         """Get the torrent options.
@@ -541,6 +555,8 @@ def set_file_priorities(self, file_priorities):
 
         # Store the priorities.
         self.options['file_priorities'] = file_priorities
+        if self._file_index is not None:
+            self._file_index.set_priorities(file_priorities)
 
         # Set the first/last priorities if needed.
         if self.options['prioritize_first_last_pieces']:
@@ -568,6 +584,17 @@ def set_owner(self, account):
 
         if self.rpcserver.get_session_auth_level() == AUTH_LEVEL_ADMIN:
             self.options['owner'] = account
+            component.get('TorrentManager').update_owner_index(self)
+
+    def set_shared(self, shared):
+        """Sets if this torrent is shared with other users.
+
+        Args:
+            shared (bool): If True other users can see and control the torrent.
+
+        """
+        self.options['shared'] = shared
+        component.get('TorrentManager').update_owner_index(self)
 
     # End Options methods #
 
@@ -580,6 +607,7 @@ def set_trackers(self, trackers=None):
         if trackers is None:
             self.trackers = list(self.handle.trackers())
             self.tracker_host = None
+            component.get('TorrentManager').mark_state_changed(self.torrent_id)
             return
 
         if log.isEnabledFor(logging.DEBUG):
@@ -600,6 +628,7 @@ def set_trackers(self, trackers=None):
                 log.debug(' [tier %s]: %s', tracker['tier'], tracker['url'])
         # Set the tracker list in the torrent object
         self.trackers = trackers
+        component.get('TorrentManager').mark_state_changed(self.torrent_id)
         if len(trackers) > 0:
             # Force a re-announce if there is at least 1 tracker
             self.force_reannounce()
@@ -670,8 +699,8 @@ def update_state(self):
             self.state = LT_TORRENT_STATE_MAP.get(str(status.state), str(status.state))
 
         if self.state != old_state:
-            component.get('EventManager').emit(
-                TorrentStateChangedEvent(self.torrent_id, self.state)
+            component.get('TorrentManager').emit_state_changed(
+                self.torrent_id, self.state
             )
 
         if log.isEnabledFor(logging.DEBUG):
@@ -777,18 +806,37 @@ def get_ratio(self):
         else:
             return -1.0
 
+    @property
+    def file_index(self):
+        """The cached index of the files in this torrent.
+
+        Returns:
+            FileIndex: The file index or None if the torrent has no metadata.
+
+        """
+        if self._file_index is None and self.has_metadata:
+            file_index = FileIndex(convert_lt_files(self.torrent_info.files()))
+            if len(self._file_progress) == len(file_index):
+                file_index.set_done(self._file_progress)
+            file_index.set_priorities(self.options['file_priorities'])
+            self._file_index = file_index
+        return self._file_index
+
+    def reset_file_index(self):
+        """Rebuild the file index on next use, e.g. after files are renamed."""
+        self._file_index = None
+
     def get_files(self):
         """Get the files this torrent contains.
 
         Returns:
-            list of dict: The files.
+            list of dict: The files, the list is cached and must not be modified.
 
         """
         if not self.has_metadata:
             return []
 
-        files = self.torrent_info.files()
-        return convert_lt_files(files)
+        return self.file_index.files
 
     def get_orig_files(self):
         """Get the original filenames of files in this torrent.
@@ -884,6 +932,34 @@ def get_file_priorities(self):
 
         return self.options['file_priorities']
 
+    def _update_file_progress(self):
+        """Update the file progress and the version of each changed file."""
+        try:
+            file_progress = self.handle.file_progress()
+        except Exception:
+            # Handle libtorrent >=2.0.0,<=2.0.4 file_progress error
+            file_progress = [0] * len(self.file_index)
+
+        if file_progress == self._file_progress:
+            return
+
+        self._file_progress_version += 1
+        version = self._file_progress_version
+        versions = self._file_progress_versions
+        file_index = self.file_index
+        if len(file_progress) != len(versions):
+            self._file_progress_versions = [version] * len(file_progress)
+            if len(file_progress) == len(file_index):
+                file_index.set_done(file_progress)
+        else:
+            for index, (progress, prev_progress) in enumerate(
+                zip(file_progress, self._file_progress)
+            ):
+                if progress != prev_progress:
+                    versions[index] = version
+                    file_index.set_file_done(index, progress)
+        self._file_progress = file_progress
+
     def get_file_progress(self):
         """Calculates the file progress as a percentage.
 
@@ -893,19 +969,59 @@ def get_file_progress(self):
         if not self.has_metadata:
             return []
 
-        try:
-            files_progresses = zip(
-                self.handle.file_progress(), self.torrent_info.files()
-            )
-        except Exception:
-            # Handle libtorrent >=2.0.0,<=2.0.4 file_progress error
-            files_progresses = zip(iter(lambda: 0, 1), self.torrent_info.files())
-
+        self._update_file_progress()
         return [
-            progress / _file.size if _file.size else 0.0
-            for progress, _file in files_progresses
+            progress / size if size else 0.0
+            for progress, size in zip(self._file_progress, self.file_index.sizes)
         ]
 
+    def get_file_progress_delta(self, version=0):
+        """Get the progress of the files changed since a file progress version.
+
+        Args:
+            version (int): The version returned by a previous call, 0 for all files.
+
+        Returns:
+            tuple: The current version and the changed file progress
+                ``{index: progress}`` (0.0 -> 1.0).
+
+        """
+        if not self.has_metadata:
+            return 0, {}
+
+        self._update_file_progress()
+        sizes = self.file_index.sizes
+        file_progress = self._file_progress
+        return self._file_progress_version, {
+            index: file_progress[index] / sizes[index] if sizes[index] else 0.0
+            for index, file_version in enumerate(self._file_progress_versions)
+            if file_version > version
+        }
+
+    def get_file_tree(self, path='', offset=0, limit=None):
+        """Get a page of the directories and files in a directory of this torrent.
+
+        Args:
+            path (str): The directory path, '' for the root.
+            offset (int): The index of the first child to return.
+            limit (int, optional): The maximum number of children to return.
+
+        Returns:
+            dict: The directory with its aggregate size, progress and priority
+                and the page of children, see `FileIndex.get_children`.
+
+        Raises:
+            KeyError: If the directory does not exist.
+
+        """
+        if not self.has_metadata:
+            raise KeyError(path)
+
+        # Update the file index with the changed progress and priorities.
+        self.get_file_priorities()
+        self._update_file_progress()
+        return self.file_index.get_children(path, offset=offset, limit=limit)
+
     def get_tracker_host(self):
         """Get the hostname of the currently connected tracker.
 
@@ -1037,24 +1153,69 @@ def get_status(self, keys, diff=False, update=False, all_keys=False):
             status_dict[key] = self.status_funcs[key]()
 
         if diff:
-            session_id = self.rpcserver.get_session_id()
-            if session_id in self.prev_status:
-                # We have a previous status dict, so lets make a diff
-                status_diff = {}
-                for key, value in status_dict.items():
-                    if key in self.prev_status[session_id]:
-                        if value != self.prev_status[session_id][key]:
-                            status_diff[key] = value
-                    else:
-                        status_diff[key] = value
+            self.update_status_versions(status_dict)
+            return self.diff_status(status_dict)
+
+        return status_dict
 
-                self.prev_status[session_id] = status_dict
-                return status_diff
+    def update_status_versions(self, status_dict):
+        """Increase the version of the status keys whose values have changed.
 
-            self.prev_status[session_id] = status_dict
+        Args:
+            status_dict (dict): The current status values.
+        """
+        values = self._status_values
+        changed = [
+            key
+            for key, value in status_dict.items()
+            if key not in values or values[key] != value
+        ]
+        if not changed:
+            return
+
+        self._status_version += 1
+        for key in changed:
+            values[key] = status_dict[key]
+            self.status_versions[key] = self._status_version
+
+    def diff_status(self, status_dict, keys=None, session_id=None):
+        """Returns the changes in status_dict since the last diff for this session.
+
+        Instead of keeping a copy of the status sent to each session, only the
+        status version and keys last sent are stored per session.
+
+        Args:
+            status_dict (dict): The current status values, these must have been
+                passed to `update_status_versions`.
+            keys (frozenset, optional): The keys of status_dict, can be supplied
+                to share the same set between torrents.
+            session_id (int or tuple, optional): The session or push diff id
+                to diff against, defaults to the session of the current RPC.
+
+        Returns:
+            dict: The status keys and values that changed since the previous
+                status sent to the current session_id.
+        """
+        if keys is None:
+            keys = frozenset(status_dict)
+
+        if session_id is None:
+            session_id = self.rpcserver.get_session_id()
+        prev_status = self.prev_status.get(session_id)
+        self.prev_status[session_id] = (self._status_version, keys)
+        if prev_status is None:
             return status_dict
 
-        return status_dict
+        prev_version, prev_keys = prev_status
+        if prev_version == self._status_version and keys <= prev_keys:
+            return {}
+
+        versions = self.status_versions
+        return {
+            key: value
+            for key, value in status_dict.items()
+            if key not in prev_keys or versions[key] > prev_version
+        }
 
     def get_lt_status(self) -> 'lt.torrent_status':
         """Get the torrent status fresh, not from cache.
@@ -1189,7 +1350,9 @@ def _create_status_funcs(self):
             'completed_time': lambda: self.status.completed_time,
             'last_seen_complete': lambda: self.status.last_seen_complete,
             'name': self.get_name,
+            # Deprecated: Use pieces_runs
             'pieces': self._get_pieces_info,
+            'pieces_runs': self._get_pieces_runs,
             'seed_mode': lambda: self.status.seed_mode,
             'super_seeding': lambda: self.status.super_seeding,
             'time_since_download': lambda: self.status.time_since_download,
@@ -1217,8 +1380,8 @@ def pause(self):
             # show it as 'Paused'.  We need to emit a torrent_paused signal because
             # the torrent_paused alert from libtorrent will not be generated.
             self.update_state()
-            component.get('EventManager').emit(
-                TorrentStateChangedEvent(self.torrent_id, 'Paused')
+            component.get('TorrentManager').emit_state_changed(
+                self.torrent_id, 'Paused'
             )
         else:
             try:
@@ -1530,31 +1693,47 @@ def cleanup_prev_status(self):
         """
         # Dict will be modified so iterate over generated list
         for key in list(self.prev_status):
-            if not self.rpcserver.is_session_valid(key):
+            # The status pushes are diffed against a (session_id, 'push') key.
+            session_id = key[0] if isinstance(key, tuple) else key
+            if not self.rpcserver.is_session_valid(session_id):
                 del self.prev_status[key]
 
-    def _get_pieces_info(self):
-        """Get the pieces for this torrent."""
-        if not self.has_metadata or self.status.is_seeding:
-            pieces = None
-        else:
-            pieces = []
-            for piece, avail_piece in zip(
-                self.status.pieces, self.handle.piece_availability()
-            ):
-                if piece:
-                    # Completed.
-                    pieces.append(3)
-                elif avail_piece:
-                    # Available, just not downloaded nor being downloaded.
-                    pieces.append(1)
-                else:
-                    # Missing, no known peer with piece, or not asked for yet.
-                    pieces.append(0)
+    def get_piece_states(self):
+        """Get the state of each piece of this torrent.
 
-            for peer_info in self.handle.get_peer_info():
-                if peer_info.downloading_piece_index >= 0:
-                    # Being downloaded from peer.
-                    pieces[peer_info.downloading_piece_index] = 2
+        Returns:
+            bytearray: The piece states, one byte per piece, with 0 for missing,
+                1 for available from peers, 2 for downloading and 3 for completed
+                pieces, or None if the torrent has no metadata or is seeding.
+
+        """
+        if not self.has_metadata or self.status.is_seeding:
+            return None
+
+        completed = bytes(self.status.pieces)
+        available = bytes(map(bool, self.handle.piece_availability()))
+        num_pieces = min(len(completed), len(available))
+        # As every byte is 0 or 1, the whole byte strings can be combined as
+        # integers without any carry between the pieces.
+        codes = (
+            int.from_bytes(completed[:num_pieces], 'big') << 1
+            | int.from_bytes(available[:num_pieces], 'big')
+        ).to_bytes(num_pieces, 'big')
+        pieces = bytearray(codes.translate(PIECE_STATES_TABLE))
+
+        for peer_info in self.handle.get_peer_info():
+            if 0 <= peer_info.downloading_piece_index < num_pieces:
+                # Being downloaded from peer.
+                pieces[peer_info.downloading_piece_index] = 2
 
         return pieces
+
+    def _get_pieces_info(self):
+        """Get the pieces for this torrent."""
+        pieces = self.get_piece_states()
+        return list(pieces) if pieces is not None else None
+
+    def _get_pieces_runs(self):
+        """Get the run-length encoded pieces for this torrent."""
+        pieces = self.get_piece_states()
+        return encode_piece_runs(pieces) if pieces is not None else None
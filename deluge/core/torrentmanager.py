@@ -15,6 +15,7 @@
 import pickle
 import time
 from base64 import b64encode
+from contextlib import contextmanager
 from tempfile import gettempdir
 from typing import Dict, List, NamedTuple, Tuple
 
@@ -33,12 +34,17 @@
 )
 from deluge.configmanager import ConfigManager, get_config_dir
 from deluge.core.authmanager import AUTH_LEVEL_ADMIN
+from deluge.core.perfstats import CATEGORY_LOOPING_CALL
+from deluge.core.statejournal import ResumeDataJournal, StateJournal
 from deluge.core.torrent import Torrent, TorrentOptions, sanitize_filepath
+from deluge.core.torrentstatus import TorrentStatusSnapshot
 from deluge.decorators import maybe_coroutine
 from deluge.error import AddTorrentError, InvalidTorrentError
 from deluge.event import (
     ExternalIPEvent,
     PreTorrentRemovedEvent,
+    SessionLoadingProgressEvent,
+    SessionReadyEvent,
     SessionStartedEvent,
     TorrentAddedEvent,
     TorrentFileCompletedEvent,
@@ -46,6 +52,9 @@
     TorrentFinishedEvent,
     TorrentRemovedEvent,
     TorrentResumedEvent,
+    TorrentsStatusChangedEvent,
+    TorrentStateChangedEvent,
+    TorrentStatesChangedEvent,
 )
 
 log = logging.getLogger(__name__)
@@ -56,6 +65,8 @@
     | lt.torrent_flags.update_subscribe
     | lt.torrent_flags.apply_ip_filter
 )
+# The number of torrents read and added to the session together by load_state.
+LOAD_STATE_BATCH_SIZE = 200
 
 
 class PrefetchQueueItem(NamedTuple):
@@ -63,6 +74,43 @@ class PrefetchQueueItem(NamedTuple):
     result_queue: List[Deferred]
 
 
+def get_push_diff_id(session_id):
+    """The id the status changes pushed to a session are diffed against.
+
+    The pushed changes have their own diff id so the pushes and the
+    `get_torrents_status` diffs of the session do not consume each other's
+    changes.
+
+    Args:
+        session_id (int): The subscribed session.
+
+    Returns:
+        tuple: The diff id.
+
+    """
+    return session_id, 'push'
+
+
+class StatusSubscription:
+    """A session subscription to pushed torrent status changes.
+
+    Args:
+        filter_dict (dict): The filter the torrents must match.
+        keys (list of str): The status keys to push, empty for all keys.
+        max_rate (float): The maximum number of pushes per second.
+
+    """
+
+    def __init__(self, filter_dict, keys, max_rate):
+        self.filter_dict = filter_dict
+        self.keys = keys
+        self.interval = 1 / max_rate if max_rate > 0 else 0
+        # The torrent ids updated since the last push.
+        self.pending = set()
+        self.last_push = 0
+        self.delayed_push = None
+
+
 class TorrentState:  # pylint: disable=old-style-class
     """Create a torrent state.
 
@@ -170,24 +218,50 @@ def __init__(self):
         self.is_saving_state = False
         self.save_resume_data_file_lock = defer.DeferredLock()
         self.torrents_loading = {}
+        self._load_state_deferred = None
+        self._stop_loading_state = False
+        self._save_state_call = None
+        self._save_state_deferred = None
+        # The state changes collected by batch_state_changes {torrent_id: state}
+        self._state_changes = None
         self.prefetching_metadata: Dict[str, PrefetchQueueItem] = {}
 
         # This is a map of torrent_ids to Deferreds used to track needed resume data.
         # The Deferreds will be completed when resume data has been saved.
         self.waiting_on_resume_data = {}
 
+        # The torrents of each owner {owner: {torrent_id, ...}} and the shared torrents.
+        self.owner_index = {}
+        self.shared_torrents = set()
+        self._torrent_owners = {}
+
         # Keep track of torrents finished but moving storage
         self.waiting_on_finish_moving = []
 
         # Keeps track of resume data
         self.resume_data = {}
+        # The torrents with resume data not yet saved to the journal.
+        self.resume_data_changed = set()
+        self.resume_data_journal = ResumeDataJournal(
+            os.path.join(self.state_dir, 'torrents.fastresume.journal')
+        )
 
         self.torrents_status_requests = []
         self.status_dict = {}
+        # Columnar status values rebuilt from state_update_alert.
+        self.status_snapshot = TorrentStatusSnapshot()
         self.last_state_update_alert_ts = 0
+        # Sessions subscribed to torrent status changes {session_id: StatusSubscription}
+        self.status_subscriptions = {}
 
-        # Keep the previous saved state
-        self.prev_saved_state = None
+        # The saved torrent states, only changed states are appended to the journal.
+        self.state_journal = StateJournal(
+            os.path.join(self.state_dir, 'torrents.state.journal')
+        )
+        # The torrents with a state not yet saved to the journal, and whether
+        # the queue positions of the other torrents may have changed.
+        self.torrent_state_changed = set()
+        self.queue_changed = False
 
         # Register set functions
         set_config_keys = [
@@ -208,20 +282,16 @@ def __init__(self):
             'add_torrent',
             'metadata_received',
             'torrent_finished',
-            'torrent_paused',
             'torrent_checked',
-            'torrent_resumed',
             'tracker_reply',
             'tracker_announce',
             'tracker_warning',
             'tracker_error',
             'file_renamed',
             'file_error',
-            'file_completed',
             'storage_moved',
             'storage_moved_failed',
             'state_update',
-            'state_changed',
             'save_resume_data',
             'save_resume_data_failed',
             'fastresume_rejected',
@@ -230,11 +300,40 @@ def __init__(self):
         for alert_handle in alert_handles:
             on_alert_func = getattr(self, ''.join(['on_alert_', alert_handle]))
             self.alerts.register_handler(alert_handle, on_alert_func)
+        batch_alert_handles = [
+            'torrent_paused',
+            'torrent_resumed',
+            'state_changed',
+            'file_completed',
+        ]
+
+        for alert_handle in batch_alert_handles:
+            on_alerts_func = getattr(self, ''.join(['on_alerts_', alert_handle]))
+            self.alerts.register_batch_handler(alert_handle, on_alerts_func)
+
+        component.get('EventManager').register_event_handler(
+            'ClientDisconnectedEvent', self.on_client_disconnected
+        )
 
         # Define timers
-        self.save_state_timer = LoopingCall(self.save_state)
-        self.save_resume_data_timer = LoopingCall(self.save_resume_data)
-        self.prev_status_cleanup_loop = LoopingCall(self.cleanup_torrents_prev_status)
+        perf_stats = component.get('PerfStats')
+        self.save_state_timer = LoopingCall(
+            perf_stats.wrap(CATEGORY_LOOPING_CALL, self.save_state)
+        )
+        self.save_resume_data_timer = LoopingCall(
+            perf_stats.wrap(CATEGORY_LOOPING_CALL, self.save_resume_data)
+        )
+        self.prev_status_cleanup_loop = LoopingCall(
+            perf_stats.wrap(CATEGORY_LOOPING_CALL, self.cleanup_torrents_prev_status)
+        )
+        # Requests status updates from libtorrent while there are subscriptions.
+        self.status_updates_timer = LoopingCall(
+            perf_stats.wrap(
+                CATEGORY_LOOPING_CALL,
+                self.session.post_torrent_updates,
+                'TorrentManager.post_torrent_updates',
+            )
+        )
 
     def start(self):
         # Check for old temp file to verify safe shutdown
@@ -246,7 +345,10 @@ def start(self):
             os.utime(self.temp_file, None)
 
         # Try to load the state from file
-        self.load_state()
+        self._stop_loading_state = False
+        self._load_state_deferred = self.load_state()
+        self._load_state_deferred.addErrback(self._on_load_state_failed)
+        self._load_state_deferred.addBoth(self._on_load_state_done)
 
         # Save the state periodically
         self.save_state_timer.start(200, False)
@@ -265,12 +367,26 @@ async def stop(self):
         if self.prev_status_cleanup_loop.running:
             self.prev_status_cleanup_loop.stop()
 
-        # Save state on shutdown
+        for session_id in list(self.status_subscriptions):
+            self.unsubscribe_status(session_id)
+
+        if self._load_state_deferred:
+            # Stop loading the torrents after the batch being added.
+            self._stop_loading_state = True
+            await self._load_state_deferred
+
+        if self._save_state_call and self._save_state_call.active():
+            self._save_state_call.cancel()
+
+        # Save state on shutdown, including the changes since a running save.
+        if self.is_saving_state:
+            await self._save_state_deferred
         await self.save_state()
 
         self.session.pause()
 
         result = await self.save_resume_data(flush_disk_cache=True)
+        self.resume_data_journal.close()
         # Remove the temp_file to signify successfully saved state
         if result and os.path.isfile(self.temp_file):
             os.remove(self.temp_file)
@@ -313,16 +429,68 @@ def get_torrent_list(self):
             list: A list of torrent_ids.
 
         """
-        torrent_ids = list(self.torrents)
-        if component.get('RPCServer').get_session_auth_level() == AUTH_LEVEL_ADMIN:
-            return torrent_ids
+        rpcserver = component.get('RPCServer')
+        return self.get_user_torrent_list(
+            rpcserver.get_session_auth_level(), rpcserver.get_session_user()
+        )
+
+    def get_user_torrent_list(self, auth_level, username):
+        """Creates a list of torrent_ids, owned by a user and any marked shared.
+
+        Args:
+            auth_level (int): The auth level of the user.
+            username (str): The username.
+
+        Returns:
+            list: A list of torrent_ids.
+
+        """
+        if auth_level == AUTH_LEVEL_ADMIN:
+            return list(self.torrents)
+
+        return list(self.owner_index.get(username, set()) | self.shared_torrents)
+
+    def update_owner_index(self, torrent):
+        """Update the owner index with the owner and shared options of a torrent.
+
+        Args:
+            torrent (Torrent): The torrent in the session.
+
+        """
+        torrent_id = torrent.torrent_id
+        if torrent_id not in self.torrents:
+            return
+
+        owner = torrent.options['owner']
+        prev_owner = self._torrent_owners.get(torrent_id)
+        if prev_owner != owner:
+            if prev_owner is not None:
+                self._discard_owner_index(torrent_id, prev_owner)
+            self.owner_index.setdefault(owner, set()).add(torrent_id)
+            self._torrent_owners[torrent_id] = owner
+
+        if torrent.options['shared']:
+            self.shared_torrents.add(torrent_id)
+        else:
+            self.shared_torrents.discard(torrent_id)
+
+    def remove_owner_index(self, torrent_id):
+        """Remove a torrent from the owner index.
 
-        current_user = component.get('RPCServer').get_session_user()
-        for torrent_id in torrent_ids[:]:
-            torrent_status = self.torrents[torrent_id].get_status(['owner', 'shared'])
-            if torrent_status['owner'] != current_user and not torrent_status['shared']:
-                torrent_ids.pop(torrent_ids.index(torrent_id))
-        return torrent_ids
+        Args:
+            torrent_id (str): The torrent ID.
+
+        """
+        owner = self._torrent_owners.pop(torrent_id, None)
+        if owner is not None:
+            self._discard_owner_index(torrent_id, owner)
+        self.shared_torrents.discard(torrent_id)
+
+    def _discard_owner_index(self, torrent_id, owner):
+        owner_torrents = self.owner_index[owner]
+        owner_torrents.discard(torrent_id)
+        if not owner_torrents:
+            del self.owner_index[owner]
 
     def get_torrent_info_from_file(self, filepath):
         """Retrieves torrent_info from the file specified.
@@ -638,6 +806,10 @@ def _add_torrent_obj(
         # Create a Torrent object and add to the dictionary.
         torrent = Torrent(handle, options, state, filename, magnet)
         self.torrents[torrent.torrent_id] = torrent
+        self.update_owner_index(torrent)
+        if state is None or torrent.torrent_id not in self.state_journal.entries:
+            self.mark_state_changed(torrent.torrent_id)
+        self.queue_changed = True
 
         # Resume AlertManager if paused for adding torrent to libtorrent.
         component.resume('AlertManager')
@@ -645,6 +817,8 @@ def _add_torrent_obj(
         # Store the original resume_data, in case of errors.
         if resume_data:
             self.resume_data[torrent.torrent_id] = resume_data
+            if torrent.torrent_id not in self.resume_data_journal:
+                self.resume_data_changed.add(torrent.torrent_id)
 
         # Add to queued torrents set.
         self.queued_torrents.add(torrent.torrent_id)
@@ -694,9 +868,21 @@ def add_async_callback(
         filedump,
         save_state,
     ):
-        torrent = self._add_torrent_obj(
-            handle, options, state, filename, magnet, resume_data, filedump, save_state
-        )
+        try:
+            torrent = self._add_torrent_obj(
+                handle,
+                options,
+                state,
+                filename,
+                magnet,
+                resume_data,
+                filedump,
+                save_state,
+            )
+        except Exception:
+            # Fail the Deferred so callers are not left waiting on the torrent.
+            d.errback()
+            return
 
         d.callback(torrent.torrent_id)
 
@@ -737,6 +923,7 @@ def remove(self, torrent_id, remove_data=False, save_state=True):
 
         # Remove fastresume data if it is exists
         self.resume_data.pop(torrent_id, None)
+        self.resume_data_changed.add(torrent_id)
 
         # Remove the .torrent file in the state and copy location, if user requested.
         delete_copies = (
@@ -756,6 +943,11 @@ def remove(self, torrent_id, remove_data=False, save_state=True):
 
         # Remove the torrent from deluge's session
         del self.torrents[torrent_id]
+        self.remove_owner_index(torrent_id)
+        self.status_snapshot.remove(torrent_id)
+        # Not in the session, so the state save removes it from the journal.
+        self.torrent_state_changed.add(torrent_id)
+        self.queue_changed = True
 
         if save_state:
             self.save_state()
@@ -794,12 +986,21 @@ def fixup_state(self, state):
         return state
 
     def open_state(self):
-        """Open the torrents.state file containing a TorrentManager state with session torrents.
+        """Open the torrents state journal containing the session torrents.
+
+        The legacy torrents.state file is loaded if there is no journal, and its
+        torrents are then migrated to the journal by the next state save.
 
         Returns:
             TorrentManagerState: The TorrentManager state.
 
         """
+        if self.state_journal.exists():
+            log.info('Loading torrent state: %s', self.state_journal.filepath)
+            state = TorrentManagerState()
+            state.torrents = list(self.state_journal.load().values())
+            return state
+
         torrents_state = os.path.join(self.state_dir, 'torrents.state')
         state = None
         for filepath in (torrents_state, torrents_state + '.bak'):
@@ -821,10 +1022,65 @@ def open_state(self):
 
         return state if state else TorrentManagerState()
 
-    def load_state(self):
+    def _read_torrent_files(self, torrent_states, get_resume_data):
+        """Read the torrent files and resume data of torrents in the thread pool.
+
+        Args:
+            torrent_states (list of TorrentState): The torrent states.
+            get_resume_data (func): Returns the resume data for a torrent_id.
+
+        Returns:
+            Deferred: Fires with a list of ``(torrent_info, resume_data)`` for
+                the torrent states.
+
+        """
+
+        def read_torrent(torrent_id):
+            torrent_info = self.get_torrent_info_from_file(
+                os.path.join(self.state_dir, torrent_id + '.torrent')
+            )
+            return torrent_info, get_resume_data(torrent_id)
+
+        def on_read(results):
+            torrent_files = []
+            for success, result in results:
+                if not success:
+                    log.error('Unable to read torrent state files: %s', result)
+                    result = (None, None)
+                torrent_files.append(result)
+            return torrent_files
+
+        deferreds = [
+            threads.deferToThread(read_torrent, t_state.torrent_id)
+            for t_state in torrent_states
+        ]
+        return DeferredList(deferreds, consumeErrors=True).addCallback(on_read)
+
+    def _on_load_state_failed(self, failure):
+        log.error('Failed to load the torrents state: %s', failure.getTraceback())
+        component.get('EventManager').emit(SessionStartedEvent())
+
+    def _on_load_state_done(self, result):
+        self._load_state_deferred = None
+
+    @maybe_coroutine
+    async def load_state(self):
         """Load all the torrents from TorrentManager state into session.
 
+        The torrent files are read in the thread pool and the torrents are added
+        to the session in batches, with the next batch read while the current
+        batch is being added.
+
+        A state save while loading only saves the changed torrents, so the
+        torrents not yet loaded are kept in the journal. The torrents that fail
+        to load are removed from the journal by the next save.
+
+        Loading stops after the batch being added when the TorrentManager is
+        stopped, without emitting SessionStartedEvent.
+
         Emits:
+            SessionReadyEvent: Emitted after the first batch of torrents is added.
+            SessionLoadingProgressEvent: Emitted after each batch of torrents is added.
             SessionStartedEvent: Emitted after all torrents are added to the session.
 
         """
@@ -836,57 +1092,94 @@ def load_state(self):
         state.torrents.sort(
             key=operator.attrgetter('queue'), reverse=self.config['queue_new_to_top']
         )
-        resume_data = self.load_resume_data_file()
-
-        deferreds = []
-        for t_state in state.torrents:
-            # Populate the options dict from state
-            options = TorrentOptions()
-            for option in options:
-                try:
-                    options[option] = getattr(t_state, option)
-                except AttributeError:
-                    pass
-            # Manually update unmatched attributes
-            options['download_location'] = t_state.save_path
-            options['pre_allocate_storage'] = t_state.storage_mode == 'allocate'
-            options['prioritize_first_last_pieces'] = t_state.prioritize_first_last
-            options['add_paused'] = t_state.paused
-
-            magnet = t_state.magnet
-            torrent_info = self.get_torrent_info_from_file(
-                os.path.join(self.state_dir, t_state.torrent_id + '.torrent')
-            )
-
-            try:
-                d = self.add_async(
-                    torrent_info=torrent_info,
-                    state=t_state,
-                    options=options,
-                    save_state=False,
-                    magnet=magnet,
-                    resume_data=resume_data.get(t_state.torrent_id),
-                )
-            except AddTorrentError as ex:
-                log.warning(
-                    'Error when adding torrent "%s" to session: %s',
-                    t_state.torrent_id,
-                    ex,
+        if self.resume_data_journal.exists():
+            self.resume_data_journal.load()
+            get_resume_data = self.resume_data_journal.get
+        else:
+            # Migrate the legacy resume data file to the journal on next save.
+            get_resume_data = self.load_resume_data_file().get
+
+        event_manager = component.get('EventManager')
+        total = len(state.torrents)
+        batches = [
+            state.torrents[index : index + LOAD_STATE_BATCH_SIZE]
+            for index in range(0, total, LOAD_STATE_BATCH_SIZE)
+        ]
+        if batches:
+            read_batch = self._read_torrent_files(batches[0], get_resume_data)
+        else:
+            event_manager.emit(SessionReadyEvent())
+
+        loaded = 0
+        for batch_index, batch in enumerate(batches):
+            torrent_files = await read_batch
+            if self._stop_loading_state:
+                log.info('Stopped loading torrents, loaded %d of %d', loaded, total)
+                return
+            # Read the next batch while this batch is added to the session.
+            if batch_index + 1 < len(batches):
+                read_batch = self._read_torrent_files(
+                    batches[batch_index + 1], get_resume_data
                 )
-            else:
-                deferreds.append(d)
 
-        deferred_list = DeferredList(deferreds, consumeErrors=False)
+            torrent_ids = []
+            deferreds = []
+            for t_state, (torrent_info, resume_data) in zip(batch, torrent_files):
+                # Populate the options dict from state
+                options = TorrentOptions()
+                for option in options:
+                    try:
+                        options[option] = getattr(t_state, option)
+                    except AttributeError:
+                        pass
+                # Manually update unmatched attributes
+                options['download_location'] = t_state.save_path
+                options['pre_allocate_storage'] = t_state.storage_mode == 'allocate'
+                options['prioritize_first_last_pieces'] = t_state.prioritize_first_last
+                options['add_paused'] = t_state.paused
 
-        def on_complete(result):
-            log.info(
-                'Finished loading %d torrents in %s',
-                len(state.torrents),
-                str(datetime.datetime.now() - start),
-            )
-            component.get('EventManager').emit(SessionStartedEvent())
+                try:
+                    d = self.add_async(
+                        torrent_info=torrent_info,
+                        state=t_state,
+                        options=options,
+                        save_state=False,
+                        magnet=t_state.magnet,
+                        resume_data=resume_data,
+                    )
+                except AddTorrentError as ex:
+                    log.warning(
+                        'Error when adding torrent "%s" to session: %s',
+                        t_state.torrent_id,
+                        ex,
+                    )
+                    self.torrent_state_changed.add(t_state.torrent_id)
+                else:
+                    torrent_ids.append(t_state.torrent_id)
+                    deferreds.append(d)
+
+            # Wait for the batch to be added to bound the torrents loading.
+            results = await DeferredList(deferreds, consumeErrors=True)
+            for torrent_id, (success, result) in zip(torrent_ids, results):
+                if not success:
+                    log.warning(
+                        'Error when adding torrent "%s" to session: %s',
+                        torrent_id,
+                        result.getErrorMessage(),
+                    )
+                    self.torrent_state_changed.add(torrent_id)
+            loaded += len(batch)
+            log.info('Loaded %d of %d torrents', loaded, total)
+            event_manager.emit(SessionLoadingProgressEvent(loaded, total))
+            if batch_index == 0:
+                event_manager.emit(SessionReadyEvent())
 
-        deferred_list.addCallback(on_complete)
+        log.info(
+            'Finished loading %d torrents in %s',
+            total,
+            str(datetime.datetime.now() - start),
+        )
+        event_manager.emit(SessionStartedEvent())
 
     def create_state(self):
         """Create a state of all the torrents in TorrentManager.
@@ -898,46 +1191,67 @@ def create_state(self):
         state = TorrentManagerState()
         # Create the state for each Torrent and append to the list
         for torrent in self.torrents.values():
-            if self.session.is_paused():
-                paused = torrent.handle.is_paused()
-            elif torrent.forced_error:
-                paused = torrent.forced_error.was_paused
-            elif torrent.state == 'Paused':
-                paused = True
-            else:
-                paused = False
-
-            torrent_state = TorrentState(
-                torrent.torrent_id,
-                torrent.filename,
-                torrent.trackers,
-                torrent.get_status(['storage_mode'])['storage_mode'],
-                paused,
-                torrent.options['download_location'],
-                torrent.options['max_connections'],
-                torrent.options['max_upload_slots'],
-                torrent.options['max_upload_speed'],
-                torrent.options['max_download_speed'],
-                torrent.options['prioritize_first_last_pieces'],
-                torrent.options['sequential_download'],
-                torrent.options['file_priorities'],
-                torrent.get_queue_position(),
-                torrent.options['auto_managed'],
-                torrent.is_finished,
-                torrent.options['stop_ratio'],
-                torrent.options['stop_at_ratio'],
-                torrent.options['remove_at_ratio'],
-                torrent.options['move_completed'],
-                torrent.options['move_completed_path'],
-                torrent.magnet,
-                torrent.options['owner'],
-                torrent.options['shared'],
-                torrent.options['super_seeding'],
-                torrent.options['name'],
-            )
-            state.torrents.append(torrent_state)
+            state.torrents.append(self.create_torrent_state(torrent))
         return state
 
+    def create_torrent_state(self, torrent):
+        """Create the state of a torrent.
+
+        Args:
+            torrent (Torrent): The torrent in the session.
+
+        Returns:
+            TorrentState: The torrent state.
+
+        """
+        if self.session.is_paused():
+            paused = torrent.handle.is_paused()
+        elif torrent.forced_error:
+            paused = torrent.forced_error.was_paused
+        elif torrent.state == 'Paused':
+            paused = True
+        else:
+            paused = False
+
+        return TorrentState(
+            torrent.torrent_id,
+            torrent.filename,
+            torrent.trackers,
+            torrent.get_status(['storage_mode'])['storage_mode'],
+            paused,
+            torrent.options['download_location'],
+            torrent.options['max_connections'],
+            torrent.options['max_upload_slots'],
+            torrent.options['max_upload_speed'],
+            torrent.options['max_download_speed'],
+            torrent.options['prioritize_first_last_pieces'],
+            torrent.options['sequential_download'],
+            torrent.options['file_priorities'],
+            torrent.get_queue_position(),
+            torrent.options['auto_managed'],
+            torrent.is_finished,
+            torrent.options['stop_ratio'],
+            torrent.options['stop_at_ratio'],
+            torrent.options['remove_at_ratio'],
+            torrent.options['move_completed'],
+            torrent.options['move_completed_path'],
+            torrent.magnet,
+            torrent.options['owner'],
+            torrent.options['shared'],
+            torrent.options['super_seeding'],
+            torrent.options['name'],
+        )
+
+    def mark_state_changed(self, torrent_id):
+        """Mark the state of a torrent to be saved by the next state save.
+
+        Args:
+            torrent_id (str): The torrent ID.
+
+        """
+        if torrent_id in self.torrents:
+            self.torrent_state_changed.add(torrent_id)
+
     def save_state(self):
         """Run the save state task in a separate thread to avoid blocking main thread.
 
@@ -948,58 +1262,78 @@ def save_state(self):
         if self.is_saving_state:
             return defer.succeed(None)
         self.is_saving_state = True
-        d = threads.deferToThread(self._save_state)
 
-        def on_state_saved(arg):
+        torrent_ids, self.torrent_state_changed = self.torrent_state_changed, set()
+        queue_changed, self.queue_changed = self.queue_changed, False
+        torrents = {
+            torrent_id: self.torrents[torrent_id]
+            for torrent_id in torrent_ids
+            if torrent_id in self.torrents
+        }
+        removed_ids = torrent_ids.difference(torrents)
+        queued = list(self.torrents.values()) if queue_changed else []
+        d = threads.deferToThread(self._save_state, torrents, removed_ids, queued)
+        self._save_state_deferred = d
+
+        def on_state_saved(result):
             self.is_saving_state = False
+            if result is not True:
+                # Keep the changes for the next save.
+                self.torrent_state_changed.update(torrent_ids)
+                self.queue_changed = self.queue_changed or queue_changed
             if self.save_state_timer.running:
                 self.save_state_timer.reset()
 
         d.addBoth(on_state_saved)
         return d
 
-    def _save_state(self):
-        """Save the state of the TorrentManager to the torrents.state file."""
-        state = self.create_state()
+    def schedule_save_state(self):
+        """Save the state once the current reactor iteration has finished.
 
-        # If the state hasn't changed, no need to save it
-        if self.prev_saved_state == state:
+        Note:
+            The calls made before the state is saved are combined into one save.
+
+        """
+        if self._save_state_call and self._save_state_call.active():
             return
+        self._save_state_call = self.clock.callLater(0, self.save_state)
 
-        filename = 'torrents.state'
-        filepath = os.path.join(self.state_dir, filename)
-        filepath_bak = filepath + '.bak'
-        filepath_tmp = filepath + '.tmp'
+    def _save_state(self, torrents, removed_ids, queued):
+        """Save the changed torrent states to the torrents state journal.
 
-        try:
-            log.debug('Creating the temporary file: %s', filepath_tmp)
-            with open(filepath_tmp, 'wb', 0) as _file:
-                pickle.dump(state, _file, protocol=2)
-                _file.flush()
-                os.fsync(_file.fileno())
-        except (OSError, pickle.PicklingError) as ex:
-            log.error('Unable to save %s: %s', filename, ex)
-            return
+        Args:
+            torrents (dict): The torrents with a changed state ``{torrent_id: Torrent}``.
+            removed_ids (set): The torrents removed from the session.
+            queued (list of Torrent): The torrents to save if their queue position
+                changed.
 
-        try:
-            log.debug('Creating backup of %s at: %s', filename, filepath_bak)
-            if os.path.isfile(filepath_bak):
-                os.remove(filepath_bak)
-            if os.path.isfile(filepath):
-                os.rename(filepath, filepath_bak)
-        except OSError as ex:
-            log.error('Unable to backup %s to %s: %s', filepath, filepath_bak, ex)
-            return
+        Returns:
+            bool: True if the changes were saved.
 
-        try:
-            log.debug('Saving %s to: %s', filename, filepath)
-            os.rename(filepath_tmp, filepath)
-            self.prev_saved_state = state
-        except OSError as ex:
-            log.error('Failed to set new state file %s: %s', filepath, ex)
-            if os.path.isfile(filepath_bak):
-                log.info('Restoring backup of state from: %s', filepath_bak)
-                os.rename(filepath_bak, filepath)
+        """
+        saved_states = self.state_journal.entries
+        for torrent in queued:
+            saved_state = saved_states.get(torrent.torrent_id)
+            if saved_state and saved_state.queue != torrent.get_queue_position():
+                torrents[torrent.torrent_id] = torrent
+
+        changes = {}
+        for torrent_id, torrent in torrents.items():
+            torrent_state = self.create_torrent_state(torrent)
+            if saved_states.get(torrent_id) != torrent_state:
+                changes[torrent_id] = torrent_state
+        changes.update(
+            (torrent_id, None)
+            for torrent_id in removed_ids
+            if torrent_id in saved_states
+        )
+
+        # If the state hasn't changed, no need to save it
+        if not changes:
+            return True
+
+        log.debug('Saving %s changed torrent states', len(changes))
+        return self.state_journal.write(changes)
 
     def save_resume_data(self, torrent_ids=None, flush_disk_cache=False):
         """Saves torrents resume data.
@@ -1051,7 +1385,7 @@ def on_all_resume_data_finished(dummy_result):
         return DeferredList(deferreds).addBoth(on_all_resume_data_finished)
 
     def load_resume_data_file(self):
-        """Load the resume data from file for all torrents.
+        """Load the resume data for all torrents from the legacy torrents.fastresume file.
 
         Returns:
             dict: A dict of torrents and their resume_data.
@@ -1100,9 +1434,17 @@ def save_resume_data_file(self, queue_task=False):
             return defer.succeed(None)
 
         def on_lock_aquired():
-            d = threads.deferToThread(self._save_resume_data_file)
+            changes = {
+                torrent_id: self.resume_data.get(torrent_id)
+                for torrent_id in self.resume_data_changed
+            }
+            self.resume_data_changed = set()
+            d = threads.deferToThread(self._save_resume_data_file, changes)
 
             def on_resume_data_file_saved(arg):
+                if not arg:
+                    # Retry the changes with the next save.
+                    self.resume_data_changed.update(changes)
                 if self.save_resume_data_timer.running:
                     self.save_resume_data_timer.reset()
                 return arg
@@ -1112,58 +1454,32 @@ def on_resume_data_file_saved(arg):
 
         return self.save_resume_data_file_lock.run(on_lock_aquired)
 
-    def _save_resume_data_file(self):
-        """Saves the resume data file with the contents of self.resume_data"""
-        if not self.resume_data:
-            return True
-
-        filename = 'torrents.fastresume'
-        filepath = os.path.join(self.state_dir, filename)
-        filepath_bak = filepath + '.bak'
-        filepath_tmp = filepath + '.tmp'
+    def _save_resume_data_file(self, changes):
+        """Saves the changed resume data to the resume data journal.
 
-        try:
-            log.debug('Creating the temporary file: %s', filepath_tmp)
-            with open(filepath_tmp, 'wb', 0) as _file:
-                _file.write(lt.bencode(self.resume_data))
-                _file.flush()
-                os.fsync(_file.fileno())
-        except (OSError, EOFError) as ex:
-            log.error('Unable to save %s: %s', filename, ex)
-            return False
+        Args:
+            changes (dict): The changed resume data ``{torrent_id: resume_data}``,
+                None for removed torrents.
 
-        try:
-            log.debug('Creating backup of %s at: %s', filename, filepath_bak)
-            if os.path.isfile(filepath_bak):
-                os.remove(filepath_bak)
-            if os.path.isfile(filepath):
-                os.rename(filepath, filepath_bak)
-        except OSError as ex:
-            log.error('Unable to backup %s to %s: %s', filepath, filepath_bak, ex)
-            return False
+        Returns:
+            bool: True if the changes were saved.
 
-        try:
-            log.debug('Saving %s to: %s', filename, filepath)
-            os.rename(filepath_tmp, filepath)
-        except OSError as ex:
-            log.error('Failed to set new file %s: %s', filepath, ex)
-            if os.path.isfile(filepath_bak):
-                log.info('Restoring backup from: %s', filepath_bak)
-                os.rename(filepath_bak, filepath)
-        else:
-            # Sync the rename operations for the directory
-            if hasattr(os, 'O_DIRECTORY'):
-                dirfd = os.open(os.path.dirname(filepath), os.O_DIRECTORY)
-                os.fsync(dirfd)
-                os.close(dirfd)
+        """
+        if not changes:
             return True
 
+        log.debug('Saving resume data for %s torrents', len(changes))
+        return self.resume_data_journal.write(changes)
+
     def archive_state(self, message):
         log.warning(message)
         arc_filepaths = []
         for filename in ('torrents.fastresume', 'torrents.state'):
             filepath = os.path.join(self.state_dir, filename)
             arc_filepaths.extend([filepath, filepath + '.bak'])
+        arc_filepaths.extend(
+            [self.state_journal.filepath, self.resume_data_journal.filepath]
+        )
 
         archive_files('state', arc_filepaths, message=message)
 
@@ -1171,12 +1487,64 @@ def get_queue_position(self, torrent_id):
         """Get queue position of torrent"""
         return self.torrents[torrent_id].get_queue_position()
 
+    def emit_state_changed(self, torrent_id, state):
+        """Emit the state change of a torrent, or collect it in a batch.
+
+        Args:
+            torrent_id (str): The torrent ID.
+            state (str): The new torrent state.
+
+        Emits:
+            TorrentStateChangedEvent: Unless the change is collected by
+                `batch_state_changes`.
+
+        """
+        self.mark_state_changed(torrent_id)
+        if self._state_changes is not None:
+            self._state_changes[torrent_id] = state
+        else:
+            component.get('EventManager').emit(
+                TorrentStateChangedEvent(torrent_id, state)
+            )
+
+    @contextmanager
+    def batch_state_changes(self):
+        """Collect the torrent state changes within the block into one event.
+
+        Nested blocks are collected by the outermost block.
+
+        Emits:
+            TorrentStatesChangedEvent: When the block exits, with the last state
+                of each torrent that changed state.
+            TorrentStateChangedEvent: Instead of the above if only one torrent
+                changed state.
+
+        """
+        if self._state_changes is not None:
+            yield
+            return
+
+        self._state_changes = {}
+        try:
+            yield
+        finally:
+            state_changes, self._state_changes = self._state_changes, None
+            if len(state_changes) == 1:
+                component.get('EventManager').emit(
+                    TorrentStateChangedEvent(*state_changes.popitem())
+                )
+            elif state_changes:
+                component.get('EventManager').emit(
+                    TorrentStatesChangedEvent(state_changes)
+                )
+
     def queue_top(self, torrent_id):
         """Queue torrent to top"""
         if self.torrents[torrent_id].get_queue_position() == 0:
             return False
 
         self.torrents[torrent_id].handle.queue_position_top()
+        self.queue_changed = True
         return True
 
     def queue_up(self, torrent_id):
@@ -1185,6 +1553,7 @@ def queue_up(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_up()
+        self.queue_changed = True
         return True
 
     def queue_down(self, torrent_id):
@@ -1195,6 +1564,7 @@ def queue_down(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_down()
+        self.queue_changed = True
         return True
 
     def queue_bottom(self, torrent_id):
@@ -1205,6 +1575,7 @@ def queue_bottom(self, torrent_id):
             return False
 
         self.torrents[torrent_id].handle.queue_position_bottom()
+        self.queue_changed = True
         return True
 
     def cleanup_torrents_prev_status(self):
@@ -1217,30 +1588,35 @@ def on_set_max_connections_per_torrent(self, key, value):
         log.debug('max_connections_per_torrent set to %s...', value)
         for key in self.torrents:
             self.torrents[key].set_max_connections(value)
+        self.torrent_state_changed.update(self.torrents)
 
     def on_set_max_upload_slots_per_torrent(self, key, value):
         """Sets the per-torrent upload slot limit"""
         log.debug('max_upload_slots_per_torrent set to %s...', value)
         for key in self.torrents:
             self.torrents[key].set_max_upload_slots(value)
+        self.torrent_state_changed.update(self.torrents)
 
     def on_set_max_upload_speed_per_torrent(self, key, value):
         """Sets the per-torrent upload speed limit"""
         log.debug('max_upload_speed_per_torrent set to %s...', value)
         for key in self.torrents:
             self.torrents[key].set_max_upload_speed(value)
+        self.torrent_state_changed.update(self.torrents)
 
     def on_set_max_download_speed_per_torrent(self, key, value):
         """Sets the per-torrent download speed limit"""
         log.debug('max_download_speed_per_torrent set to %s...', value)
         for key in self.torrents:
             self.torrents[key].set_max_download_speed(value)
+        self.torrent_state_changed.update(self.torrents)
 
     # --- Alert handlers ---
     def on_alert_add_torrent(self, alert):
         """Alert handler for libtorrent add_torrent_alert"""
         if not alert.handle.is_valid():
             log.warning('Torrent handle is invalid: %s', alert.error.message())
+            self._fail_torrent_loading(alert)
             return
 
         try:
@@ -1257,6 +1633,24 @@ def on_alert_add_torrent(self, alert):
 
         self.add_async_callback(alert.handle, *add_async_params)
 
+    def _fail_torrent_loading(self, alert):
+        """Fail the add_async Deferred of a torrent that libtorrent could not add."""
+        try:
+            params = alert.params
+            torrent_id = str(params.ti.info_hash() if params.ti else params.info_hash)
+        except (AttributeError, RuntimeError) as ex:
+            log.debug('Failed to get torrent id from add_torrent_alert: %s', ex)
+            return
+
+        add_async_params = self.torrents_loading.pop(torrent_id, None)
+        if add_async_params:
+            add_async_params[0].errback(
+                AddTorrentError(
+                    'Unable to add torrent to session: %s'
+                    % decode_bytes(alert.error.message())
+                )
+            )
+
     def on_alert_torrent_finished(self, alert):
         """Alert handler for libtorrent torrent_finished_alert"""
         try:
@@ -1297,6 +1691,9 @@ def on_alert_torrent_finished(self, alert):
         else:
             torrent.is_finished = True
 
+        self.mark_state_changed(torrent_id)
+        self.queue_changed = True
+
         # Torrent is no longer part of the queue
         try:
             self.queued_torrents.remove(torrent_id)
@@ -1313,17 +1710,23 @@ def on_alert_torrent_finished(self, alert):
         if total_download:
             self.save_resume_data((torrent_id,))
 
-    def on_alert_torrent_paused(self, alert):
-        """Alert handler for libtorrent torrent_paused_alert"""
-        try:
-            torrent_id = str(alert.handle.info_hash())
-            torrent = self.torrents[torrent_id]
-        except (RuntimeError, KeyError):
-            return
-        torrent.update_state()
-        # Write the fastresume file if we are not waiting on a bulk write
-        if torrent_id not in self.waiting_on_resume_data:
-            self.save_resume_data((torrent_id,))
+    def on_alerts_torrent_paused(self, alerts):
+        """Batch alert handler for libtorrent torrent_paused_alert"""
+        torrent_ids = []
+        with self.batch_state_changes():
+            for alert in alerts:
+                try:
+                    torrent_id = str(alert.handle.info_hash())
+                    torrent = self.torrents[torrent_id]
+                except (RuntimeError, KeyError):
+                    continue
+                torrent.update_state()
+                # Write the fastresume file if we are not waiting on a bulk write
+                if torrent_id not in self.waiting_on_resume_data:
+                    torrent_ids.append(torrent_id)
+
+        if torrent_ids:
+            self.save_resume_data(torrent_ids)
 
     def on_alert_torrent_checked(self, alert):
         """Alert handler for libtorrent torrent_checked_alert"""
@@ -1411,6 +1814,7 @@ def on_alert_storage_moved(self, alert):
         torrent.set_download_location(os.path.normpath(alert.storage_path()))
         torrent.set_move_completed(False)
         torrent.update_state()
+        self.mark_state_changed(torrent_id)
 
         if torrent_id in self.waiting_on_finish_moving:
             self.waiting_on_finish_moving.remove(torrent_id)
@@ -1435,34 +1839,40 @@ def on_alert_storage_moved_failed(self, alert):
             torrent.is_finished = True
             component.get('EventManager').emit(TorrentFinishedEvent(torrent_id))
 
-    def on_alert_torrent_resumed(self, alert):
-        """Alert handler for libtorrent torrent_resumed_alert"""
-        try:
-            torrent_id = str(alert.handle.info_hash())
-            torrent = self.torrents[torrent_id]
-        except (RuntimeError, KeyError):
-            return
-        torrent.update_state()
-        component.get('EventManager').emit(TorrentResumedEvent(torrent_id))
+    def on_alerts_torrent_resumed(self, alerts):
+        """Batch alert handler for libtorrent torrent_resumed_alert"""
+        event_manager = component.get('EventManager')
+        with self.batch_state_changes():
+            for alert in alerts:
+                try:
+                    torrent_id = str(alert.handle.info_hash())
+                    torrent = self.torrents[torrent_id]
+                except (RuntimeError, KeyError):
+                    continue
+                torrent.update_state()
+                event_manager.emit(TorrentResumedEvent(torrent_id))
 
-    def on_alert_state_changed(self, alert):
-        """Alert handler for libtorrent state_changed_alert.
+    def on_alerts_state_changed(self, alerts):
+        """Batch alert handler for libtorrent state_changed_alert.
 
         Emits:
             TorrentStateChangedEvent: The state has changed.
+            TorrentStatesChangedEvent: The state of several torrents has changed.
 
         """
-        try:
-            torrent_id = str(alert.handle.info_hash())
-            torrent = self.torrents[torrent_id]
-        except (RuntimeError, KeyError):
-            return
+        with self.batch_state_changes():
+            for alert in alerts:
+                try:
+                    torrent_id = str(alert.handle.info_hash())
+                    torrent = self.torrents[torrent_id]
+                except (RuntimeError, KeyError):
+                    continue
 
-        torrent.update_state()
-        # Torrent may need to download data after checking.
-        if torrent.state in ('Checking', 'Downloading'):
-            torrent.is_finished = False
-            self.queued_torrents.add(torrent_id)
+                torrent.update_state()
+                # Torrent may need to download data after checking.
+                if torrent.state in ('Checking', 'Downloading'):
+                    torrent.is_finished = False
+                    self.queued_torrents.add(torrent_id)
 
     def on_alert_save_resume_data(self, alert):
         """Alert handler for libtorrent save_resume_data_alert"""
@@ -1475,6 +1885,7 @@ def on_alert_save_resume_data(self, alert):
             self.resume_data[torrent_id] = lt.bencode(
                 lt.write_resume_data(alert.params)
             )
+            self.resume_data_changed.add(torrent_id)
 
         if torrent_id in self.waiting_on_resume_data:
             self.waiting_on_resume_data[torrent_id].callback(None)
@@ -1527,6 +1938,7 @@ def on_alert_file_renamed(self, alert):
 
         new_name = decode_bytes(alert.new_name())
         log.debug('index: %s name: %s', alert.index, new_name)
+        torrent.reset_file_index()
 
         # We need to see if this file index is in a waiting_on_folder dict
         for wait_on_folder in torrent.waiting_on_folder_rename:
@@ -1571,21 +1983,21 @@ def on_alert_file_error(self, alert):
             return
         torrent.update_state()
 
-    def on_alert_file_completed(self, alert):
-        """Alert handler for libtorrent file_completed_alert
+    def on_alerts_file_completed(self, alerts):
+        """Batch alert handler for libtorrent file_completed_alert
 
         Emits:
             TorrentFileCompletedEvent: When an individual file completes downloading.
 
         """
-        try:
-            torrent_id = str(alert.handle.info_hash())
-        except RuntimeError:
-            return
-        if torrent_id in self.torrents:
-            component.get('EventManager').emit(
-                TorrentFileCompletedEvent(torrent_id, alert.index)
-            )
+        event_manager = component.get('EventManager')
+        for alert in alerts:
+            try:
+                torrent_id = str(alert.handle.info_hash())
+            except RuntimeError:
+                continue
+            if torrent_id in self.torrents:
+                event_manager.emit(TorrentFileCompletedEvent(torrent_id, alert.index))
 
     def on_alert_state_update(self, alert):
         """Alert handler for libtorrent state_update_alert
@@ -1596,15 +2008,26 @@ def on_alert_state_update(self, alert):
         """
         self.last_state_update_alert_ts = time.time()
 
+        updated_torrents = []
         for t_status in alert.status:
             try:
                 torrent_id = str(t_status.info_hash)
             except RuntimeError:
                 continue
             if torrent_id in self.torrents:
-                self.torrents[torrent_id].status = t_status
+                torrent = self.torrents[torrent_id]
+                torrent.status = t_status
+                updated_torrents.append(torrent)
+
+        # Only the torrents listed in the alert have changed status values.
+        self.status_snapshot.update(updated_torrents)
 
-        self.handle_torrents_status_callback(self.torrents_status_requests.pop())
+        if self.status_subscriptions:
+            self.queue_status_push(torrent.torrent_id for torrent in updated_torrents)
+
+        # The alert can be the result of a post by the status updates timer.
+        if self.torrents_status_requests:
+            self.handle_torrents_status_callback(self.torrents_status_requests.pop())
 
     def on_alert_external_ip(self, alert):
         """Alert handler for libtorrent external_ip_alert"""
@@ -1651,22 +2074,57 @@ def separate_keys(self, keys, torrent_ids):
                     return torrent_keys, leftover_keys
         return [], []
 
+    def build_torrents_status(self, torrent_ids, keys, diff=False, session_id=None):
+        """Build the status dictionary with torrent values.
+
+        Args:
+            torrent_ids (list of str): The torrent IDs to get the status of.
+            keys (list of str): The keys to get the status on.
+            diff (bool, optional): If True, only the changes since the last status
+                sent to the session are returned.
+            session_id (int or tuple, optional): The session or push diff id
+                to diff against, defaults to the session of the current RPC.
+
+        Returns:
+            tuple: The status dict and the plugin keys that were not handled.
+
+        """
+        # The torrent_id may not exist if the clients cache (sessionproxy) isn't up to speed.
+        torrent_ids = [
+            torrent_id for torrent_id in torrent_ids if torrent_id in self.torrents
+        ]
+        torrent_keys, plugin_keys = self.separate_keys(keys, torrent_ids)
+        if not keys and torrent_ids:
+            torrent_keys = list(self.torrents[torrent_ids[0]].status_funcs)
+
+        # Values derived from the lt status are served from the snapshot columns,
+        # the remaining keys are fetched from each torrent.
+        snapshot_keys, other_keys = self.status_snapshot.split_keys(torrent_keys)
+        torrents = [self.torrents[torrent_id] for torrent_id in torrent_ids]
+        self.status_snapshot.refresh(torrents)
+        status_dict = self.status_snapshot.get_status(torrent_ids, snapshot_keys)
+
+        if other_keys or diff:
+            # A single keys set is shared by the sessions diff of all torrents.
+            diff_keys = frozenset(torrent_keys)
+            for torrent in torrents:
+                status = status_dict[torrent.torrent_id]
+                if other_keys:
+                    other_status = torrent.get_status(other_keys)
+                    status.update(other_status)
+                if diff:
+                    if other_keys:
+                        torrent.update_status_versions(other_status)
+                    status_dict[torrent.torrent_id] = torrent.diff_status(
+                        status, diff_keys, session_id=session_id
+                    )
+
+        return status_dict, plugin_keys
+
     def handle_torrents_status_callback(self, status_request):
         """Build the status dictionary with torrent values"""
         d, torrent_ids, keys, diff = status_request
-        status_dict = {}.fromkeys(torrent_ids)
-        torrent_keys, plugin_keys = self.separate_keys(keys, torrent_ids)
-
-        # Get the torrent status for each torrent_id
-        for torrent_id in torrent_ids:
-            if torrent_id not in self.torrents:
-                # The torrent_id does not exist in the dict.
-                # Could be the clients cache (sessionproxy) isn't up to speed.
-                del status_dict[torrent_id]
-            else:
-                status_dict[torrent_id] = self.torrents[torrent_id].get_status(
-                    torrent_keys, diff, all_keys=not keys
-                )
+        status_dict, plugin_keys = self.build_torrents_status(torrent_ids, keys, diff)
         self.status_dict = status_dict
         d.callback((status_dict, plugin_keys))
 
@@ -1699,3 +2157,134 @@ def torrents_status_update(self, torrent_ids, keys, diff=False):
             self.torrents_status_requests.insert(0, (d, torrent_ids, keys, diff))
             self.session.post_torrent_updates()
         return d
+
+    def subscribe_status(self, session_id, filter_dict, keys, max_rate=1.0):
+        """Subscribe a session to pushed torrent status changes.
+
+        The changed status values of the torrents matching filter_dict are
+        emitted to the session as a TorrentsStatusChangedEvent, at most
+        max_rate times per second.
+
+        Args:
+            session_id (int): The session to push the changes to.
+            filter_dict (dict): The filter the torrents must match.
+            keys (list of str): The status keys to push, empty for all keys.
+            max_rate (float, optional): The maximum number of pushes per second.
+
+        """
+        self.unsubscribe_status(session_id)
+        self.status_subscriptions[session_id] = StatusSubscription(
+            filter_dict, keys, max_rate
+        )
+        self.update_status_updates_timer()
+
+    def unsubscribe_status(self, session_id):
+        """Remove the status subscription of a session.
+
+        Args:
+            session_id (int): The subscribed session.
+
+        """
+        subscription = self.status_subscriptions.pop(session_id, None)
+        if subscription is None:
+            return
+
+        if subscription.delayed_push and subscription.delayed_push.active():
+            subscription.delayed_push.cancel()
+        # A later subscription starts again from the full status.
+        diff_id = get_push_diff_id(session_id)
+        for torrent in self.torrents.values():
+            torrent.prev_status.pop(diff_id, None)
+        self.update_status_updates_timer()
+
+    def on_client_disconnected(self, session_id):
+        """Remove the status subscription of a disconnected client."""
+        self.unsubscribe_status(session_id)
+
+    def update_status_updates_timer(self):
+        """Run the status updates timer at the fastest subscription rate."""
+        if self.status_updates_timer.running:
+            self.status_updates_timer.stop()
+
+        if self.status_subscriptions:
+            interval = min(sub.interval for sub in self.status_subscriptions.values())
+            # Limit how often libtorrent is asked to post status updates.
+            self.status_updates_timer.start(max(interval, 0.5), now=False)
+
+    def queue_status_push(self, torrent_ids):
+        """Queue the updated torrents for a push to the subscribed sessions.
+
+        Args:
+            torrent_ids (iterable of str): The torrent IDs with updated status.
+
+        """
+        torrent_ids = set(torrent_ids)
+        if not torrent_ids:
+            return
+
+        now = time.time()
+        for session_id, subscription in list(self.status_subscriptions.items()):
+            subscription.pending.update(torrent_ids)
+            if subscription.delayed_push and subscription.delayed_push.active():
+                continue
+
+            delay = subscription.last_push + subscription.interval - now
+            if delay > 0:
+                subscription.delayed_push = self.clock.callLater(
+                    delay, self.push_status, session_id
+                )
+            else:
+                self.push_status(session_id)
+
+    def push_status(self, session_id):
+        """Emit the pending status changes to a subscribed session.
+
+        Args:
+            session_id (int): The subscribed session.
+
+        """
+        subscription = self.status_subscriptions.get(session_id)
+        if subscription is None:
+            return
+
+        rpcserver = component.get('RPCServer')
+        if not rpcserver.is_session_valid(session_id):
+            self.unsubscribe_status(session_id)
+            return
+
+        subscription.last_push = time.time()
+        torrent_ids, subscription.pending = subscription.pending, set()
+
+        filter_dict = dict(subscription.filter_dict)
+        if 'id' in filter_dict:
+            filter_ids = filter_dict['id']
+            if isinstance(filter_ids, str):
+                filter_ids = [filter_ids]
+            torrent_ids.intersection_update(filter_ids)
+
+        session = rpcserver.factory.authorized_sessions[session_id]
+        torrent_ids.intersection_update(
+            self.get_user_torrent_list(session.auth_level, session.username)
+        )
+
+        filter_dict['id'] = list(torrent_ids)
+        torrent_ids = component.get('FilterManager').filter_torrent_ids(filter_dict)
+
+        status_dict, plugin_keys = self.build_torrents_status(
+            torrent_ids,
+            subscription.keys,
+            diff=True,
+            session_id=get_push_diff_id(session_id),
+        )
+        if plugin_keys or not subscription.keys:
+            pluginmanager = component.get('CorePluginManager')
+            for torrent_id, status in status_dict.items():
+                status.update(pluginmanager.get_status(torrent_id, plugin_keys))
+
+        status_dict = {
+            torrent_id: status for torrent_id, status in status_dict.items() if status
+        }
+        if status_dict:
+            rpcserver.emit_event_for_session_id(
+                session_id, TorrentsStatusChangedEvent(status_dict)
+            )
@@ -0,0 +1,194 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Columnar snapshot of torrent status values.
+
+Attributes:
+    SNAPSHOT_KEYS (tuple): The torrent status keys that are derived solely from
+        the libtorrent torrent_status and so can only change when a new status is
+        received for the torrent.
+
+"""
+
+import logging
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_KEYS = (
+    'active_time',
+    'all_time_download',
+    'completed_time',
+    'distributed_copies',
+    'download_payload_rate',
+    'finished_time',
+    'hash',
+    'is_seed',
+    'last_seen_complete',
+    'next_announce',
+    'num_peers',
+    'num_seeds',
+    'paused',
+    'queue',
+    'ratio',
+    'seed_mode',
+    'seed_rank',
+    'seeding_time',
+    'seeds_peers_ratio',
+    'storage_mode',
+    'super_seeding',
+    'time_added',
+    'time_since_download',
+    'time_since_transfer',
+    'time_since_upload',
+    'total_done',
+    'total_payload_download',
+    'total_payload_upload',
+    'total_peers',
+    'total_remaining',
+    'total_seeds',
+    'total_uploaded',
+    'total_wanted',
+    'tracker',
+    'upload_payload_rate',
+)
+
+
+class TorrentStatusSnapshot:
+    """Holds the status values of all torrents with one column per status key.
+
+    Each torrent is assigned a row index and every snapshot key is stored as a
+    list indexed by row. A row is recomputed only when the torrent has received
+    a new libtorrent status, e.g. from a state_update_alert, so a bulk status
+    request becomes a lookup of columns instead of a status function call for
+    every torrent and key. Recomputing a row also updates the torrent status
+    versions so that diffs of the snapshot keys need no value comparisons.
+
+    Args:
+        keys (tuple of str): The status keys to store in the snapshot.
+
+    Attributes:
+        columns (dict): The status values ``{key: [value, ...]}`` indexed by row.
+        rows (dict): The row index of each torrent ``{torrent_id: row}``.
+
+    """
+
+    def __init__(self, keys=SNAPSHOT_KEYS):
+        self.columns = {key: [] for key in keys}
+        self.rows = {}
+        # The libtorrent status object each row was computed from.
+        self._row_status = []
+        self._free_rows = []
+
+    def __contains__(self, torrent_id):
+        return torrent_id in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def split_keys(self, keys):
+        """Split status keys into the snapshot keys and the remaining keys.
+
+        Args:
+            keys (list of str): The status keys.
+
+        Returns:
+            tuple: The snapshot keys and other keys as lists.
+
+        """
+        columns = self.columns
+        snapshot_keys = [key for key in keys if key in columns]
+        other_keys = [key for key in keys if key not in columns]
+        return snapshot_keys, other_keys
+
+    def _add_row(self, torrent_id):
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._row_status)
+            self._row_status.append(None)
+            for column in self.columns.values():
+                column.append(None)
+        self.rows[torrent_id] = row
+        return row
+
+    def remove(self, torrent_id):
+        """Release the row used by a torrent.
+
+        Args:
+            torrent_id (str): The torrent ID.
+
+        """
+        row = self.rows.pop(torrent_id, None)
+        if row is None:
+            return
+
+        self._row_status[row] = None
+        for column in self.columns.values():
+            column[row] = None
+        self._free_rows.append(row)
+
+    def update(self, torrents):
+        """Recompute the rows for torrents from their current status.
+
+        Args:
+            torrents (list of Torrent): The torrents to recompute.
+
+        """
+        columns = list(self.columns.items())
+        for torrent in torrents:
+            row = self.rows.get(torrent.torrent_id)
+            if row is None:
+                row = self._add_row(torrent.torrent_id)
+            self._row_status[row] = torrent.status
+            status_funcs = torrent.status_funcs
+            values = {key: status_funcs[key]() for key, dummy_column in columns}
+            for key, column in columns:
+                column[row] = values[key]
+            torrent.update_status_versions(values)
+
+    def refresh(self, torrents):
+        """Recompute only the rows of torrents that have a new status.
+
+        Args:
+            torrents (list of Torrent): The torrents to check.
+
+        """
+        rows = self.rows
+        row_status = self._row_status
+        stale = []
+        for torrent in torrents:
+            row = rows.get(torrent.torrent_id)
+            if row is None or row_status[row] is not torrent.status:
+                stale.append(torrent)
+
+        if stale:
+            self.update(stale)
+
+    def get_status(self, torrent_ids, keys):
+        """Get the status values for torrents from the snapshot columns.
+
+        Note:
+            The torrents must have been added with `update` or `refresh`.
+
+        Args:
+            torrent_ids (list of str): The torrent IDs.
+            keys (list of str): The snapshot keys to get the values of.
+
+        Returns:
+            dict: The status dicts ``{torrent_id: {key: value, ...}, ...}``.
+
+        """
+        if not keys:
+            return {torrent_id: {} for torrent_id in torrent_ids}
+
+        rows = [self.rows[torrent_id] for torrent_id in torrent_ids]
+        values = [
+            [column[row] for row in rows] for column in map(self.columns.get, keys)
+        ]
+        return {
+            torrent_id: dict(zip(keys, row_values))
+            for torrent_id, row_values in zip(torrent_ids, zip(*values))
+        }
@@ -107,6 +107,37 @@ def __init__(self, torrent_id, state):
         self._args = [torrent_id, state]
 
 
+class TorrentStatesChangedEvent(DelugeEvent):
+    """
+    Emitted once for several torrents changing state together, e.g. in a bulk
+    operation, in place of a TorrentStateChangedEvent for each torrent.
+
+    Listeners registered for TorrentStateChangedEvent but not this event still
+    receive a TorrentStateChangedEvent for each torrent.
+    """
+
+    # The event this event is emitted in place of.
+    replaces = 'TorrentStateChangedEvent'
+
+    def __init__(self, torrent_states):
+        """
+        Args:
+            torrent_states (dict): The new state of the torrents,
+                ``{torrent_id: state, ...}``.
+        """
+        self._args = [torrent_states]
+
+    def split(self):
+        """
+        Returns:
+            list: A TorrentStateChangedEvent for each torrent.
+        """
+        return [
+            TorrentStateChangedEvent(torrent_id, state)
+            for torrent_id, state in self._args[0].items()
+        ]
+
+
 class TorrentTrackerStatusEvent(DelugeEvent):
     """
     Emitted when a torrents tracker status changes.
@@ -121,6 +152,20 @@ def __init__(self, torrent_id, status):
         self._args = [torrent_id, status]
 
 
+class TorrentsStatusChangedEvent(DelugeEvent):
+    """
+    Emitted to a session subscribed to torrent status changes.
+    """
+
+    def __init__(self, status_dict):
+        """
+        Args:
+            status_dict (dict): The changed status values of the torrents,
+                ``{torrent_id: {key: value, ...}, ...}``.
+        """
+        self._args = [status_dict]
+
+
 class TorrentQueueChangedEvent(DelugeEvent):
     """
     Emitted when the queue order has changed.
@@ -250,6 +295,30 @@ class SessionStartedEvent(DelugeEvent):
     pass
 
 
+class SessionReadyEvent(DelugeEvent):
+    """
+    Emitted when the first torrents of the saved session state have been added
+    and the session can be used while the remaining torrents are still loading.
+    """
+
+    pass
+
+
+class SessionLoadingProgressEvent(DelugeEvent):
+    """
+    Emitted when a batch of torrents from the saved session state has been added.
+    """
+
+    def __init__(self, loaded, total):
+        """
+        :param loaded: the number of torrents loaded
+        :type loaded: int
+        :param total: the number of torrents in the session state
+        :type total: int
+        """
+        self._args = [loaded, total]
+
+
 class SessionPausedEvent(DelugeEvent):
     """
     Emitted when the session has been paused.
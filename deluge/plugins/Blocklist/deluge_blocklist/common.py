@@ -12,6 +12,7 @@
 #
 
 import os.path
+import socket
 from functools import wraps
 from sys import exc_info
 
@@ -66,6 +67,51 @@ def remove_zeros(ip):
     return '.'.join([part.lstrip('0').zfill(1) for part in ip.split('.')])
 
 
+def parse_address(address):
+    """Parses an IPv4 or IPv6 address to an integer.
+
+    Args:
+        address (str): The ip address, IPv4 parts may have leading zeros.
+
+    Returns:
+        tuple: The IP version (4 or 6) and the address as an int.
+
+    Raises:
+        BadIP: If the address is badly formed.
+
+    """
+    if ':' in address:
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, address.strip())
+        except (OSError, ValueError):
+            raise BadIP(_('The IP address "%s" is badly formed') % address)
+        return 6, int.from_bytes(packed, 'big')
+
+    try:
+        q1, q2, q3, q4 = (int(q) for q in address.split('.'))
+    except ValueError:
+        raise BadIP(_('The IP address "%s" is badly formed') % address)
+    if not (0 <= q1 <= 255 and 0 <= q2 <= 255 and 0 <= q3 <= 255 and 0 <= q4 <= 255):
+        raise BadIP(_('The IP address "%s" is badly formed') % address)
+    return 4, (q1 << 24) | (q2 << 16) | (q3 << 8) | q4
+
+
+def format_address(version, value):
+    """Formats an integer IP address as returned by `parse_address`.
+
+    Args:
+        version (int): The IP version, 4 or 6.
+        value (int): The address.
+
+    Returns:
+        str: The ip address.
+
+    """
+    if version == 4:
+        return socket.inet_ntoa(value.to_bytes(4, 'big'))
+    return socket.inet_ntop(socket.AF_INET6, value.to_bytes(16, 'big'))
+
+
 class BadIP(Exception):
     _message = None
 
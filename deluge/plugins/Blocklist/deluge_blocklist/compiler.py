@@ -0,0 +1,252 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""Compiles blocklist ranges into sorted, merged intervals with a binary cache.
+
+The ranges of a blocklist are parsed once into integers, sorted and merged so
+any overlapping or adjacent ranges become one interval. The intervals are saved
+in a binary cache file keyed by the checksum of the source blocklist, so an
+unchanged blocklist is loaded from the cache instead of parsed again.
+
+"""
+
+import hashlib
+import logging
+import os
+import struct
+from bisect import bisect_right
+
+from .common import BadIP, format_address, parse_address
+
+log = logging.getLogger(__name__)
+
+CACHE_MAGIC = b'DBLC'
+CACHE_VERSION = 1
+# The magic, version, source checksum and the number of IPv4 and IPv6 ranges.
+CACHE_HEADER_FORMAT = '!4sB40sII'
+CACHE_HEADER_SIZE = struct.calcsize(CACHE_HEADER_FORMAT)
+# An IPv4 range as two 32-bit and an IPv6 range as four 64-bit integers.
+RANGE4_FORMAT = struct.Struct('!II')
+RANGE6_FORMAT = struct.Struct('!QQQQ')
+UINT64_MASK = (1 << 64) - 1
+
+
+def file_checksum(filename):
+    """Gets the SHA1 checksum of a file.
+
+    Args:
+        filename (str): Path of the file.
+
+    Returns:
+        str: The hex digest of the file contents.
+
+    """
+    sha1 = hashlib.sha1()
+    with open(filename, 'rb') as _file:
+        for chunk in iter(lambda: _file.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def merge_ranges(ranges):
+    """Sorts ranges and merges the overlapping and adjacent ones.
+
+    Args:
+        ranges (list of tuple): The (start, end) integer ranges, inclusive.
+
+    Returns:
+        list: The merged (start, end) ranges in ascending order.
+
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+class CompiledBlocklist:
+    """The merged IPv4 and IPv6 ranges of a blocklist.
+
+    Looking up an address is a binary search of the range starts as the merged
+    ranges do not overlap.
+
+    Args:
+        ranges4 (list of tuple): The merged IPv4 (start, end) integer ranges.
+        ranges6 (list of tuple): The merged IPv6 (start, end) integer ranges.
+        checksum (str): The checksum of the source blocklist.
+
+    Attributes:
+        num_invalid (int): The number of ranges skipped when compiling.
+
+    """
+
+    def __init__(self, ranges4=(), ranges6=(), checksum=''):
+        self.ranges = {4: list(ranges4), 6: list(ranges6)}
+        self._starts = {
+            version: [start for start, dummy_end in ranges]
+            for version, ranges in self.ranges.items()
+        }
+        self.checksum = checksum
+        self.num_invalid = 0
+
+    def __len__(self):
+        return len(self.ranges[4]) + len(self.ranges[6])
+
+    @classmethod
+    def compile(cls, ranges, checksum=''):
+        """Compiles the ranges read from a blocklist.
+
+        Args:
+            ranges (iterable): The (start, end) address strings, e.g. from
+                a reader's `readranges`.
+            checksum (str, optional): The checksum of the source blocklist.
+
+        Returns:
+            CompiledBlocklist: The compiled blocklist.
+
+        """
+        parsed = {4: [], 6: []}
+        num_invalid = 0
+        for start, end in ranges:
+            try:
+                version, start = parse_address(start)
+                end_version, end = parse_address(end)
+            except BadIP as ex:
+                log.debug('Failed to parse IP: %s', ex)
+                num_invalid += 1
+                continue
+            if version != end_version or start > end:
+                num_invalid += 1
+                continue
+            parsed[version].append((start, end))
+
+        if num_invalid:
+            log.warning('Skipped %d invalid ip ranges', num_invalid)
+        compiled = cls(merge_ranges(parsed[4]), merge_ranges(parsed[6]), checksum)
+        compiled.num_invalid = num_invalid
+        return compiled
+
+    def is_blocked(self, address):
+        """Checks if an address is in one of the ranges.
+
+        Args:
+            address (str): The IPv4 or IPv6 address.
+
+        Returns:
+            bool: True if the address is in a range.
+
+        Raises:
+            BadIP: If the address is badly formed.
+
+        """
+        version, value = parse_address(address)
+        index = bisect_right(self._starts[version], value) - 1
+        return index >= 0 and value <= self.ranges[version][index][1]
+
+    def apply(self, ip_filter, access):
+        """Adds the ranges to an ip filter.
+
+        Args:
+            ip_filter (lt.ip_filter): The ip filter.
+            access (int): The access flags of the ranges.
+
+        Returns:
+            int: The number of ranges added.
+
+        """
+        for version, ranges in self.ranges.items():
+            for start, end in ranges:
+                ip_filter.add_rule(
+                    format_address(version, start), format_address(version, end), access
+                )
+        return len(self)
+
+    def save(self, filename):
+        """Saves the ranges to a binary cache file.
+
+        Args:
+            filename (str): Path of the cache file.
+
+        Returns:
+            bool: True if the cache was saved.
+
+        """
+        pack4 = RANGE4_FORMAT.pack
+        pack6 = RANGE6_FORMAT.pack
+        data = [
+            struct.pack(
+                CACHE_HEADER_FORMAT,
+                CACHE_MAGIC,
+                CACHE_VERSION,
+                self.checksum.encode('ascii'),
+                len(self.ranges[4]),
+                len(self.ranges[6]),
+            )
+        ]
+        data.extend(pack4(start, end) for start, end in self.ranges[4])
+        data.extend(
+            pack6(start >> 64, start & UINT64_MASK, end >> 64, end & UINT64_MASK)
+            for start, end in self.ranges[6]
+        )
+
+        filename_tmp = filename + '.tmp'
+        try:
+            with open(filename_tmp, 'wb') as _file:
+                _file.write(b''.join(data))
+            os.replace(filename_tmp, filename)
+        except OSError as ex:
+            log.error('Unable to save blocklist cache %s: %s', filename, ex)
+            return False
+        return True
+
+    @classmethod
+    def load(cls, filename, checksum):
+        """Loads the ranges from a binary cache file.
+
+        Args:
+            filename (str): Path of the cache file.
+            checksum (str): The checksum of the source blocklist.
+
+        Returns:
+            CompiledBlocklist: The compiled blocklist or None if the cache is
+                missing, damaged or for a different source blocklist.
+
+        """
+        try:
+            with open(filename, 'rb') as _file:
+                data = _file.read()
+        except OSError:
+            return None
+
+        try:
+            magic, version, cache_checksum, num4, num6 = struct.unpack_from(
+                CACHE_HEADER_FORMAT, data
+            )
+        except struct.error:
+            return None
+        size4 = num4 * RANGE4_FORMAT.size
+        size = CACHE_HEADER_SIZE + size4 + num6 * RANGE6_FORMAT.size
+        if (
+            magic != CACHE_MAGIC
+            or version != CACHE_VERSION
+            or cache_checksum.decode('ascii', 'replace') != checksum
+            or len(data) != size
+        ):
+            return None
+
+        offset = CACHE_HEADER_SIZE
+        ranges4 = list(RANGE4_FORMAT.iter_unpack(data[offset : offset + size4]))
+        ranges6 = [
+            ((start_high << 64) | start_low, (end_high << 64) | end_low)
+            for start_high, start_low, end_high, end_low in RANGE6_FORMAT.iter_unpack(
+                data[offset + size4 :]
+            )
+        ]
+        return cls(ranges4, ranges6, checksum)
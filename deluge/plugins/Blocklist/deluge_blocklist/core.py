@@ -27,6 +27,7 @@
 from deluge.plugins.pluginbase import CorePluginBase
 
 from .common import IP, BadIP
+from .compiler import CompiledBlocklist, file_checksum
 from .detect import UnknownFormatError, create_reader, detect_compression, detect_format
 from .readers import ReaderParseError
 
@@ -399,11 +400,11 @@ def import_list(self, blocklist):
         """
         log.trace('on import_list')
 
-        def on_read_ip_range(start, end):
-            """Add ip range to blocklist"""
-            # log.trace('Adding ip range %s - %s to ipfilter as blocked', start, end)
-            self.blocklist.add_rule(start.address, end.address, BLOCK_RANGE)
-            self.num_blocked += 1
+        def read_ip_ranges(blocklist):
+            """Add the compiled ip ranges to blocklist"""
+            compiled = self.compile_list(blocklist)
+            self.num_blocked = compiled.apply(self.blocklist, BLOCK_RANGE)
+            return blocklist
 
         def on_finish_read(result):
             """Add any whitelisted IP's and add the blocklist to session"""
@@ -448,11 +449,41 @@ def on_reader_failure(failure):
         )
         log.debug('Clearing current ip filtering')
         # self.blocklist.add_rule('0.0.0.0', '255.255.255.255', ALLOW_RANGE)
-        d = threads.deferToThread(self.reader(blocklist).read, on_read_ip_range)
+        d = threads.deferToThread(read_ip_ranges, blocklist)
         d.addCallback(on_finish_read).addErrback(on_reader_failure)
 
         return d
 
+    def compile_list(self, blocklist):
+        """Compiles the blocklist or loads it from the compiled cache.
+
+        The compiled cache is only used if it was compiled from a blocklist
+        with the same checksum.
+
+        Args:
+            blocklist (str): Path of blocklist.
+
+        Returns:
+            CompiledBlocklist: The compiled blocklist.
+
+        """
+        cache = deluge.configmanager.get_config_dir('blocklist.compiled')
+        checksum = file_checksum(blocklist)
+        compiled = CompiledBlocklist.load(cache, checksum)
+        if compiled is not None:
+            log.debug('Loaded %d ranges from compiled blocklist', len(compiled))
+            return compiled
+
+        start = time.perf_counter()
+        compiled = CompiledBlocklist.compile(
+            self.reader(blocklist).readranges(), checksum
+        )
+        log.debug(
+            'Compiled %d ranges in %.2fs', len(compiled), time.perf_counter() - start
+        )
+        compiled.save(cache)
+        return compiled
+
     def on_import_complete(self, blocklist):
         """Runs any import clean up functions.
 
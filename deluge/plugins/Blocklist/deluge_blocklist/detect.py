@@ -7,13 +7,20 @@
 #
 
 from .decompressers import BZipped2, GZipped, Zipped
-from .readers import EmuleReader, PeerGuardianReader, SafePeerReader
+from .readers import (
+    EmuleReader,
+    PeerGuardianBinaryReader,
+    PeerGuardianReader,
+    SafePeerReader,
+)
 
 COMPRESSION_TYPES = {b'PK': 'Zip', b'\x1f\x8b': 'GZip', b'BZ': 'BZip2'}
 
 DECOMPRESSERS = {'Zip': Zipped, 'GZip': GZipped, 'BZip2': BZipped2}
 
+# The binary reader is first so detection does not read a binary list as text.
 READERS = {
+    'PeerGuardianBinary': PeerGuardianBinaryReader,
     'Emule': EmuleReader,
     'SafePeer': SafePeerReader,
     'PeerGuardian': PeerGuardianReader,
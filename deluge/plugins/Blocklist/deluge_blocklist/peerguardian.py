@@ -6,10 +6,8 @@
 # See LICENSE for more details.
 #
 
-import gzip
 import logging
 import socket
-from struct import unpack
 
 log = logging.getLogger(__name__)
 
@@ -18,49 +16,40 @@ class PGException(Exception):
     pass
 
 
-# Incrementally reads PeerGuardian blocklists v1 and v2.
+# Reads PeerGuardian binary blocklists v1 and v2.
 # See http://wiki.phoenixlabs.org/wiki/P2B_Format
 class PGReader:
-    def __init__(self, filename):
-        log.debug('PGReader loading: %s', filename)
-
-        try:
-            with gzip.open(filename, 'rb') as _file:
-                self.fd = _file
-        except OSError:
-            log.debug('Blocklist: PGReader: Incorrect file type or list is corrupt')
+    def __init__(self, _file):
+        """Checks the header of an open binary blocklist file"""
+        self.fd = _file
 
         # 4 bytes, should be 0xffffffff
         buf = self.fd.read(4)
-        hdr = unpack('l', buf)[0]
-        if hdr != -1:
-            raise PGException(_('Invalid leader') + ' %d' % hdr)
+        if buf != b'\xff\xff\xff\xff':
+            raise PGException(_('Invalid leader') + ' %r' % buf)
 
         magic = self.fd.read(3)
-        if magic != 'P2B':
+        if magic != b'P2B':
             raise PGException(_('Invalid magic code'))
 
         buf = self.fd.read(1)
-        ver = ord(buf)
-        if ver != 1 and ver != 2:
-            raise PGException(_('Invalid version') + ' %d' % ver)
-
-    def __next__(self):
-        # Skip over the string
-        buf = -1
-        while buf != 0:
-            buf = self.fd.read(1)
-            if buf == '':  # EOF
-                return False
-            buf = ord(buf)
-
-        buf = self.fd.read(4)
-        start = socket.inet_ntoa(buf)
-
-        buf = self.fd.read(4)
-        end = socket.inet_ntoa(buf)
-
-        return (start, end)
+        if buf not in (b'\x01', b'\x02'):
+            raise PGException(_('Invalid version') + ' %r' % buf)
+
+    def __iter__(self):
+        """Yields each (start, end) ip range in the file"""
+        data = self.fd.read()
+        pos = 0
+        while True:
+            # Skip over the null-terminated name
+            pos = data.find(b'\x00', pos) + 1
+            if not pos or pos + 8 > len(data):
+                break
+            yield (
+                socket.inet_ntoa(data[pos : pos + 4]),
+                socket.inet_ntoa(data[pos + 4 : pos + 8]),
+            )
+            pos += 8
 
     def close(self):
         self.fd.close()
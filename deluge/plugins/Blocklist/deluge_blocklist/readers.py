@@ -7,11 +7,11 @@
 #
 
 import logging
-import re
 
 from deluge.common import decode_bytes
 
-from .common import IP, BadIP, raises_errors_as
+from .common import IP, BadIP, parse_address, raises_errors_as
+from .peerguardian import PGException, PGReader
 
 log = logging.getLogger(__name__)
 
@@ -58,10 +58,8 @@ def is_valid(self):
             if not self.is_ignored(line):
                 try:
                     (start, end) = self.parse(line)
-                    if not re.match(r'^(\d{1,3}\.){4}$', start + '.') or not re.match(
-                        r'^(\d{1,3}\.){4}$', end + '.'
-                    ):
-                        valid = False
+                    parse_address(start)
+                    parse_address(end)
                 except Exception:
                     valid = False
                 break
@@ -90,10 +88,51 @@ class SafePeerReader(BaseReader):
     """Blocklist reader for SafePeer style blocklists"""
 
     def parse(self, line):
-        return line.strip().split(':')[-1].split('-')
+        line = line.strip()
+        addresses = line.split(':')[-1].split('-')
+        if len(addresses) == 2:
+            return addresses
+
+        # An IPv6 range, find the name separator before a valid range
+        index = line.find(':')
+        while index != -1:
+            addresses = line[index + 1 :].split('-')
+            try:
+                parse_address(addresses[0])
+            except BadIP:
+                index = line.find(':', index + 1)
+            else:
+                return addresses
+        return line.split(':')[-1].split('-')
 
 
 class PeerGuardianReader(SafePeerReader):
     """Blocklist reader for PeerGuardian style blocklists"""
 
     pass
+
+
+class PeerGuardianBinaryReader(BaseReader):
+    """Blocklist reader for PeerGuardian binary (P2B) blocklists"""
+
+    def open(self):
+        return open(self.file, 'rb')
+
+    def is_valid(self):
+        blocklist = self.open()
+        try:
+            PGReader(blocklist)
+        except (PGException, OSError, EOFError):
+            return False
+        finally:
+            blocklist.close()
+        return True
+
+    @raises_errors_as(ReaderParseError)
+    def readranges(self):
+        """Yields each ip range from the file"""
+        blocklist = self.open()
+        try:
+            yield from PGReader(blocklist)
+        finally:
+            blocklist.close()
@@ -0,0 +1,128 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+import socket
+import time
+
+import pytest
+
+from deluge._libtorrent import lt
+from deluge_blocklist.compiler import CompiledBlocklist, file_checksum, merge_ranges
+from deluge_blocklist.detect import detect_format
+from deluge_blocklist.readers import (
+    EmuleReader,
+    PeerGuardianBinaryReader,
+    SafePeerReader,
+)
+
+
+def write_emule(path, num_ranges):
+    with open(path, 'w') as _file:
+        for index in range(num_ranges):
+            start = index * 300
+            _file.write(
+                '%s - %s , 000 , Range %d\n'
+                % (
+                    socket.inet_ntoa(start.to_bytes(4, 'big')),
+                    socket.inet_ntoa((start + 255).to_bytes(4, 'big')),
+                    index,
+                )
+            )
+
+
+class TestBlocklist:
+    def test_merge_ranges(self):
+        ranges = [(10, 20), (1, 5), (6, 8), (15, 30), (40, 50)]
+        assert merge_ranges(ranges) == [(1, 8), (10, 30), (40, 50)]
+
+    def test_compile(self):
+        compiled = CompiledBlocklist.compile(
+            [
+                ('001.002.003.004', '1.2.3.10'),
+                ('1.2.3.8', '1.2.3.20'),
+                ('2001:db8::', '2001:db8::ffff'),
+                ('1.2.3.300', '1.2.3.400'),
+                ('5.6.7.8', '2001:db8::1'),
+            ]
+        )
+        assert compiled.ranges[4] == [(0x01020304, 0x01020314)]
+        assert compiled.ranges[6] == [(0x20010DB8 << 96, (0x20010DB8 << 96) | 0xFFFF)]
+        assert compiled.num_invalid == 2
+        assert compiled.is_blocked('1.2.3.20')
+        assert not compiled.is_blocked('1.2.3.21')
+        assert not compiled.is_blocked('1.2.3.3')
+        assert compiled.is_blocked('2001:db8::1')
+        assert not compiled.is_blocked('::1')
+
+    def test_apply(self):
+        compiled = CompiledBlocklist.compile(
+            [('1.2.3.4', '1.2.3.10'), ('2001:db8::', '2001:db8::ffff')]
+        )
+        ip_filter = lt.ip_filter()
+        assert compiled.apply(ip_filter, 1) == 2
+        assert ip_filter.access('1.2.3.5') == 1
+        assert ip_filter.access('1.2.3.11') == 0
+        assert ip_filter.access('2001:db8::1') == 1
+
+    def test_save_load(self, tmp_path):
+        cache = str(tmp_path / 'blocklist.compiled')
+        compiled = CompiledBlocklist.compile(
+            [('1.2.3.4', '1.2.3.10'), ('2001:db8::', '2001:db8::ffff')], 'a' * 40
+        )
+        assert compiled.save(cache)
+
+        loaded = CompiledBlocklist.load(cache, 'a' * 40)
+        assert loaded.ranges == compiled.ranges
+        assert loaded.is_blocked('2001:db8::10')
+        # The cache of a different source blocklist is not used
+        assert CompiledBlocklist.load(cache, 'b' * 40) is None
+
+    def test_readers(self, tmp_path):
+        path = str(tmp_path / 'blocklist.txt')
+        with open(path, 'w') as _file:
+            _file.write(
+                '# Comment\nSome:name:1.2.3.4-1.2.3.5\nSix:2001:db8::-2001:db8::1\n'
+            )
+        assert SafePeerReader(path).is_valid()
+        assert list(SafePeerReader(path).readranges()) == [
+            ['1.2.3.4', '1.2.3.5'],
+            ['2001:db8::', '2001:db8::1'],
+        ]
+
+        path = str(tmp_path / 'blocklist.p2b')
+        with open(path, 'wb') as _file:
+            _file.write(b'\xff\xff\xff\xffP2B\x02')
+            _file.write(b'Range\x00' + socket.inet_aton('1.2.3.4'))
+            _file.write(socket.inet_aton('1.2.3.5'))
+            _file.write(b'\x00' + socket.inet_aton('0.0.0.0'))
+            _file.write(socket.inet_aton('0.0.0.1'))
+        assert detect_format(path) == 'PeerGuardianBinary'
+        assert list(PeerGuardianBinaryReader(path).readranges()) == [
+            ('1.2.3.4', '1.2.3.5'),
+            ('0.0.0.0', '0.0.0.1'),
+        ]
+        assert not PeerGuardianBinaryReader(str(tmp_path / 'blocklist.txt')).is_valid()
+
+    @pytest.mark.slow
+    def test_import_benchmark(self, tmp_path):
+        """Time compiling and reloading a large blocklist."""
+        path = str(tmp_path / 'blocklist.txt')
+        cache = str(tmp_path / 'blocklist.compiled')
+        write_emule(path, 400000)
+
+        start = time.perf_counter()
+        checksum = file_checksum(path)
+        compiled = CompiledBlocklist.compile(EmuleReader(path).readranges(), checksum)
+        compiled.save(cache)
+        compile_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = CompiledBlocklist.load(cache, file_checksum(path))
+        load_time = time.perf_counter() - start
+        print(
+            f'\nCompiled {len(compiled)} ranges in {compile_time:.2f}s, '
+            f'loaded from cache in {load_time:.2f}s'
+        )
+        assert len(loaded) == 400000
@@ -143,10 +143,13 @@ def post_torrent_remove(self, torrent_id):
     # Utils #
     def clean_config(self):
         """remove invalid data from config-file"""
+        removed = []
         for torrent_id, label_id in list(self.torrent_labels.items()):
             if (label_id not in self.labels) or (torrent_id not in self.torrents):
                 log.debug('label: rm %s:%s', torrent_id, label_id)
                 del self.torrent_labels[torrent_id]
+                removed.append(torrent_id)
+        component.get('FilterManager').update_index(removed, ['label'])
 
     def clean_initial_config(self):
         """
@@ -325,6 +328,7 @@ def set_torrent(self, torrent_id, label_id):
         if label_id:
             self.torrent_labels[torrent_id] = label_id
             self._set_torrent_options(torrent_id, label_id)
+        component.get('FilterManager').update_index([torrent_id], ['label'])
 
         self.config.save()
 
@@ -9,6 +9,7 @@
 import pytest
 
 from deluge.core.core import Core
+from deluge.core.perfstats import CATEGORY_ALERT, LATENCY_BUCKETS
 
 
 class LtSessionMock:
@@ -103,3 +104,51 @@ def handler(alert): ...
         self.am.deregister_handler(handler)
         assert self.am.handlers['dummy1'] == []
         assert self.am.handlers['dummy2'] == []
+
+    async def test_pop_alerts_batch(self, mock_callback, mock_alert1, mock_alert2):
+        self.am.register_batch_handler('mock_alert1', mock_callback)
+
+        self.am.session.push_alerts([mock_alert1, mock_alert2, mock_alert1])
+
+        await mock_callback.deferred
+
+        mock_callback.assert_called_once_with([mock_alert1, mock_alert1])
+
+    def test_handler_stats(self, mock_alert1, mock_alert2):
+        calls = []
+
+        def handler(alert):
+            calls.append(alert)
+            raise ValueError('handler error')
+
+        def batch_handler(alerts):
+            calls.append(alerts)
+
+        self.am.register_handler('mock_alert1', handler)
+        self.am.register_batch_handler('mock_alert2', batch_handler)
+        self.am.perf_stats.set_enabled(True)
+        self.am.session.alerts = [mock_alert1, mock_alert2, mock_alert1]
+        self.am.handle_alerts()
+
+        # A failing handler does not stop the other handlers.
+        assert calls == [mock_alert1, mock_alert1, [mock_alert2]]
+        stats = self.am.perf_stats.get_stats([CATEGORY_ALERT])['stats'][CATEGORY_ALERT]
+        assert stats['mock_alert1:' + handler.__qualname__]['calls'] == 2
+        assert stats['mock_alert2:' + batch_handler.__qualname__]['calls'] == 1
+
+        # The handler stats are recorded with PerfStats disabled.
+        self.am.perf_stats.set_enabled(False)
+        self.am.session.alerts = [mock_alert1]
+        self.am.handle_alerts()
+        handler_stats = self.am.get_handler_stats()
+        assert handler_stats['latency_buckets'] == list(LATENCY_BUCKETS)
+        handler_stats = handler_stats['handlers']['mock_alert1:' + handler.__qualname__]
+        assert handler_stats['calls'] == 3
+        assert sum(handler_stats['histogram']) == 3
+
+    def test_deregister_batch_handler(self):
+        def handler(alerts): ...
+
+        self.am.register_batch_handler('dummy1', handler)
+        self.am.deregister_handler(handler)
+        assert self.am.batch_handlers['dummy1'] == []
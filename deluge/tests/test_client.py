@@ -92,6 +92,8 @@ def test_connect_localclient(self):
 
         def on_connect(result):
             assert client.get_auth_level() == AUTH_LEVEL_ADMIN
+            # No compression is negotiated over the loopback interface.
+            assert client._daemon_proxy.protocol.get_transfer_codec() == 'none'
             return result
 
         d.addCallbacks(on_connect, self.fail)
@@ -190,3 +192,17 @@ def test_daemon_version_check_min(self):
         assert client.daemon_version_check_min(get_version())
         assert not client.daemon_version_check_min(f'{get_version()}1')
         assert client.daemon_version_check_min('0.1.0')
+
+    @pytest_twisted.inlineCallbacks
+    def test_get_torrents_status_pages(self):
+        username, password = get_localhost_auth()
+        yield client.connect(
+            'localhost', self.listen_port, username=username, password=password
+        )
+
+        pages = []
+        count = yield client.get_torrents_status_pages(
+            {}, ['name'], lambda torrents, total: pages.append((torrents, total))
+        )
+        assert count == 0
+        assert [(list(torrents), total) for torrents, total in pages] == [([], 0)]
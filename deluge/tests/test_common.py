@@ -14,6 +14,8 @@
 from deluge.common import (
     VersionSplit,
     archive_files,
+    decode_piece_runs,
+    encode_piece_runs,
     fdate,
     fpcnt,
     fpeer,
@@ -30,6 +32,7 @@
     is_ipv6,
     is_magnet,
     is_url,
+    iter_piece_runs,
     parse_human_size,
     windows_check,
 )
@@ -225,3 +228,18 @@ def test_get_magnet_info_tiers(self):
         assert result['info_hash'] == '953bad769164e8482c7785a21d12166f94b9e14d'
         assert result['trackers'][tracker1] == 1
         assert result['trackers'][tracker2] == 2
+
+    def test_piece_runs(self):
+        pieces = bytes([3] * 130 + [0, 1, 1, 2] + [3] * 64)
+        runs = encode_piece_runs(pieces)
+        assert runs == [0xFF, 0xFF, 0xC1, 0x00, 0x41, 0x80, 0xFF]
+        assert list(iter_piece_runs(runs)) == [
+            (3, 130),
+            (0, 1),
+            (1, 2),
+            (2, 1),
+            (3, 64),
+        ]
+        assert decode_piece_runs(runs) == pieces
+        assert encode_piece_runs(b'') == []
+        assert decode_piece_runs([]) == b''
@@ -7,6 +7,7 @@
 import os
 from base64 import b64encode
 from hashlib import sha1 as sha
+from unittest import mock
 
 import pytest
 import pytest_twisted
@@ -25,6 +26,7 @@
 from deluge.core.core import Core
 from deluge.core.rpcserver import RPCServer
 from deluge.error import AddTorrentError, InvalidTorrentError
+from deluge.event import SessionPausedEvent
 
 from . import common
 
@@ -304,6 +306,41 @@ def test_pause_torrents(self):
         r2 = self.core.get_torrent_status(tid2, ['paused'])
         assert r2['paused']
 
+    def test_pause_torrents_batch(self):
+        tid1 = self.add_torrent('test.torrent')
+        tid2 = self.add_torrent('test_torrent.file.torrent')
+        for torrent_id in (tid1, tid2):
+            # Already paused by libtorrent so the state changes synchronously.
+            self.core.torrentmanager[torrent_id].handle.pause()
+            self.core.torrentmanager[torrent_id].get_lt_status()
+
+        with mock.patch.object(
+            self.core.eventmanager, 'emit'
+        ) as emit, mock.patch.object(
+            self.core.torrentmanager, 'save_state'
+        ) as save_state:
+            self.core.pause_torrents([tid1, tid2])
+            self.clock.advance(0)
+
+        assert [call.args[0].name for call in emit.call_args_list] == [
+            'TorrentStatesChangedEvent'
+        ]
+        assert emit.call_args.args[0].args == [{tid1: 'Paused', tid2: 'Paused'}]
+        save_state.assert_called_once_with()
+
+    def test_queue_torrents_batch(self):
+        tid1 = self.add_torrent('test.torrent')
+        tid2 = self.add_torrent('test_torrent.file.torrent')
+        self.core.torrentmanager.queued_torrents.update([tid1, tid2])
+
+        with mock.patch.object(self.core.eventmanager, 'emit') as emit:
+            self.core.queue_bottom([tid1, tid2])
+            self.core.queue_top([tid1, tid2])
+        assert [call.args[0].name for call in emit.call_args_list] == [
+            'TorrentQueueChangedEvent',
+            'TorrentQueueChangedEvent',
+        ]
+
     def test_pause_torrents_all(self):
         """With no torrent_ids param, pause all torrents"""
         tid1 = self.add_torrent('test.torrent')
@@ -389,6 +426,61 @@ def test_remove_torrents_invalid(self):
         assert val[0] == ('invalidid1', 'torrent_id invalidid1 not in session.')
         assert val[1] == ('invalidid2', 'torrent_id invalidid2 not in session.')
 
+    async def test_get_torrents_status(self):
+        tid1 = self.add_torrent('test.torrent')
+        tid2 = self.add_torrent('test_torrent.file.torrent')
+        keys = ['name', 'state', 'total_wanted', 'ratio', 'hash']
+        status = await self.core.get_torrents_status({}, keys)
+        assert set(status) == {tid1, tid2}
+        for torrent_id in (tid1, tid2):
+            expected = self.core.torrentmanager[torrent_id].get_status(keys)
+            assert status[torrent_id] == expected
+
+        all_status = await self.core.get_torrents_status({'id': [tid1]}, [])
+        assert set(all_status[tid1]) >= set(self.core.torrentmanager[tid1].status_funcs)
+
+    async def test_get_torrents_status_diff(self):
+        torrent_id = self.add_torrent('test.torrent')
+        keys = ['name', 'total_wanted']
+        status = await self.core.get_torrents_status({}, keys, diff=True)
+        assert set(status[torrent_id]) == set(keys)
+        status = await self.core.get_torrents_status({}, keys, diff=True)
+        assert status[torrent_id] == {}
+
+    async def test_get_torrents_status_filter_owner(self):
+        tid1 = self.add_torrent('test.torrent')
+        tid2 = self.add_torrent('test_torrent.file.torrent')
+        self.core.authmanager.create_account('user1', 'password', 'NORMAL')
+        self.core.set_torrent_options([tid2], {'owner': 'user1'})
+
+        status = await self.core.get_torrents_status({'owner': 'user1'}, ['owner'])
+        assert status == {tid2: {'owner': 'user1'}}
+        state = self.core.torrentmanager[tid2].state
+        status = await self.core.get_torrents_status(
+            {'owner': ['user1'], 'state': state}, ['name']
+        )
+        assert set(status) == {tid2}
+        status = await self.core.get_torrents_status(
+            {'owner': 'localclient', 'id': [tid2]}, ['name']
+        )
+        assert status == {}
+        assert self.core.filtermanager.index['owner']['localclient'] == {tid1}
+
+    def test_get_filter_tree(self):
+        tid1 = self.add_torrent('test.torrent')
+        tid2 = self.add_torrent('test_torrent.file.torrent')
+        state1 = self.core.torrentmanager[tid1].state
+        state2 = self.core.torrentmanager[tid2].state
+        tree = self.core.get_filter_tree(hide_cat=['tracker_host'])
+        assert dict(tree['owner']) == {'': 0, 'localclient': 2}
+        assert dict(tree['state'])['All'] == 2
+        assert dict(tree['state'])[state2] == (2 if state1 == state2 else 1)
+
+        self.core.remove_torrent(tid2, False)
+        tree = dict(self.core.get_filter_tree()['state'])
+        assert tree[state1] == 1
+        assert self.core.filtermanager.indexed_values.keys() == {tid1}
+
     def test_get_session_status(self):
         status = self.core.get_session_status(
             ['net.recv_tracker_bytes', 'net.sent_tracker_bytes']
@@ -397,6 +489,80 @@ def test_get_session_status(self):
         assert status['net.recv_tracker_bytes'] == 0
         assert status['net.sent_tracker_bytes'] == 0
 
+    async def test_get_torrents_status_page(self):
+        tid1 = self.add_torrent('test.torrent')
+        tid2 = self.add_torrent('test_torrent.file.torrent')
+        tid3 = self.add_torrent('dir_with_6_files.torrent')
+        by_name = sorted(
+            [tid1, tid2, tid3],
+            key=lambda tid: self.core.torrentmanager[tid].get_name(),
+        )
+
+        pages = []
+        cursor = None
+        while True:
+            page = await self.core.get_torrents_status_page(
+                {}, ['name'], 'name', False, cursor, 2
+            )
+            assert page['total'] == 3
+            pages.append([torrent_id for torrent_id, status in page['torrents']])
+            cursor = page['cursor']
+            if cursor is None:
+                break
+        assert pages == [by_name[:2], by_name[2:]]
+
+        page = await self.core.get_torrents_status_page(
+            {}, ['name'], 'name', True, None, 2
+        )
+        assert [torrent_id for torrent_id, status in page['torrents']] == [
+            by_name[2],
+            by_name[1],
+        ]
+        page = await self.core.get_torrents_status_page(
+            {}, ['name'], 'name', True, page['cursor'], 2
+        )
+        assert page['torrents'] == [
+            [by_name[0], {'name': self.core.torrentmanager[by_name[0]].get_name()}]
+        ]
+        assert page['cursor'] is None
+
+    def test_get_perf_stats(self):
+        calls = []
+        self.core.eventmanager.register_event_handler(
+            'SessionPausedEvent', lambda: calls.append(1)
+        )
+        self.core.eventmanager.emit(SessionPausedEvent())
+        stats = self.core.get_perf_stats()
+        assert not stats['enabled']
+        assert stats['stats']['event'] == {}
+
+        self.core.set_perf_stats_enabled(True)
+        self.core.eventmanager.emit(SessionPausedEvent())
+        self.core.session_rates_timer.f()
+        stats = self.core.get_perf_stats(['event', 'looping_call'])
+        assert stats['enabled']
+        assert len(calls) == 2
+        (name,) = stats['stats']['event']
+        assert name.startswith('SessionPausedEvent:')
+        assert stats['stats']['event'][name]['calls'] == 1
+        assert (
+            stats['stats']['looping_call']['Core._update_session_rates']['calls'] == 1
+        )
+
+        self.core.reset_perf_stats()
+        assert self.core.get_perf_stats(['event'])['stats'] == {'event': {}}
+
+    def test_get_alert_handler_stats(self):
+        def handler(alert):
+            pass
+
+        self.core.alertmanager._call_handler(handler, None, 'test_alert')
+        stats = self.core.get_alert_handler_stats()
+        assert not self.core.get_perf_stats()['enabled']
+        handler_stats = stats['handlers']['test_alert:' + handler.__qualname__]
+        assert handler_stats['calls'] == 1
+        assert len(handler_stats['histogram']) == len(stats['latency_buckets']) + 1
+
     def test_get_session_status_all(self):
         status = self.core.get_session_status([])
         assert isinstance(status, dict)
@@ -0,0 +1,85 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+import pytest
+
+from deluge.core.fileindex import MIXED_PRIORITY, FileIndex
+
+
+def make_files(paths_sizes):
+    return [
+        {'index': index, 'path': path, 'size': size, 'offset': 0}
+        for index, (path, size) in enumerate(paths_sizes)
+    ]
+
+
+class TestFileIndex:
+    def setup_method(self):
+        self.index = FileIndex(
+            make_files(
+                [
+                    ('top/a/one', 100),
+                    ('top/a/two', 300),
+                    ('top/b/c/three', 600),
+                    ('top/four', 0),
+                ]
+            )
+        )
+
+    def test_dirs(self):
+        assert self.index.dir_paths == ['', 'top', 'top/a', 'top/b', 'top/b/c']
+        assert self.index.dir_sizes == [1000, 1000, 400, 600, 600]
+
+    def get_dir_priorities(self):
+        return [
+            self.index.get_dir_priority(dir_id)
+            for dir_id in range(len(self.index.dir_paths))
+        ]
+
+    def test_dir_priorities(self):
+        assert self.get_dir_priorities() == [None] * 5
+        self.index.set_priorities([1, 1, 4, 1])
+        assert self.get_dir_priorities() == [MIXED_PRIORITY, MIXED_PRIORITY, 1, 4, 4]
+        self.index.set_priorities([4, 4, 4, 4])
+        assert self.get_dir_priorities() == [4] * 5
+        # A list of the wrong length is ignored.
+        self.index.set_priorities([1])
+        assert self.index.priorities == [4] * 4
+
+    def test_file_done(self):
+        self.index.set_done([100, 150, 0, 0])
+        assert self.index.get_children('top/a')['progress'] == 0.625
+        self.index.set_file_done(1, 300)
+        self.index.set_file_done(2, 300)
+        assert self.index.get_children('top/a')['progress'] == 1.0
+        assert self.index.get_children('top/b')['progress'] == 0.5
+        assert self.index.get_children('')['progress'] == 0.7
+
+    def test_get_children(self):
+        self.index.set_done([100, 150, 0, 0])
+        self.index.set_priorities([4, 4, 4, 4])
+        tree = self.index.get_children('top')
+        assert tree['path'] == 'top'
+        assert tree['size'] == 1000
+        assert tree['progress'] == 0.25
+        assert tree['priority'] == 4
+        assert tree['total'] == 3
+        assert [child['path'] for child in tree['children']] == [
+            'top/a',
+            'top/b',
+            'top/four',
+        ]
+        assert tree['children'][0]['progress'] == 0.625
+        assert tree['children'][2]['type'] == 'file'
+        assert tree['children'][2]['index'] == 3
+
+        page = self.index.get_children('top/', offset=1, limit=1)
+        assert page['total'] == 3
+        assert [child['path'] for child in page['children']] == ['top/b']
+
+    def test_get_children_invalid_path(self):
+        with pytest.raises(KeyError):
+            self.index.get_children('missing')
@@ -11,7 +11,8 @@
 
 import pytest
 import pytest_twisted
-from twisted.internet.defer import Deferred
+from twisted.internet.defer import Deferred, succeed
+from twisted.internet.task import Clock
 from twisted.web import server
 from twisted.web.http import Request
 
@@ -20,7 +21,14 @@
 import deluge.ui.web.json_api
 from deluge.error import DelugeError
 from deluge.ui.web.auth import Auth
-from deluge.ui.web.json_api import JSON, JSONException
+from deluge.ui.web.json_api import (
+    JSON,
+    EventQueue,
+    EventStreamWriter,
+    JSONException,
+    JSONResponseProducer,
+    iter_json_chunks,
+)
 
 from . import common
 from .common_web import WebServerMockBase
@@ -116,6 +124,76 @@ def test_on_json_request_valid_content_type_with_charset(self):
         request.json = json_lib.dumps(json_data).encode()
         json._on_json_request(request)
 
+    def test_on_json_request_batch(self):
+        json = JSON()
+        request = MagicMock()
+        request._disconnected = False
+        request.getHeader.return_value = b'application/json'
+        json_data = [
+            {'method': 'system.listMethods', 'id': 1, 'params': []},
+            {'method': 'no-existing-module.test', 'id': 2, 'params': []},
+            {'id': 3, 'params': []},
+            'not-a-call',
+        ]
+        request.json = json_lib.dumps(json_data).encode()
+        json._on_json_request(request)
+
+        request.write.assert_called_once()
+        request.finish.assert_called_once()
+        responses = json_lib.loads(request.write.call_args[0][0])
+        assert [response['id'] for response in responses] == [1, 2, 3, None]
+        assert responses[0]['error'] is None
+        assert isinstance(responses[0]['result'], list)
+        assert responses[1]['error'] == {'message': 'Unknown method', 'code': 2}
+        assert responses[2]['error']['code'] == 5
+        assert responses[3]['error']['code'] == 5
+
+    def test_on_json_request_empty_batch(self):
+        json = JSON()
+        request = MagicMock()
+        request.getHeader.return_value = b'application/json'
+        request.json = b'[]'
+        with pytest.raises(JSONException):
+            json._on_json_request(request)
+
+
+def test_iter_json_chunks():
+    obj = {
+        'result': {
+            'torrents': {str(idx): {'name': f'torrent {idx}'} for idx in range(250)},
+            'stats': {1: 2.5, None: True},
+            'empty': [{}, [], ()],
+        },
+        'error': None,
+        'id': (1, 'a'),
+    }
+    expected = json_lib.loads(json_lib.dumps(obj))
+    assert json_lib.loads(b''.join(iter_json_chunks(obj))) == expected
+
+    chunks = list(iter_json_chunks(obj, chunk_size=100))
+    assert len(chunks) > 2
+    assert all(len(chunk) >= 100 for chunk in chunks[:-1])
+    assert json_lib.loads(b''.join(chunks)) == expected
+
+
+def test_json_response_producer():
+    request = MagicMock()
+    producer = JSONResponseProducer(request, iter([b'[1,', b'2]']))
+    producer.start()
+    request.registerProducer.assert_called_once_with(producer, False)
+
+    producer.resumeProducing()
+    producer.resumeProducing()
+    assert b''.join(call[0][0] for call in request.write.call_args_list) == b'[1,2]'
+    request.finish.assert_not_called()
+
+    producer.resumeProducing()
+    request.unregisterProducer.assert_called_once()
+    request.finish.assert_called_once()
+    # Nothing is written after the producer is stopped.
+    producer.resumeProducing()
+    assert request.write.call_count == 2
+
 
 @pytest.mark.usefixtures('daemon', 'client', 'component')
 class TestJSONCustomUserTestCase:
@@ -265,3 +343,81 @@ def on_success(arg):
 
         d.addCallbacks(on_success, pytest.fail)
         yield d
+
+
+class TestEventQueue:
+    @pytest.fixture(autouse=True)
+    def set_up(self, monkeypatch):
+        self.clock = Clock()
+        self.client = MagicMock()
+        monkeypatch.setattr(deluge.ui.web.json_api, 'reactor', self.clock)
+        monkeypatch.setattr(deluge.ui.web.json_api, 'client', self.client)
+        self.event_queue = EventQueue()
+        self.event_queue.add_listener('listener', 'TorrentAddedEvent')
+        self.on_event = self.client.register_event_handler.call_args[0][1]
+
+    def test_get_events_waiting(self):
+        d = self.event_queue.get_events('listener')
+        assert not d.called
+        # The waiting request fires when the event arrives
+        self.on_event('torrent_id', False)
+        assert d.result == [('TorrentAddedEvent', ('torrent_id', False))]
+        assert not self.clock.getDelayedCalls()
+
+        self.on_event('torrent_id2', False)
+        assert self.event_queue.get_events('listener') == [
+            ('TorrentAddedEvent', ('torrent_id2', False))
+        ]
+
+    def test_get_events_timeout(self):
+        d = self.event_queue.get_events('listener')
+        self.clock.advance(deluge.ui.web.json_api.EVENTS_TIMEOUT)
+        assert d.called
+        assert d.result is None
+
+    def test_event_stream(self):
+        request = MagicMock()
+        request._disconnected = False
+        stream = EventStreamWriter(request, [])
+        self.on_event('torrent_id', False)
+        self.event_queue.add_stream('listener', stream)
+        self.on_event('torrent_id2', True)
+        assert [call[0][0] for call in request.write.call_args_list] == [
+            b'event: deluge\ndata: ["TorrentAddedEvent",["torrent_id",false]]\n\n',
+            b'event: deluge\ndata: ["TorrentAddedEvent",["torrent_id2",true]]\n\n',
+        ]
+        self.event_queue.remove_stream('listener', stream)
+        self.on_event('torrent_id3', False)
+        assert request.write.call_count == 2
+
+    def test_event_stream_status(self, monkeypatch):
+        component = MagicMock()
+        monkeypatch.setattr(deluge.ui.web.json_api, 'component', component)
+        sessionproxy = component.get.return_value
+        status = {'torrent_id': {'name': 'test', 'state': 'Paused'}}
+        core = self.client.core
+        core.subscribe_torrents_status.side_effect = lambda *args: succeed(status)
+        sessionproxy.get_torrents_status.side_effect = lambda *args: succeed(status)
+        request = MagicMock()
+        request._disconnected = False
+        stream = EventStreamWriter(request, ['name', 'state'])
+
+        self.event_queue.add_stream('listener', stream)
+        self.client.core.subscribe_torrents_status.assert_called_once_with(
+            {}, ['name', 'state'], deluge.ui.web.json_api.EVENT_STREAM_STATUS_RATE
+        )
+        sessionproxy.update_cache.assert_called_once_with(status, ['name', 'state'])
+        assert request.write.call_count == 1
+
+        # The subscription is renewed after connecting to a daemon.
+        self.client.core.subscribe_torrents_status.reset_mock()
+        self.event_queue.resubscribe_status()
+        assert self.client.core.subscribe_torrents_status.call_count == 1
+        assert sessionproxy.update_cache.call_count == 2
+        assert request.write.call_count == 2
+
+        self.event_queue.remove_stream('listener', stream)
+        self.client.core.unsubscribe_torrents_status.assert_called_once_with()
+        self.client.core.subscribe_torrents_status.reset_mock()
+        self.event_queue.resubscribe_status()
+        assert not self.client.core.subscribe_torrents_status.called
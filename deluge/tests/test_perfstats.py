@@ -0,0 +1,84 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+import pytest
+
+from deluge.core.perfstats import (
+    CATEGORY_LOOPING_CALL,
+    CATEGORY_RPC,
+    LATENCY_BUCKETS,
+    CallStats,
+    PerfStats,
+)
+
+
+class TestPerfStats:
+    @pytest.fixture(autouse=True)
+    def set_up(self, component):
+        self.perf_stats = PerfStats()
+
+    def test_call_stats(self):
+        stats = CallStats()
+        stats.add(0.5)
+        stats.add(0.25)
+        stats.add(0.00005)
+        assert stats.to_dict() == {
+            'calls': 3,
+            'total_time': 0.75005,
+            'max_time': 0.5,
+            'histogram': [1, 0, 0, 0, 2, 0],
+        }
+
+    def test_wrap_disabled(self):
+        func = self.perf_stats.wrap(CATEGORY_LOOPING_CALL, lambda x: x * 2, 'double')
+        assert func(2) == 4
+        assert self.perf_stats.get_stats()['stats'][CATEGORY_LOOPING_CALL] == {}
+
+    def test_wrap_enabled(self):
+        def fail():
+            raise ValueError
+
+        double = self.perf_stats.wrap(CATEGORY_LOOPING_CALL, lambda x: x * 2, 'double')
+        fail = self.perf_stats.wrap(CATEGORY_LOOPING_CALL, fail)
+        self.perf_stats.set_enabled(True)
+        assert double(2) == 4
+        assert double(3) == 6
+        with pytest.raises(ValueError):
+            fail()
+
+        stats = self.perf_stats.get_stats()
+        assert stats['enabled']
+        assert stats['enabled_time']
+        looping_calls = stats['stats'][CATEGORY_LOOPING_CALL]
+        assert looping_calls['double']['calls'] == 2
+        fail_name = 'TestPerfStats.test_wrap_enabled.<locals>.fail'
+        assert looping_calls[fail_name]['calls'] == 1
+
+        self.perf_stats.set_enabled(False)
+        double(4)
+        looping_calls = self.perf_stats.get_stats()['stats'][CATEGORY_LOOPING_CALL]
+        assert looping_calls['double']['calls'] == 2
+
+    def test_reset(self):
+        self.perf_stats.set_enabled(True)
+        self.perf_stats.record(CATEGORY_RPC, 'core.get_config', 0.1)
+        assert self.perf_stats.get_stats([CATEGORY_RPC]) == {
+            'enabled': True,
+            'enabled_time': self.perf_stats.get_stats()['enabled_time'],
+            'latency_buckets': list(LATENCY_BUCKETS),
+            'stats': {
+                CATEGORY_RPC: {
+                    'core.get_config': {
+                        'calls': 1,
+                        'total_time': 0.1,
+                        'max_time': 0.1,
+                        'histogram': [0, 0, 0, 1, 0, 0],
+                    }
+                }
+            },
+        }
+        self.perf_stats.reset()
+        assert self.perf_stats.get_stats([CATEGORY_RPC])['stats'] == {CATEGORY_RPC: {}}
@@ -6,12 +6,15 @@
 # See LICENSE for more details.
 #
 
+from twisted.internet import task
+
 import deluge.component as component
 import deluge.error
 from deluge.common import get_localhost_auth
 from deluge.conftest import BaseTestCase
 from deluge.core import rpcserver
 from deluge.core.authmanager import AuthManager
+from deluge.core.perfstats import PerfStats
 from deluge.core.rpcserver import DelugeRPCProtocol, RPCServer
 from deluge.log import setup_logger
 
@@ -59,6 +62,99 @@ def test_emit_event_for_session_id(self):
         assert msg[1] == 'TorrentFolderRenamedEvent', str(msg)
         assert msg[2] == data, str(msg)
 
+    def test_emit_event_batch(self):
+        from deluge.event import TorrentFolderRenamedEvent, TorrentStateChangedEvent
+
+        clock = task.Clock()
+        self.patch(rpcserver, 'reactor', clock)
+        self.protocol.event_batch = True
+        self.factory.interested_events[self.session_id].append(
+            'TorrentStateChangedEvent'
+        )
+        self.protocol.messages.clear()
+
+        self.rpcserver.emit_event(TorrentStateChangedEvent('1', 'Checking'))
+        self.rpcserver.emit_event(TorrentStateChangedEvent('2', 'Paused'))
+        self.rpcserver.emit_event(TorrentFolderRenamedEvent('1', 'old', 'new'))
+        self.rpcserver.emit_event(TorrentStateChangedEvent('1', 'Seeding'))
+        assert not self.protocol.messages
+
+        clock.advance(self.rpcserver.event_batch_window)
+        msg = self.protocol.messages.pop()
+        assert msg[0] == rpcserver.RPC_EVENT, str(msg)
+        assert msg[1] is None, str(msg)
+        assert msg[2] == [
+            ('TorrentStateChangedEvent', ['2', 'Paused']),
+            ('TorrentFolderRenamedEvent', ['1', 'old', 'new']),
+            ('TorrentStateChangedEvent', ['1', 'Seeding']),
+        ]
+        assert not self.protocol.messages
+
+        # Batched events are sent before a response.
+        self.rpcserver.emit_event(TorrentStateChangedEvent('2', 'Seeding'))
+        self.protocol.dispatch(self.request_id, 'daemon.info', [], {})
+        event_msg, response_msg = self.protocol.messages
+        assert event_msg == (
+            rpcserver.RPC_EVENT,
+            'TorrentStateChangedEvent',
+            ['2', 'Seeding'],
+        )
+        assert response_msg[0] == rpcserver.RPC_RESPONSE
+
+    def test_emit_states_event_split(self):
+        from deluge.event import TorrentStatesChangedEvent
+
+        self.factory.interested_events[self.session_id].append(
+            'TorrentStateChangedEvent'
+        )
+        self.protocol.messages.clear()
+
+        self.rpcserver.emit_event(
+            TorrentStatesChangedEvent({'1': 'Paused', '2': 'Queued'})
+        )
+        assert list(self.protocol.messages) == [
+            (rpcserver.RPC_EVENT, 'TorrentStateChangedEvent', ['1', 'Paused']),
+            (rpcserver.RPC_EVENT, 'TorrentStateChangedEvent', ['2', 'Queued']),
+        ]
+
+        self.protocol.messages.clear()
+        self.factory.interested_events[self.session_id].append(
+            'TorrentStatesChangedEvent'
+        )
+        self.rpcserver.emit_event(TorrentStatesChangedEvent({'1': 'Seeding'}))
+        assert list(self.protocol.messages) == [
+            (rpcserver.RPC_EVENT, 'TorrentStatesChangedEvent', [{'1': 'Seeding'}]),
+        ]
+
+    def test_emit_states_event_batch(self):
+        from deluge.event import TorrentStateChangedEvent, TorrentStatesChangedEvent
+
+        clock = task.Clock()
+        self.patch(rpcserver, 'reactor', clock)
+        self.protocol.event_batch = True
+        self.factory.interested_events[self.session_id].extend(
+            ['TorrentStateChangedEvent', 'TorrentStatesChangedEvent']
+        )
+        self.protocol.messages.clear()
+
+        states = {'2': 'Paused', '3': 'Paused'}
+        self.rpcserver.emit_event(TorrentStateChangedEvent('1', 'Checking'))
+        self.rpcserver.emit_event(TorrentStateChangedEvent('2', 'Checking'))
+        self.rpcserver.emit_event(TorrentStatesChangedEvent(states))
+        self.rpcserver.emit_event(
+            TorrentStatesChangedEvent({'3': 'Queued', '4': 'Queued'})
+        )
+        self.rpcserver.emit_event(TorrentStateChangedEvent('4', 'Seeding'))
+        clock.advance(self.rpcserver.event_batch_window)
+        msg = self.protocol.messages.pop()
+        assert msg[2] == [
+            ('TorrentStateChangedEvent', ['1', 'Checking']),
+            ('TorrentStatesChangedEvent', [{'2': 'Paused', '3': 'Queued'}]),
+            ('TorrentStateChangedEvent', ['4', 'Seeding']),
+        ]
+        # The emitted event is not changed.
+        assert states == {'2': 'Paused', '3': 'Paused'}
+
     def test_invalid_client_login(self):
         self.protocol.dispatch(self.request_id, 'daemon.login', [1], {})
         msg = self.protocol.messages.pop()
@@ -106,3 +202,43 @@ def test_daemon_info(self):
         assert msg[0] == rpcserver.RPC_RESPONSE, str(msg)
         assert msg[1] == self.request_id, str(msg)
         assert msg[2] == deluge.common.get_version(), str(msg)
+        assert self.protocol.get_transfer_codec() is None
+
+    def test_daemon_info_codecs(self):
+        self.protocol.dispatch(
+            self.request_id,
+            'daemon.info',
+            [],
+            {'codecs': ['unknown', 'zlib', 'none'], 'compress_level': 1},
+        )
+        msg = self.protocol.messages.pop()
+        assert msg[0] == rpcserver.RPC_RESPONSE, str(msg)
+        version, codecs = msg[2]
+        assert version == deluge.common.get_version()
+        assert 'zlib' in codecs
+        assert 'none' in codecs
+        assert self.protocol.get_transfer_codec() == 'zlib'
+
+    def test_dispatch_perf_stats(self):
+        class Exported:
+            @rpcserver.export
+            def echo(self, value):
+                return value
+
+        perf_stats = PerfStats()
+        self.factory.perf_stats = perf_stats
+        self.rpcserver.register_object(Exported(), 'test')
+        self.authmanager = AuthManager()
+        auth = get_localhost_auth()
+        self.protocol.dispatch(
+            self.request_id, 'daemon.login', auth, {'client_version': 'Test'}
+        )
+        self.protocol.dispatch(self.request_id, 'test.echo', [1], {})
+        assert self.protocol.messages.pop()[2] == 1
+        assert perf_stats.get_stats()['stats']['rpc'] == {}
+
+        perf_stats.set_enabled(True)
+        self.protocol.dispatch(self.request_id, 'test.echo', [2], {})
+        self.protocol.dispatch(self.request_id, 'test.echo', [], {})
+        assert self.protocol.messages.pop()[0] == rpcserver.RPC_ERROR
+        assert perf_stats.get_stats()['stats']['rpc']['test.echo']['calls'] == 2
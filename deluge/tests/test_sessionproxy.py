@@ -5,6 +5,8 @@
 # the additional special exception to link portions of this program with the OpenSSL library.
 # See LICENSE for more details.
 #
+from unittest import mock
+
 from twisted.internet.defer import maybeDeferred, succeed
 from twisted.internet.task import Clock
 
@@ -152,3 +154,91 @@ async def test_get_torrents_status_key_not_updated(self):
         client.core.torrents['a']['key2'] = 99
         result = await self.sp.get_torrents_status({'id': ['a']}, ['key2'])
         assert result == {'a': {'key2': 99}}
+
+    async def test_get_torrents_status_local_filter(self):
+        client.core.torrents['a']['state'] = 'Seeding'
+        client.core.torrents['b']['state'] = 'Paused'
+        client.core.torrents['c']['state'] = 'Seeding'
+        client.core.prev_status = {}
+        self.clock.advance(self.sp.cache_time + 0.1)
+        with mock.patch.object(
+            client.core, 'get_torrents_status', wraps=client.core.get_torrents_status
+        ) as get_torrents_status:
+            result = await self.sp.get_torrents_status({'state': 'Seeding'}, ['key1'])
+            assert result == {'a': {'key1': 1}, 'c': {'key1': 1}}
+            # The expired keys of all the torrents are fetched in one call
+            assert get_torrents_status.call_count == 1
+            assert sorted(get_torrents_status.call_args[0][1]) == ['key1', 'state']
+
+            # The filter is evaluated from the cache while the keys are cached
+            self.sp.on_torrent_state_changed('b', 'Seeding')
+            result = await self.sp.get_torrents_status(
+                {'state': ['Seeding'], 'id': ['a', 'b']}, ['key1']
+            )
+            assert result == {'a': {'key1': 1}, 'b': {'key1': 1}}
+            assert get_torrents_status.call_count == 1
+
+    async def test_get_torrents_status_expired_keys(self):
+        await self.sp.get_torrents_status({}, ['key1', 'key2'])
+        self.clock.advance(1)
+        client.core.torrents['a']['key3'] = 99
+        with mock.patch.object(
+            client.core, 'get_torrents_status', wraps=client.core.get_torrents_status
+        ) as get_torrents_status:
+            # Only the keys not in the cache are fetched
+            result = await self.sp.get_torrents_status({}, ['key2', 'key3'])
+            assert get_torrents_status.call_count == 1
+            assert get_torrents_status.call_args[0][1:] == (['key3'], True)
+            assert result['a'] == {'key2': 2, 'key3': 99}
+
+    async def test_get_torrents_changes(self):
+        changes = await self.sp.get_torrents_changes({}, ['key1'])
+        assert changes['full']
+        assert changes['torrents'] == {t: {'key1': 1} for t in 'abc'}
+        revision = changes['revision']
+
+        self.clock.advance(self.sp.cache_time + 0.1)
+        changes = await self.sp.get_torrents_changes({}, ['key1'], revision)
+        assert not changes['full']
+        assert changes['torrents'] == {}
+        assert changes['removed'] == []
+        assert changes['revision'] == revision
+
+        client.core.torrents['b']['key1'] = 5
+        self.clock.advance(self.sp.cache_time + 0.1)
+        self.sp.on_torrent_removed('c')
+        changes = await self.sp.get_torrents_changes({}, ['key1'], revision)
+        assert not changes['full']
+        assert changes['torrents'] == {'b': {'key1': 5}}
+        assert changes['removed'] == ['c']
+        assert changes['revision'] > revision
+
+        # An unknown revision returns all the torrents.
+        changes = await self.sp.get_torrents_changes({}, ['key1'], revision + 100)
+        assert changes['full']
+        assert sorted(changes['torrents']) == ['a', 'b']
+
+    async def test_get_torrents_changes_filter(self):
+        client.core.torrents['a']['state'] = 'Seeding'
+        client.core.torrents['b']['state'] = 'Seeding'
+        client.core.prev_status = {}
+        self.clock.advance(self.sp.cache_time + 0.1)
+        filter_dict = {'state': 'Seeding'}
+        changes = await self.sp.get_torrents_changes(filter_dict, ['key1'])
+        assert sorted(changes['torrents']) == ['a', 'b']
+
+        # A changed torrent that no longer matches the filter is removed.
+        self.sp.on_torrent_state_changed('b', 'Paused')
+        changes = await self.sp.get_torrents_changes(
+            filter_dict, ['key1'], changes['revision']
+        )
+        assert changes['torrents'] == {}
+        assert changes['removed'] == ['b']
+
+    def test_removed_revisions_limit(self):
+        self.patch(deluge.ui.sessionproxy, 'MAX_REMOVED_REVISIONS', 2)
+        revision = self.sp.revision
+        for torrent_id in 'abc':
+            self.sp.on_torrent_removed(torrent_id)
+        assert list(self.sp.removed_revisions) == ['b', 'c']
+        assert self.sp.min_revision == revision + 1
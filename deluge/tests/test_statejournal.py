@@ -0,0 +1,128 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+import os
+
+from deluge.core import statejournal
+from deluge.core.statejournal import ResumeDataJournal, StateJournal
+
+
+class TestStateJournal:
+    def make_journal(self, tmp_path):
+        self.filepath = str(tmp_path / 'test.journal')
+        return StateJournal(self.filepath)
+
+    def test_write_load(self, tmp_path):
+        journal = self.make_journal(tmp_path)
+        assert not journal.exists()
+        assert journal.write({'a': 1, 'b': 2})
+        assert journal.write({'a': 3, 'b': None, 'c': 4})
+        assert journal.entries == {'a': 3, 'c': 4}
+
+        assert StateJournal(self.filepath).load() == {'a': 3, 'c': 4}
+
+    def test_load_damaged_tail(self, tmp_path):
+        journal = self.make_journal(tmp_path)
+        journal.write({'a': 1})
+        size = os.path.getsize(self.filepath)
+        journal.write({'b': 2})
+        with open(self.filepath, 'r+b') as _file:
+            _file.truncate(os.path.getsize(self.filepath) - 1)
+
+        journal = StateJournal(self.filepath)
+        assert journal.load() == {'a': 1}
+        assert os.path.getsize(self.filepath) == size
+
+        # New records are appended after the last valid record.
+        journal.write({'c': 3})
+        assert StateJournal(self.filepath).load() == {'a': 1, 'c': 3}
+
+    def test_load_damaged_record(self, tmp_path):
+        journal = self.make_journal(tmp_path)
+        journal.write({'a': 1})
+        offset = os.path.getsize(self.filepath)
+        journal.write({'b': 2})
+        journal.write({'c': 3})
+        with open(self.filepath, 'r+b') as _file:
+            _file.seek(offset + statejournal.RECORD_HEADER_SIZE)
+            _file.write(b'X')
+        with open(self.filepath, 'rb') as _file:
+            damaged_data = _file.read()
+
+        # The records after the damaged record are kept.
+        journal = StateJournal(self.filepath)
+        assert journal.load() == {'a': 1, 'c': 3}
+        with open(self.filepath + '.bak', 'rb') as _file:
+            assert _file.read() == damaged_data
+
+        journal.write({'d': 4})
+        assert StateJournal(self.filepath).load() == {'a': 1, 'c': 3, 'd': 4}
+
+    def test_compact(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(statejournal, 'COMPACT_MIN_RECORDS', 4)
+        journal = self.make_journal(tmp_path)
+        journal.write({'a': 1, 'b': 2})
+        size = os.path.getsize(self.filepath)
+        for value in range(2):
+            journal.write({'a': value})
+        assert os.path.getsize(self.filepath) > size
+
+        journal.write({'a': 1})
+        assert os.path.getsize(self.filepath) == size
+        assert StateJournal(self.filepath).load() == {'a': 1, 'b': 2}
+
+
+class TestResumeDataJournal:
+    def test_write_get(self, tmp_path):
+        filepath = str(tmp_path / 'test.journal')
+        journal = ResumeDataJournal(filepath)
+        assert journal.write({'a': b'data-a', 'b': b'data-b'})
+        assert journal.write({'a': b'data-a2', 'b': None})
+        assert journal.get('a') == b'data-a2'
+        assert journal.get('b') is None
+
+        journal = ResumeDataJournal(filepath)
+        assert set(journal.load()) == {'a'}
+        assert 'a' in journal
+        assert journal.get('a') == b'data-a2'
+        journal.close()
+
+    def test_load_incomplete_tail(self, tmp_path):
+        filepath = str(tmp_path / 'test.journal')
+        journal = ResumeDataJournal(filepath)
+        journal.write({'a': b'data-a'})
+        journal.write({'b': b'data-b'})
+        with open(filepath, 'r+b') as _file:
+            _file.truncate(os.path.getsize(filepath) - 1)
+
+        journal = ResumeDataJournal(filepath)
+        assert set(journal.load()) == {'a'}
+        journal.write({'c': b'data-c'})
+        assert journal.get('c') == b'data-c'
+        assert set(ResumeDataJournal(filepath).load()) == {'a', 'c'}
+
+    def test_get_damaged(self, tmp_path):
+        filepath = str(tmp_path / 'test.journal')
+        journal = ResumeDataJournal(filepath)
+        journal.write({'a': b'data-a'})
+        with open(filepath, 'r+b') as _file:
+            _file.seek(-1, os.SEEK_END)
+            _file.write(b'b')
+        assert journal.get('a') is None
+
+    def test_compact(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(statejournal, 'COMPACT_MIN_RECORDS', 4)
+        filepath = str(tmp_path / 'test.journal')
+        journal = ResumeDataJournal(filepath)
+        journal.write({'a': b'data-a', 'b': b'data-b'})
+        size = os.path.getsize(filepath)
+        for value in range(3):
+            journal.write({'a': b'data-%d' % value})
+
+        assert os.path.getsize(filepath) == size
+        assert journal.get('a') == b'data-2'
+        assert journal.get('b') == b'data-b'
+        assert set(ResumeDataJournal(filepath).load()) == {'a', 'b'}
@@ -20,6 +20,7 @@
 from deluge.common import VersionSplit, utf8_encode_structure
 from deluge.conftest import BaseTestCase
 from deluge.core.core import Core
+from deluge.core.fileindex import MIXED_PRIORITY
 from deluge.core.rpcserver import RPCServer
 from deluge.core.torrent import Torrent
 from deluge.core.torrentmanager import TorrentManager, TorrentState
@@ -345,6 +346,77 @@ def test_get_eta_downloading(self):
         assert result == 100
         assert isinstance(result, int)
 
+    def test_get_piece_states(self):
+        atp = self.get_torrent_atp('test_torrent.file.torrent')
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {})
+        torrent.status = mock.MagicMock(
+            is_seeding=False, pieces=[True, False, False, False, True]
+        )
+        torrent.handle = mock.MagicMock()
+        torrent.handle.piece_availability.return_value = [1, 2, 0, 0, 0]
+        torrent.handle.get_peer_info.return_value = [
+            mock.Mock(downloading_piece_index=3),
+            mock.Mock(downloading_piece_index=-1),
+        ]
+        assert torrent.get_piece_states() == bytearray([3, 1, 0, 2, 3])
+        assert torrent.get_status(['pieces', 'pieces_runs']) == {
+            'pieces': [3, 1, 0, 2, 3],
+            'pieces_runs': [3 << 6, 1 << 6, 0, 2 << 6, 3 << 6],
+        }
+
+        torrent.status.is_seeding = True
+        assert torrent.get_status(['pieces', 'pieces_runs']) == {
+            'pieces': None,
+            'pieces_runs': None,
+        }
+
+    def test_get_file_progress_delta(self):
+        atp = self.get_torrent_atp('dir_with_6_files.torrent')
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {})
+        num_files = len(torrent.get_files())
+        assert torrent.get_files() is torrent.get_files()
+
+        torrent.handle = mock.MagicMock()
+        torrent.handle.file_progress.return_value = [0] * num_files
+        version, progress = torrent.get_file_progress_delta()
+        assert progress == {index: 0.0 for index in range(num_files)}
+        assert torrent.get_file_progress_delta(version) == (version, {})
+
+        file_progress = [0] * num_files
+        file_progress[1] = torrent.get_files()[1]['size']
+        torrent.handle.file_progress.return_value = file_progress
+        assert torrent.get_file_progress_delta(version) == (version + 1, {1: 1.0})
+
+    def test_get_file_tree(self):
+        atp = self.get_torrent_atp('dir_with_6_files.torrent')
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {})
+        files = torrent.get_files()
+        tree = torrent.get_file_tree()
+        assert tree['size'] == sum(_file['size'] for _file in files)
+        assert tree['total'] == 1
+        dirname = tree['children'][0]['path']
+
+        tree = torrent.get_file_tree(dirname, limit=2)
+        assert tree['total'] == len(files)
+        assert [child['index'] for child in tree['children']] == [0, 1]
+        assert tree['progress'] == 0.0
+
+        # The changed file progress and priorities update the tree.
+        file_progress = [0] * len(files)
+        file_progress[1] = files[1]['size']
+        with mock.patch.object(
+            torrent.handle, 'file_progress', return_value=file_progress
+        ):
+            torrent.set_file_priorities([0] + [4] * (len(files) - 1))
+            tree = torrent.get_file_tree(dirname, limit=2)
+        assert tree['progress'] == files[1]['size'] / tree['size']
+        assert tree['priority'] == MIXED_PRIORITY
+        assert [child['progress'] for child in tree['children']] == [0.0, 1.0]
+        assert [child['priority'] for child in tree['children']] == [0, 4]
+
     def test_get_name_unicode(self):
         """Test retrieving a unicode torrent name from libtorrent."""
         atp = self.get_torrent_atp('unicode_file.torrent')
@@ -374,6 +446,28 @@ def test_connect_peer_port(self):
         assert not self.torrent.connect_peer('127.0.0.1', 'text')
         assert self.torrent.connect_peer('127.0.0.1', '1234')
 
+    def test_get_status_diff(self):
+        atp = self.get_torrent_atp('test_torrent.file.torrent')
+        handle = self.session.add_torrent(atp)
+        torrent = Torrent(handle, {})
+        keys = ['name', 'max_connections']
+
+        assert torrent.get_status(keys, diff=True) == {
+            'name': 'test_torrent.file',
+            'max_connections': -1,
+        }
+        assert torrent.get_status(keys, diff=True) == {}
+
+        torrent.set_max_connections(10)
+        assert torrent.get_status(keys, diff=True) == {'max_connections': 10}
+        assert torrent.get_status(keys, diff=True) == {}
+        # Keys not sent in the previous diff are always included.
+        assert torrent.get_status(['max_connections', 'owner'], diff=True) == {
+            'owner': ''
+        }
+        assert torrent.get_status(keys, diff=True) == {'name': 'test_torrent.file'}
+        assert torrent.prev_status == {-1: (3, frozenset(keys))}
+
     def test_status_cache(self):
         atp = self.get_torrent_atp('test_torrent.file.torrent')
         handle = self.session.add_torrent(atp)
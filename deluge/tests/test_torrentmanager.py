@@ -6,6 +6,7 @@
 
 import os
 import shutil
+import time
 import warnings
 from base64 import b64encode
 from unittest import mock
@@ -17,9 +18,14 @@
 from deluge import component
 from deluge.bencode import bencode
 from deluge.conftest import BaseTestCase
+from deluge.core import torrentmanager
+from deluge.core.authmanager import AUTH_LEVEL_ADMIN, AUTH_LEVEL_NORMAL
 from deluge.core.core import Core
 from deluge.core.rpcserver import RPCServer
+from deluge.core.statejournal import StateJournal
+from deluge.core.torrentmanager import TorrentState
 from deluge.error import InvalidTorrentError
+from deluge.event import ClientDisconnectedEvent
 
 from . import common
 
@@ -135,6 +141,83 @@ def test_remove_invalid_torrent(self):
         with pytest.raises(InvalidTorrentError):
             self.tm.remove('torrentidthatdoesntexist')
 
+    async def test_subscribe_status(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = await self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        self.tm.clock = self.clock
+        keys = ['name', 'max_download_speed']
+        status = self.core.subscribe_torrents_status({}, keys, max_rate=1)
+        assert set(status[torrent_id]) == set(keys)
+        assert self.tm.status_updates_timer.running
+
+        session = mock.Mock(auth_level=AUTH_LEVEL_ADMIN, username='localclient')
+        session_id = self.rpcserver.get_session_id()
+        with mock.patch.dict(
+            self.rpcserver.factory.authorized_sessions, {session_id: session}
+        ), mock.patch.object(self.rpcserver, 'emit_event_for_session_id') as emit:
+            # Nothing changed since the subscription started.
+            self.tm.queue_status_push([torrent_id])
+            assert not emit.called
+
+            self.tm[torrent_id].set_max_download_speed(5)
+            self.tm.queue_status_push([torrent_id])
+            # Rate limited until the subscription interval has passed.
+            assert not emit.called
+            self.clock.advance(1)
+            event = emit.call_args[0][1]
+            assert event.args == [{torrent_id: {'max_download_speed': 5}}]
+
+        self.core.unsubscribe_torrents_status()
+        assert not self.tm.status_subscriptions
+        assert not self.tm.status_updates_timer.running
+
+    async def test_subscribe_status_polled_diffs(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = await self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        keys = ['max_download_speed']
+        session_id = self.rpcserver.get_session_id()
+        status, _ = self.tm.build_torrents_status([torrent_id], keys, diff=True)
+        assert status == {torrent_id: {'max_download_speed': -1}}
+        self.core.subscribe_torrents_status({}, keys)
+
+        session = mock.Mock(auth_level=AUTH_LEVEL_ADMIN, username='localclient')
+        with mock.patch.dict(
+            self.rpcserver.factory.authorized_sessions, {session_id: session}
+        ), mock.patch.object(self.rpcserver, 'emit_event_for_session_id') as emit:
+            self.tm[torrent_id].set_max_download_speed(5)
+            self.tm.queue_status_push([torrent_id])
+            event = emit.call_args[0][1]
+            assert event.args == [{torrent_id: {'max_download_speed': 5}}]
+
+        # The pushed changes are still in the polled diff of the session.
+        status, _ = self.tm.build_torrents_status([torrent_id], keys, diff=True)
+        assert status == {torrent_id: {'max_download_speed': 5}}
+        self.core.unsubscribe_torrents_status()
+        assert all(
+            (session_id, 'push') not in torrent.prev_status
+            for torrent in self.tm.torrents.values()
+        )
+
+    def test_subscribe_status_unknown_id(self):
+        status = self.core.subscribe_torrents_status({'id': ['unknown']}, ['name'])
+        assert status == {}
+        self.core.unsubscribe_torrents_status()
+
+    def test_subscribe_status_client_disconnected(self):
+        self.tm.subscribe_status(1, {}, ['name'])
+        assert self.tm.status_updates_timer.running
+        self.core.eventmanager.emit(ClientDisconnectedEvent(1))
+        assert not self.tm.status_subscriptions
+        assert not self.tm.status_updates_timer.running
+
     def test_open_state(self):
         """Open a state with a UTF-8 encoded torrent filename."""
         shutil.copy(
@@ -144,3 +227,347 @@ def test_open_state(self):
 
         state = self.tm.open_state()
         assert len(state.torrents) == 1
+
+    async def test_save_state_changed_torrents(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = await self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        # Wait for the state save started by adding the torrent.
+        while self.tm.is_saving_state:
+            await task.deferLater(reactor, 0.01)
+        await self.tm.save_state()
+        torrent_state = self.tm.create_torrent_state(self.tm[torrent_id])
+        assert self.tm.state_journal.entries[torrent_id] == torrent_state
+
+        # Only the changed torrent states are serialized and appended.
+        with mock.patch.object(
+            self.tm, 'create_torrent_state', wraps=self.tm.create_torrent_state
+        ) as create_torrent_state, mock.patch.object(
+            self.tm.state_journal, 'write', wraps=self.tm.state_journal.write
+        ) as write:
+            assert self.tm._save_state({}, set(), [])
+            assert not create_torrent_state.called
+            assert not write.called
+
+            self.tm[torrent_id].set_options({'max_download_speed': 5})
+            assert torrent_id in self.tm.torrent_state_changed
+            await self.tm.save_state()
+            assert create_torrent_state.call_count == 1
+            assert self.tm.state_journal.entries[torrent_id].max_download_speed == 5
+
+            self.tm.remove(torrent_id, save_state=False)
+            await self.tm.save_state()
+            write.assert_called_with({torrent_id: None})
+        assert self.tm.open_state().torrents == []
+
+    async def test_save_resume_data_file_changes(self):
+        self.tm.resume_data = {'a': b'resume-a', 'b': b'resume-b'}
+        self.tm.resume_data_changed = {'a', 'b', 'c'}
+        assert await self.tm.save_resume_data_file()
+        assert not self.tm.resume_data_changed
+        assert set(self.tm.resume_data_journal.load()) == {'a', 'b'}
+        assert self.tm.resume_data_journal.get('a') == b'resume-a'
+
+        # Only the changed resume data is written.
+        self.tm.resume_data['a'] = b'resume-a2'
+        self.tm.resume_data_changed = {'a'}
+        with mock.patch.object(
+            self.tm.resume_data_journal, 'write', return_value=True
+        ) as write:
+            assert await self.tm.save_resume_data_file()
+        write.assert_called_once_with({'a': b'resume-a2'})
+
+    def create_state_torrents(self, count):
+        """Create a session state of synthetic torrents in the state dir."""
+        from deluge._libtorrent import lt
+
+        torrent_states = {}
+        for index in range(count):
+            filedump = bencode(
+                {
+                    b'info': {
+                        b'name': b'torrent%d' % index,
+                        b'piece length': 16384,
+                        b'length': 16384,
+                        b'pieces': b'\x01' * 20,
+                    }
+                }
+            )
+            torrent_id = str(lt.torrent_info(lt.bdecode(filedump)).info_hash())
+            filepath = os.path.join(self.tm.state_dir, torrent_id + '.torrent')
+            with open(filepath, 'wb') as _file:
+                _file.write(filedump)
+            torrent_states[torrent_id] = TorrentState(
+                torrent_id=torrent_id,
+                paused=True,
+                save_path=str(self.config_dir),
+                queue=index,
+                file_priorities=[1],
+            )
+        self.tm.state_journal.write(torrent_states)
+        return torrent_states
+
+    async def test_load_state_batches(self):
+        torrent_states = self.create_state_torrents(3)
+        events = []
+        event_manager = component.get('EventManager')
+        for event in (
+            'SessionReadyEvent',
+            'SessionLoadingProgressEvent',
+            'SessionStartedEvent',
+        ):
+            event_manager.register_event_handler(
+                event, lambda *args, event=event: events.append((event, args))
+            )
+
+        with mock.patch.object(torrentmanager, 'LOAD_STATE_BATCH_SIZE', 2):
+            await self.tm.load_state()
+
+        assert set(self.tm.get_torrent_list()) == set(torrent_states)
+        assert events == [
+            ('SessionLoadingProgressEvent', (2, 3)),
+            ('SessionReadyEvent', ()),
+            ('SessionLoadingProgressEvent', (3, 3)),
+            ('SessionStartedEvent', ()),
+        ]
+
+    async def test_load_state_stopped(self):
+        torrent_states = self.create_state_torrents(3)
+        events = []
+        event_manager = component.get('EventManager')
+        event_manager.register_event_handler(
+            'SessionStartedEvent', lambda: events.append('SessionStartedEvent')
+        )
+
+        def on_session_ready():
+            self.tm._stop_loading_state = True
+
+        event_manager.register_event_handler('SessionReadyEvent', on_session_ready)
+        with mock.patch.object(torrentmanager, 'LOAD_STATE_BATCH_SIZE', 1):
+            await self.tm.load_state()
+
+        assert len(self.tm.get_torrent_list()) == 1
+        assert not events
+        # The torrents not loaded are kept in the journal.
+        while self.tm.is_saving_state:
+            await task.deferLater(reactor, 0.01)
+        await self.tm.save_state()
+        journal = StateJournal(self.tm.state_journal.filepath)
+        assert set(journal.load()) == set(torrent_states)
+
+    async def test_load_state_failed(self):
+        events = []
+        component.get('EventManager').register_event_handler(
+            'SessionStartedEvent', lambda: events.append('SessionStartedEvent')
+        )
+        with mock.patch.object(self.tm, 'fixup_state', side_effect=ValueError):
+            d = self.tm.load_state()
+            d.addErrback(self.tm._on_load_state_failed)
+            await d
+        assert events == ['SessionStartedEvent']
+
+    async def test_save_state_while_loading(self):
+        torrent_states = self.create_state_torrents(3)
+        # A torrent that fails to load is removed from the journal.
+        bad_state = TorrentState(
+            torrent_id='0' * 40, save_path=str(self.config_dir), queue=3
+        )
+        self.tm.state_journal.write({bad_state.torrent_id: bad_state})
+        saved = []
+
+        def on_session_ready():
+            d = self.tm.save_state()
+            d.addCallback(
+                lambda _: saved.append(
+                    StateJournal(self.tm.state_journal.filepath).load()
+                )
+            )
+            saved.append(d)
+
+        component.get('EventManager').register_event_handler(
+            'SessionReadyEvent', on_session_ready
+        )
+        with mock.patch.object(torrentmanager, 'LOAD_STATE_BATCH_SIZE', 1):
+            await self.tm.load_state()
+        await saved[0]
+
+        # The save after the first batch kept the torrents not yet loaded.
+        assert set(saved[1]) == set(torrent_states) | {bad_state.torrent_id}
+        while self.tm.is_saving_state:
+            await task.deferLater(reactor, 0.01)
+        await self.tm.save_state()
+        journal = StateJournal(self.tm.state_journal.filepath)
+        assert set(journal.load()) == set(torrent_states)
+
+    @pytest.mark.slow
+    async def test_load_state_benchmark(self):
+        """Time loading a session state of synthetic torrents."""
+        torrent_states = self.create_state_torrents(2000)
+        start = time.perf_counter()
+        await self.tm.load_state()
+        print(
+            f'\nLoaded {len(torrent_states)} torrents in '
+            f'{time.perf_counter() - start:.2f}s'
+        )
+        assert len(self.tm.get_torrent_list()) == len(torrent_states)
+
+    @pytest_twisted.inlineCallbacks
+    def test_owner_index(self):
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = _file.read()
+        torrent_id = yield self.core.add_torrent_file_async(
+            filename, b64encode(filedump), {}
+        )
+        assert self.tm.owner_index == {'localclient': {torrent_id}}
+        assert not self.tm.shared_torrents
+
+        torrent = self.tm[torrent_id]
+        torrent.set_options({'owner': 'user1', 'shared': True})
+        assert self.tm.owner_index == {'user1': {torrent_id}}
+        assert self.tm.shared_torrents == {torrent_id}
+
+        with mock.patch.object(
+            self.rpcserver, 'get_session_auth_level', return_value=AUTH_LEVEL_NORMAL
+        ), mock.patch.object(self.rpcserver, 'get_session_user', return_value='user2'):
+            assert self.tm.get_torrent_list() == [torrent_id]
+            torrent.set_shared(False)
+            assert self.tm.get_torrent_list() == []
+        assert self.tm.get_user_torrent_list(AUTH_LEVEL_NORMAL, 'user1') == [torrent_id]
+        assert self.tm.get_user_torrent_list(AUTH_LEVEL_NORMAL, 'user2') == []
+
+        self.tm.remove(torrent_id)
+        assert not self.tm.owner_index
+        assert not self.tm.shared_torrents
+
+    def test_batch_state_changes(self):
+        with mock.patch.object(self.core.eventmanager, 'emit') as emit:
+            with self.tm.batch_state_changes():
+                self.tm.emit_state_changed('a', 'Checking')
+                with self.tm.batch_state_changes():
+                    self.tm.emit_state_changed('b', 'Paused')
+                self.tm.emit_state_changed('a', 'Paused')
+                assert not emit.called
+            with self.tm.batch_state_changes():
+                self.tm.emit_state_changed('c', 'Queued')
+
+        events = [call.args[0] for call in emit.call_args_list]
+        assert [(event.name, event.args) for event in events] == [
+            ('TorrentStatesChangedEvent', [{'a': 'Paused', 'b': 'Paused'}]),
+            ('TorrentStateChangedEvent', ['c', 'Queued']),
+        ]
+
+    def test_states_changed_event_handlers(self):
+        class Listener:
+            def __init__(self):
+                self.calls = []
+
+            def on_state_changed(self, torrent_id, state):
+                self.calls.append((torrent_id, state))
+
+            def on_states_changed(self, torrent_states):
+                self.calls.append(torrent_states)
+
+        eventmanager = self.core.eventmanager
+        single = Listener()
+        both = Listener()
+        eventmanager.register_event_handler(
+            'TorrentStateChangedEvent', single.on_state_changed
+        )
+        eventmanager.register_event_handler(
+            'TorrentStateChangedEvent', both.on_state_changed
+        )
+        eventmanager.register_event_handler(
+            'TorrentStatesChangedEvent', both.on_states_changed
+        )
+        try:
+            with self.tm.batch_state_changes():
+                self.tm.emit_state_changed('a', 'Paused')
+                self.tm.emit_state_changed('b', 'Queued')
+        finally:
+            eventmanager.deregister_event_handler(
+                'TorrentStateChangedEvent', single.on_state_changed
+            )
+            eventmanager.deregister_event_handler(
+                'TorrentStateChangedEvent', both.on_state_changed
+            )
+            eventmanager.deregister_event_handler(
+                'TorrentStatesChangedEvent', both.on_states_changed
+            )
+
+        assert single.calls == [('a', 'Paused'), ('b', 'Queued')]
+        assert both.calls == [{'a': 'Paused', 'b': 'Queued'}]
+
+    def test_schedule_save_state(self):
+        self.tm.clock = self.clock
+        with mock.patch.object(self.tm, 'save_state') as save_state:
+            self.tm.schedule_save_state()
+            self.tm.schedule_save_state()
+            assert not save_state.called
+            self.clock.advance(0)
+            save_state.assert_called_once_with()
+
+    @pytest.mark.slow
+    def test_get_torrent_list_benchmark(self):
+        """Time the torrent lists of many accounts on a multi-user daemon."""
+        authmanager = component.get('AuthManager')
+        usernames = [f'user{index}' for index in range(100)]
+        for username in usernames:
+            authmanager.create_account(username, 'password', 'NORMAL')
+
+        torrents = {}
+        for index in range(50000):
+            torrent = mock.Mock(
+                torrent_id=f'{index:040x}',
+                options={'owner': usernames[index % 100], 'shared': index % 999 == 0},
+            )
+            torrent.get_status = lambda keys, options=torrent.options: {
+                key: options[key] for key in keys
+            }
+            torrents[torrent.torrent_id] = torrent
+        self.tm.torrents.update(torrents)
+        try:
+            for torrent in torrents.values():
+                self.tm.update_owner_index(torrent)
+
+            timings = {}
+            torrent_lists = {}
+            for method in ('scan', 'index'):
+                start = time.perf_counter()
+                for username in usernames:
+                    with mock.patch.object(
+                        self.rpcserver,
+                        'get_session_auth_level',
+                        return_value=AUTH_LEVEL_NORMAL,
+                    ), mock.patch.object(
+                        self.rpcserver, 'get_session_user', return_value=username
+                    ):
+                        if method == 'index':
+                            torrent_ids = self.tm.get_torrent_list()
+                        else:
+                            torrent_ids = [
+                                torrent_id
+                                for torrent_id, torrent in self.tm.torrents.items()
+                                if torrent.get_status(['owner', 'shared'])['owner']
+                                == username
+                                or torrent.get_status(['owner', 'shared'])['shared']
+                            ]
+                    torrent_lists[method, username] = set(torrent_ids)
+                timings[method] = time.perf_counter() - start
+
+            for username in usernames:
+                assert (
+                    torrent_lists['index', username] == torrent_lists['scan', username]
+                )
+            print(
+                f'\n{len(usernames)} accounts, {len(torrents)} torrents: '
+                f'scan {timings["scan"]:.3f}s, index {timings["index"]:.3f}s'
+            )
+            assert timings['index'] < timings['scan']
+        finally:
+            for torrent_id in torrents:
+                del self.tm.torrents[torrent_id]
+                self.tm.remove_owner_index(torrent_id)
@@ -0,0 +1,81 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+from deluge.core.torrentstatus import TorrentStatusSnapshot
+
+
+class FakeTorrent:
+    def __init__(self, torrent_id, rate):
+        self.torrent_id = torrent_id
+        self.status = object()
+        self.rate = rate
+        self.calls = 0
+        self.status_funcs = {
+            'hash': lambda: self.torrent_id,
+            'upload_payload_rate': self._get_rate,
+        }
+        self.versioned = []
+
+    def update_status_versions(self, status_dict):
+        self.versioned.append(status_dict)
+
+    def _get_rate(self):
+        self.calls += 1
+        return self.rate
+
+
+class TestTorrentStatusSnapshot:
+    def setup_method(self):
+        self.snapshot = TorrentStatusSnapshot(keys=('hash', 'upload_payload_rate'))
+        self.torrents = [FakeTorrent('a', 10), FakeTorrent('b', 20)]
+
+    def test_get_status(self):
+        self.snapshot.update(self.torrents)
+        status = self.snapshot.get_status(['b', 'a'], ['upload_payload_rate', 'hash'])
+        assert status == {
+            'b': {'upload_payload_rate': 20, 'hash': 'b'},
+            'a': {'upload_payload_rate': 10, 'hash': 'a'},
+        }
+        assert self.snapshot.get_status(['a'], []) == {'a': {}}
+
+    def test_split_keys(self):
+        assert self.snapshot.split_keys(['hash', 'name', 'upload_payload_rate']) == (
+            ['hash', 'upload_payload_rate'],
+            ['name'],
+        )
+
+    def test_refresh_only_new_status(self):
+        self.snapshot.refresh(self.torrents)
+        assert [t.calls for t in self.torrents] == [1, 1]
+
+        self.torrents[0].rate = 15
+        self.torrents[1].rate = 25
+        self.snapshot.refresh(self.torrents)
+        assert [t.calls for t in self.torrents] == [1, 1]
+
+        self.torrents[1].status = object()
+        self.snapshot.refresh(self.torrents)
+        assert [t.calls for t in self.torrents] == [1, 2]
+        assert self.torrents[1].versioned[-1] == {
+            'hash': 'b',
+            'upload_payload_rate': 25,
+        }
+        status = self.snapshot.get_status(['a', 'b'], ['upload_payload_rate'])
+        assert status == {
+            'a': {'upload_payload_rate': 10},
+            'b': {'upload_payload_rate': 25},
+        }
+
+    def test_remove_reuses_row(self):
+        self.snapshot.update(self.torrents)
+        row = self.snapshot.rows['a']
+        self.snapshot.remove('a')
+        assert 'a' not in self.snapshot
+        assert len(self.snapshot) == 1
+
+        self.snapshot.update([FakeTorrent('c', 30)])
+        assert self.snapshot.rows['c'] == row
+        assert self.snapshot.get_status(['c'], ['hash']) == {'c': {'hash': 'c'}}
@@ -7,6 +7,8 @@
 # See LICENSE for more details.
 #
 
+import time
+
 import pytest
 
 import deluge.component as component
@@ -222,3 +224,60 @@ def test_add_remove_column_multiple_types(self):
         assert self.torrentview.columns[
             self.default_column_index[-1]
         ].column_indices == [32]
+
+    def create_status(self, torrent_ids, step=0):
+        return {
+            torrent_id: {
+                'name': f'torrent{index}',
+                'state': 'Downloading' if (index + step) % 2 else 'Seeding',
+                'progress': float((index + step) % 100),
+            }
+            for index, torrent_id in enumerate(torrent_ids)
+        }
+
+    def test_update_view_delta(self):
+        torrent_ids = ['%040x' % index for index in range(3)]
+        self.torrentview.add_rows(torrent_ids)
+        self.torrentview.columns_to_update = ['Name', 'Progress']
+        name_column = self.torrentview.columns['Name'].column_indices[1]
+        progress_column = self.torrentview.columns['Progress'].column_indices[0]
+        filter_column = self.torrentview.columns['filter'].column_indices[0]
+
+        self.torrentview._on_get_torrents_status(self.create_status(torrent_ids))
+        row = self.torrentview.rows[torrent_ids[1]]
+        assert self.torrentview.liststore.get_value(row, name_column) == 'torrent1'
+        assert self.torrentview.liststore.get_value(row, progress_column) == 1.0
+
+        # Only the changed cells are set and a missing torrent is hidden.
+        status = self.create_status(torrent_ids[1:], step=2)
+        self.torrentview._on_get_torrents_status(status)
+        assert self.torrentview.liststore.get_value(row, progress_column) == 2.0
+        assert self.torrentview.shown_rows == set(torrent_ids[1:])
+        hidden_row = self.torrentview.rows[torrent_ids[0]]
+        assert not self.torrentview.liststore.get_value(hidden_row, filter_column)
+
+        self.torrentview.remove_row(torrent_ids[1])
+        assert torrent_ids[1] not in self.torrentview.rows
+        assert len(self.torrentview.liststore) == 2
+
+    @pytest.mark.slow
+    def test_update_view_benchmark(self):
+        """Time replaying a stream of synthetic status updates on the view."""
+        torrent_ids = ['%040x' % index for index in range(20000)]
+        self.torrentview.add_rows(torrent_ids)
+        self.torrentview.columns_to_update = ['Name', 'Progress']
+        self.torrentview.update_view(load_new_list=True)
+
+        start = time.perf_counter()
+        for step in range(10):
+            status = self.create_status(torrent_ids, step=step)
+            # Only a small part of the torrents change in most updates.
+            if step % 2:
+                for torrent_id in torrent_ids[100:]:
+                    status[torrent_id] = self.torrentview.prev_status[torrent_id]
+            self.torrentview._on_get_torrents_status(status)
+        print(
+            f'\nReplayed 10 updates of {len(torrent_ids)} torrents in '
+            f'{time.perf_counter() - start:.2f}s'
+        )
+        assert self.torrentview.shown_rows == set(torrent_ids)
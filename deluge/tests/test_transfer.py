@@ -7,12 +7,20 @@
 #
 
 import base64
+import time
+from hashlib import sha1 as sha
 
 import pytest
 import rencode
 
 import deluge.log
-from deluge.transfer import DelugeTransferProtocol
+from deluge.common import decode_piece_runs, encode_piece_runs
+from deluge.transfer import (
+    CODECS,
+    PROTOCOL_VERSION_CODEC,
+    DelugeTransferProtocol,
+    get_codec_names,
+)
 
 deluge.log.setup_logger('none')
 
@@ -353,6 +361,118 @@ def test_receive_middle_of_header(self):
         message2 = self.transfer.get_messages_in().pop(0)
         assert rencode.dumps(self.msg2) == rencode.dumps(message2)
 
+    def test_receive_big_message_in_parts(self):
+        """
+        Receive a message of several megabytes in 64 KiB parts followed by a
+        message with a corrupt body, which is dropped without affecting the next.
+
+        """
+        big_msg = self.create_big_message(20000)
+        self.transfer.transfer_message(big_msg)
+        self.transfer.transfer_message(self.msg1)
+        corrupt = bytearray(base64.b64decode(self.msg1_expected_compressed_base64))
+        corrupt[10:20] = b'\xff' * 10
+        msg_bytes = (
+            self.transfer.get_messages_out_joined()
+            + bytes(corrupt)
+            + base64.b64decode(self.msg2_expected_compressed_base64)
+        )
+
+        for d in self.receive_parts_helper(msg_bytes, 64 * 1024):
+            pass
+
+        assert self.transfer.get_bytes_recv() == len(msg_bytes)
+        assert len(self.transfer.get_messages_in()) == 3
+        message = self.transfer.get_messages_in().pop(0)
+        assert rencode.dumps(big_msg) == rencode.dumps(message)
+        message = self.transfer.get_messages_in().pop(0)
+        assert rencode.dumps(self.msg1) == rencode.dumps(message)
+        message = self.transfer.get_messages_in().pop(0)
+        assert rencode.dumps(self.msg2) == rencode.dumps(message)
+
+    @pytest.mark.parametrize('codec', get_codec_names())
+    def test_transfer_codec(self, codec):
+        """
+        Send messages with a codec, small messages are sent uncompressed.
+
+        """
+        big_msg = self.create_big_message(1000)
+        self.transfer.set_transfer_codec(codec, level=100)
+        assert self.transfer.get_transfer_codec() == codec
+        self.transfer.transfer_message(self.msg1)
+        self.transfer.transfer_message(big_msg)
+
+        small_out, big_out = self.transfer.messages_out
+        assert small_out[:2] == bytes([PROTOCOL_VERSION_CODEC, CODECS['none'].codec_id])
+        assert big_out[:2] == bytes([PROTOCOL_VERSION_CODEC, CODECS[codec].codec_id])
+
+        for d in self.receive_parts_helper(self.transfer.get_messages_out_joined(), 7):
+            pass
+        message1, message2 = self.transfer.get_messages_in()
+        assert rencode.dumps(self.msg1) == rencode.dumps(message1)
+        assert rencode.dumps(big_msg) == rencode.dumps(message2)
+
+    def test_transfer_piece_runs(self):
+        """
+        Send run-length encoded piece states, which are received unchanged.
+
+        """
+        # As bytes these runs are valid UTF-8 and would be received as a str.
+        pieces = bytes([0] * 10 + [1] * 5)
+        runs = encode_piece_runs(pieces)
+        self.transfer.transfer_message((1, 0, {'pieces_runs': runs}))
+        self.transfer.dataReceived(self.transfer.get_messages_out_joined())
+        message = self.transfer.get_messages_in().pop(0)
+        assert list(message[2]['pieces_runs']) == runs
+        assert decode_piece_runs(message[2]['pieces_runs']) == pieces
+
+    def test_receive_unknown_codec(self):
+        self.transfer.dataReceived(bytes([PROTOCOL_VERSION_CODEC, 255, 0, 0, 0, 1]))
+        assert len(self.transfer.get_messages_in()) == 0
+        assert self.transfer._message_length == 0
+
+    @pytest.mark.slow
+    def test_receive_big_messages_benchmark(self):
+        """
+        Receiving a message in 64 KiB parts should scale linearly with its size.
+
+        """
+        timings = []
+        for torrent_count in (20000, 80000):
+            transfer = TransferTestClass()
+            transfer.transfer_message(self.create_big_message(torrent_count))
+            msg_bytes = transfer.get_messages_out_joined()
+            parts = [
+                msg_bytes[i : i + 64 * 1024]
+                for i in range(0, len(msg_bytes), 64 * 1024)
+            ]
+            start = time.perf_counter()
+            for part in parts:
+                transfer.dataReceived(part)
+            timings.append(time.perf_counter() - start)
+            assert len(transfer.get_messages_in()) == 1
+            print(f'\n{len(msg_bytes)} bytes in {len(parts)} parts: {timings[-1]:.4f}s')
+
+        # Four times the data should take nowhere near sixteen times as long.
+        assert timings[1] < timings[0] * 8
+
+    def create_big_message(self, torrent_count):
+        """Create a message like a get_torrents_status response."""
+        return (
+            1,
+            0,
+            {
+                sha(str(torrent_id).encode()).hexdigest(): {
+                    'name': sha(str(-torrent_id).encode()).hexdigest(),
+                    'progress': torrent_id / torrent_count,
+                    'state': 'Seeding',
+                    'total_wanted': torrent_id * 1024,
+                    'tracker_host': 'example.com',
+                }
+                for torrent_id in range(torrent_count)
+            },
+        )
+
     # Needs file containing big data structure e.g. like thetorrent list as it is transfered by the daemon
     # def test_simulate_big_transfer(self):
     #    filename = '../deluge.torrentlist'
@@ -7,16 +7,19 @@
 #
 
 import json
+from base64 import b64encode
 from io import BytesIO
 
 import pytest
 import pytest_twisted
 from twisted.internet import defer, reactor
+from twisted.internet.task import deferLater
 from twisted.web.client import Agent, FileBodyProducer
 from twisted.web.http_headers import Headers
 from twisted.web.static import File
 
 import deluge.component as component
+from deluge.ui.client import client
 
 from . import common
 from .common_web import WebServerTestBase
@@ -169,6 +172,85 @@ def test_get_torrent_files(self):
             }
         }
 
+    @pytest_twisted.inlineCallbacks
+    def test_update_ui_revision(self):
+        web_api = self.deluge_web.web_api
+        yield web_api.connect(self.host_id)
+        keys = ['name', 'state']
+        ui_info = yield web_api.update_ui(keys, {})
+        assert ui_info['full']
+        assert ui_info['torrents'] == {}
+        assert 'state' in ui_info['filters']
+
+        filename = common.get_test_data_file('test.torrent')
+        yield web_api.add_torrents([{'path': filename, 'options': {}}])
+        torrent_id = 'ab570cdd5a17ea1b61e970bb72047de141bce173'
+        # Wait for the TorrentAddedEvent to reach the SessionProxy.
+        while torrent_id not in web_api.sessionproxy.torrents:
+            yield deferLater(reactor, 0.1)
+        ui_info = yield web_api.update_ui(keys, {}, ui_info['revision'])
+        assert not ui_info['full']
+        assert list(ui_info['torrents']) == [torrent_id]
+        assert ui_info['removed'] == []
+        assert 'state' in ui_info['filters']
+
+        ui_info = yield web_api.update_ui(keys, {}, ui_info['revision'])
+        assert not ui_info['full']
+        assert ui_info['torrents'] == {}
+        assert ui_info['filters'] == {}
+
+        # Another query gets all the torrents.
+        full_info = yield web_api.update_ui(['name'], {}, ui_info['revision'])
+        assert full_info['full']
+        assert list(full_info['torrents']) == [torrent_id]
+
+        yield client.core.remove_torrent(torrent_id, True)
+        while torrent_id in web_api.sessionproxy.torrents:
+            yield deferLater(reactor, 0.1)
+        ui_info = yield web_api.update_ui(keys, {}, ui_info['revision'])
+        assert not ui_info['full']
+        assert ui_info['removed'] == [torrent_id]
+
+    @pytest_twisted.inlineCallbacks
+    def test_get_hosts_status(self):
+        web_api = self.deluge_web.web_api
+        statuses = yield web_api.get_hosts_status()
+        assert statuses[0][:2] == (self.host_id, 'Online')
+        proxy = web_api.daemon_pool.proxies[self.host_id]
+
+        # The status probe reuses the pooled connection.
+        status = yield web_api.get_host_status(self.host_id)
+        assert status[:2] == (self.host_id, 'Online')
+        assert web_api.daemon_pool.proxies[self.host_id] is proxy
+
+        statuses = yield web_api.get_hosts_status([self.host_id, 'bad_id'])
+        assert [status[1] for status in statuses] == ['Online', 'Offline']
+
+        yield web_api.connect(self.host_id)
+        status = yield web_api.get_host_status(self.host_id)
+        assert status[:2] == (self.host_id, 'Connected')
+        yield web_api.daemon_pool.disconnect_all()
+        assert not web_api.daemon_pool.proxies
+
+    @pytest_twisted.inlineCallbacks
+    def test_get_hosts_torrents_status(self):
+        web_api = self.deluge_web.web_api
+        filename = common.get_test_data_file('test.torrent')
+        with open(filename, 'rb') as _file:
+            filedump = b64encode(_file.read())
+        torrent_id = yield web_api.daemon_pool.call(
+            self.host_id, 'core.add_torrent_file', filename, filedump, {}
+        )
+
+        result = yield web_api.get_hosts_torrents_status(
+            [self.host_id, 'bad_id'], {}, ['name']
+        )
+        assert result['torrents'] == {
+            torrent_id: {'name': 'azcvsupdater_2.6.2.jar', 'host_id': self.host_id}
+        }
+        assert list(result['errors']) == ['bad_id']
+        yield web_api.daemon_pool.disconnect_all()
+
     @pytest_twisted.inlineCallbacks
     def test_download_torrent_from_url(self):
         filename = 'ubuntu-9.04-desktop-i386.iso.torrent'
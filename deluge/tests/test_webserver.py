@@ -6,7 +6,10 @@
 # See LICENSE for more details.
 #
 
+import gzip
 import json as json_lib
+import re
+import time
 from io import BytesIO
 
 import pytest
@@ -15,6 +18,9 @@
 from twisted.web.client import Agent, FileBodyProducer
 from twisted.web.http_headers import Headers
 
+from deluge.ui.web.json_api import JSON_CHUNK_SIZE
+from deluge.ui.web.server import VERSIONED_MAX_AGE, parse_accept_encoding
+
 from . import common
 from .common import get_test_data_file
 from .common_web import WebServerMockBase, WebServerTestBase
@@ -57,6 +63,37 @@ async def test_get_torrent_info(self):
         assert json['error'] is None
         assert 'torrent_filehash' == json['result']['name']
 
+    @pytest.mark.parametrize('accept_encoding', [b'identity', b'gzip'])
+    async def test_json_batch_large_response(self, accept_encoding):
+        agent = Agent(reactor)
+        self.mock_authentication_ignore(self.deluge_web.auth)
+
+        # Enough calls for the response to be written in several chunks.
+        batch = [
+            {'method': 'system.listMethods', 'params': [], 'id': idx}
+            for idx in range(100)
+        ]
+        headers = {
+            b'Accept-Encoding': [accept_encoding],
+            b'Content-Type': ['application/json'],
+        }
+        url = 'http://127.0.0.1:%s/json' % self.deluge_web.port
+
+        response = await agent.request(
+            b'POST',
+            url.encode(),
+            Headers(headers),
+            FileBodyProducer(BytesIO(json_lib.dumps(batch).encode())),
+        )
+        body = await twisted.web.client.readBody(response)
+        if accept_encoding == b'gzip':
+            body = gzip.decompress(body)
+        assert len(body) > JSON_CHUNK_SIZE
+
+        responses = json_lib.loads(body)
+        assert [response['id'] for response in responses] == list(range(100))
+        assert all(response['error'] is None for response in responses)
+
     @pytest.mark.parametrize('base', ['', '/', 'deluge'])
     async def test_base_with_config(self, base):
         agent = Agent(reactor)
@@ -106,3 +143,75 @@ async def test_base_with_deluge_header(self):
         url = f'{url}/{base}'
         response = await agent.request(b'GET', url.encode(), headers)
         assert response.code == 404
+
+    async def get_index_script_url(self, agent, name):
+        root_url = f'http://127.0.0.1:{self.deluge_web.port}/'
+        response = await agent.request(b'GET', root_url.encode())
+        assert response.headers.getRawHeaders(b'cache-control') == [b'no-cache']
+        body = await twisted.web.client.readBody(response)
+        match = re.search(r'src="/(js/%s\?v=\w+)"' % re.escape(name), body.decode())
+        assert match
+        return root_url + match.group(1)
+
+    async def test_script_cache_headers(self):
+        agent = Agent(reactor)
+        url = await self.get_index_script_url(agent, 'ext-base-debug.js')
+        headers = Headers({b'Accept-Encoding': [b'gzip, deflate']})
+
+        response = await agent.request(b'GET', url.encode(), headers)
+        assert response.code == 200
+        assert response.headers.getRawHeaders(b'content-encoding') == [b'gzip']
+        assert response.headers.getRawHeaders(b'cache-control') == [
+            b'public, max-age=%d, immutable' % VERSIONED_MAX_AGE
+        ]
+        assert response.headers.getRawHeaders(b'last-modified')
+        etag = response.headers.getRawHeaders(b'etag')[0]
+        body = await twisted.web.client.readBody(response)
+        assert b'Ext' in gzip.decompress(body)
+
+        # The uncompressed variant has a different ETag.
+        unversioned_url = url.split('?')[0]
+        response = await agent.request(b'GET', unversioned_url.encode())
+        assert response.headers.getRawHeaders(b'content-encoding') is None
+        assert response.headers.getRawHeaders(b'cache-control') == [b'no-cache']
+        assert response.headers.getRawHeaders(b'etag')[0] != etag
+        await twisted.web.client.readBody(response)
+
+        headers.addRawHeader(b'If-None-Match', etag)
+        response = await agent.request(b'GET', url.encode(), headers)
+        assert response.code == 304
+        assert response.headers.getRawHeaders(b'etag') == [etag]
+
+    async def test_missing_script(self):
+        agent = Agent(reactor)
+        url = f'http://127.0.0.1:{self.deluge_web.port}/js/missing.js'
+        response = await agent.request(b'GET', url.encode())
+        assert response.code == 404
+
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding(None) == set()
+        assert parse_accept_encoding(b'gzip, deflate, br') == {
+            b'gzip',
+            b'deflate',
+            b'br',
+        }
+        assert parse_accept_encoding(b'GZIP;q=0.5, br;q=0, x;q=bad') == {b'gzip'}
+
+    @pytest.mark.slow
+    async def test_index_and_script_benchmark(self):
+        agent = Agent(reactor)
+        root_url = f'http://127.0.0.1:{self.deluge_web.port}/'
+        url = await self.get_index_script_url(agent, 'ext-all-debug.js')
+        headers = Headers({b'Accept-Encoding': [b'gzip']})
+
+        num_requests = 200
+        start = time.perf_counter()
+        for dummy_idx in range(num_requests):
+            for request_url in (root_url, url):
+                response = await agent.request(b'GET', request_url.encode(), headers)
+                await twisted.web.client.readBody(response)
+        elapsed = time.perf_counter() - start
+        print(
+            '\nindex + ext-all-debug.js: %.1f requests/sec'
+            % (2 * num_requests / elapsed)
+        )
@@ -14,11 +14,109 @@
 import rencode
 from twisted.internet.protocol import Protocol
 
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
 log = logging.getLogger(__name__)
 
 PROTOCOL_VERSION = 1
 MESSAGE_HEADER_FORMAT = '!BI'
 MESSAGE_HEADER_SIZE = struct.calcsize(MESSAGE_HEADER_FORMAT)
+# Messages of this version have a codec id after the version in the header.
+PROTOCOL_VERSION_CODEC = 2
+CODEC_MESSAGE_HEADER_FORMAT = '!BBI'
+CODEC_MESSAGE_HEADER_SIZE = struct.calcsize(CODEC_MESSAGE_HEADER_FORMAT)
+
+# Bodies smaller than this are sent uncompressed once a codec is negotiated.
+COMPRESS_THRESHOLD = 1024
+
+
+class _PassthroughDecompressor:
+    def decompress(self, data):
+        return bytes(data)
+
+    def flush(self):
+        return b''
+
+
+class _LZ4Decompressor:
+    def __init__(self):
+        self._decompressor = lz4.frame.LZ4FrameDecompressor()
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+    def flush(self):
+        return b''
+
+
+class Codec:
+    """
+    A wire compression codec.
+
+    :param codec_id: the id of the codec in the message header
+    :type codec_id: int
+    :param compress: function to compress a body with a level, level None is the default
+    :type compress: function
+    :param decompressor: returns an object to decompress a body in parts
+    :type decompressor: function
+    :param levels: the range of valid compression levels
+    :type levels: range
+    """
+
+    def __init__(self, codec_id, compress, decompressor, levels):
+        self.codec_id = codec_id
+        self.compress = compress
+        self.decompressor = decompressor
+        self.levels = levels
+
+
+def _zlib_compress(data, level=None):
+    return zlib.compress(data, zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+
+
+def _no_compress(data, level=None):
+    return data
+
+
+def _lz4_compress(data, level=None):
+    return lz4.frame.compress(data, compression_level=level or 0)
+
+
+# The available codecs by name, in order of preference.
+CODECS = {}
+if lz4:
+    CODECS['lz4'] = Codec(2, _lz4_compress, _LZ4Decompressor, range(0, 17))
+CODECS['zlib'] = Codec(1, _zlib_compress, zlib.decompressobj, range(0, 10))
+CODECS['none'] = Codec(0, _no_compress, _PassthroughDecompressor, range(0, 1))
+CODEC_IDS = {codec.codec_id: name for name, codec in CODECS.items()}
+
+
+def get_codec_names():
+    """
+    Returns the names of the available codecs.
+
+    :returns: the codec names in order of preference
+    :rtype: list
+    """
+    return list(CODECS)
+
+
+def select_codec(codec_names):
+    """
+    Selects the first available codec.
+
+    :param codec_names: the codec names in order of preference
+    :type codec_names: list
+    :returns: the codec name or None if none is available
+    :rtype: str
+    """
+    for name in codec_names:
+        if name in CODECS:
+            return name
+    return None
 
 
 class DelugeTransferProtocol(Protocol):
@@ -36,13 +134,65 @@ class DelugeTransferProtocol(Protocol):
     The version is an unsigned byte that indicates the protocol version.
     The size is a unsigned 32-bit integer that is equal to the length of the body bytestring.
     The body is the compressed rencoded byte string of the data object.
+
+    Once the peers have agreed on a codec with `set_transfer_codec`, messages
+    are sent with the codec id in the header::
+
+            ubyte    ubyte   uint4     bytestring
+        |.version.|.codec.|..size..|.....body.....|
+
+    The body is compressed with the codec, or sent uncompressed if smaller than
+    the compress threshold. Messages of both formats are always received.
     """
 
     def __init__(self):
-        self._buffer = b''  # TODO: Look into using bytearray instead of byte string.
+        # Holds the bytes of a partially received header.
+        self._buffer = bytearray()
         self._message_length = 0
+        # The number of body bytes of the current message received so far.
+        self._body_received = 0
+        self._decompressor = None
+        self._message_chunks = []
+        self._message_error = None
         self._bytes_received = 0
         self._bytes_sent = 0
+        # The codec to send messages with, None for the version 1 zlib format.
+        self._send_codec = None
+        self._compress_level = None
+        self.compress_threshold = COMPRESS_THRESHOLD
+
+    def set_transfer_codec(self, codec_name, level=None):
+        """
+        Set the codec to send messages with.
+
+        The peer must be able to receive messages with the codec.
+
+        :param codec_name: the codec name, None to send version 1 messages
+        :type codec_name: str
+        :param level: the compression level, None for the codec default
+        :type level: int
+        """
+        if codec_name is None:
+            self._send_codec = None
+            self._compress_level = None
+            return
+
+        codec = CODECS[codec_name]
+        if level is not None and level not in codec.levels:
+            level = min(max(level, codec.levels[0]), codec.levels[-1])
+        self._send_codec = codec
+        self._compress_level = level
+
+    def get_transfer_codec(self):
+        """
+        Returns the name of the codec messages are sent with.
+
+        :returns: the codec name or None if sending version 1 messages
+        :rtype: str
+        """
+        if self._send_codec is None:
+            return None
+        return CODEC_IDS[self._send_codec.codec_id]
 
     def transfer_message(self, data):
         """
@@ -50,14 +200,22 @@ def transfer_message(self, data):
 
         :param data: data to be transferred in a data structure serializable by rencode.
         """
-        body = zlib.compress(rencode.dumps(data))
-        body_len = len(body)
-        message = struct.pack(
-            f'{MESSAGE_HEADER_FORMAT}{body_len}s',
-            PROTOCOL_VERSION,
-            body_len,
-            body,
-        )
+        codec = self._send_codec
+        if codec is None:
+            body = zlib.compress(rencode.dumps(data))
+            header = struct.pack(MESSAGE_HEADER_FORMAT, PROTOCOL_VERSION, len(body))
+        else:
+            body = rencode.dumps(data)
+            if len(body) < self.compress_threshold:
+                codec = CODECS['none']
+            body = codec.compress(body, self._compress_level)
+            header = struct.pack(
+                CODEC_MESSAGE_HEADER_FORMAT,
+                PROTOCOL_VERSION_CODEC,
+                codec.codec_id,
+                len(body),
+            )
+        message = header + body
         self._bytes_sent += len(message)
         self.transport.write(message)
 
@@ -65,71 +223,138 @@ def dataReceived(self, data):  # NOQA: N802
         """
         This method is called whenever data is received.
 
+        The body of a message is decompressed as it arrives so the received data
+        is never copied into a growing buffer, only a partial header is kept.
+
         :param data: a message as transferred by transfer_message, or a part of such
                      a message.
 
         Global variables:
-            _buffer         - contains the data received
+            _buffer         - contains the bytes received of the current header
             _message_length - the length of the payload of the current message.
 
         """
-        self._buffer += data
         self._bytes_received += len(data)
+        view = memoryview(data)
+        offset = 0
+        data_length = len(view)
 
-        while len(self._buffer) >= MESSAGE_HEADER_SIZE:
+        while offset < data_length:
             if self._message_length == 0:
-                self._handle_new_message()
-            # We have a complete packet
-            if len(self._buffer) >= self._message_length:
-                self._handle_complete_message(self._buffer[: self._message_length])
-                # Remove message data from buffer
-                self._buffer = self._buffer[self._message_length :]
-                self._message_length = 0
-            else:
-                break
+                header_needed = self._get_header_size() - len(self._buffer)
+                self._buffer += view[offset : offset + header_needed]
+                offset += header_needed
+                # The header size is only known once the version is received.
+                if len(self._buffer) < self._get_header_size():
+                    continue
+                if not self._handle_new_message():
+                    # Discard the remaining data that cannot be parsed.
+                    break
+                continue
+
+            body_needed = self._message_length - self._body_received
+            chunk = view[offset : offset + body_needed]
+            offset += len(chunk)
+            self._body_received += len(chunk)
+            self._decompress_chunk(chunk)
+
+            if self._body_received == self._message_length:
+                self._handle_complete_message()
+
+    def _get_header_size(self):
+        if self._buffer and self._buffer[0] == PROTOCOL_VERSION_CODEC:
+            return CODEC_MESSAGE_HEADER_SIZE
+        return MESSAGE_HEADER_SIZE
 
     def _handle_new_message(self):
         """
         Handle the start of a new message. This method is called only when the
-        beginning of the buffer contains data from a new message (i.e. the header).
+        buffer contains the header of a new message.
+
+        :returns: True if the header is valid
+        :rtype: bool
 
         """
         try:
-            # Read the first bytes of the message (MESSAGE_HEADER_SIZE bytes)
-            header = self._buffer[:MESSAGE_HEADER_SIZE]
-            # Extract the length stored as an unsigned 32-bit integer
-            version, self._message_length = struct.unpack(MESSAGE_HEADER_FORMAT, header)
-            if version != PROTOCOL_VERSION:
+            if self._buffer[0] == PROTOCOL_VERSION_CODEC:
+                version, codec_id, message_length = struct.unpack(
+                    CODEC_MESSAGE_HEADER_FORMAT, self._buffer
+                )
+                if codec_id not in CODEC_IDS:
+                    raise Exception(f'Received unknown codec: {codec_id}.')
+                decompressor = CODECS[CODEC_IDS[codec_id]].decompressor
+            else:
+                # Extract the length stored as an unsigned 32-bit integer
+                version, message_length = struct.unpack(
+                    MESSAGE_HEADER_FORMAT, self._buffer
+                )
+                decompressor = zlib.decompressobj
+            if version != PROTOCOL_VERSION and version != PROTOCOL_VERSION_CODEC:
                 raise Exception(
                     'Received invalid protocol version: {}. PROTOCOL_VERSION is {}.'.format(
                         version, PROTOCOL_VERSION
                     )
                 )
-            # Remove the header from the buffer
-            self._buffer = self._buffer[MESSAGE_HEADER_SIZE:]
         except Exception as ex:
             log.warning('Error occurred when parsing message header: %s.', ex)
             log.warning(
                 'This version of Deluge cannot communicate with the sender of this data.'
             )
             self._message_length = 0
-            self._buffer = b''
+            return False
+        finally:
+            self._buffer.clear()
+
+        self._message_length = message_length
+        self._body_received = 0
+        self._decompressor = decompressor()
+        self._message_chunks = []
+        self._message_error = None
+        return True
+
+    def _decompress_chunk(self, chunk):
+        """
+        Decompress a part of the body of the current message.
+
+        :param chunk: the received part of the zlib compressed body.
+        :type chunk: memoryview
 
-    def _handle_complete_message(self, data):
+        """
+        if self._message_error is not None:
+            return
+
+        try:
+            self._message_chunks.append(self._decompressor.decompress(chunk))
+        except Exception as ex:
+            self._message_error = ex
+            self._message_chunks = []
+
+    def _handle_complete_message(self):
         """
         Handles a complete message as it is transferred on the network.
 
-        :param data: a zlib compressed string encoded with rencode.
+        The decompressed body is decoded with rencode.
 
         """
+        message_length = self._message_length
+        decompressor = self._decompressor
+        chunks = self._message_chunks
+        error = self._message_error
+        self._message_length = 0
+        self._body_received = 0
+        self._decompressor = None
+        self._message_chunks = []
+        self._message_error = None
+
         try:
-            self.message_received(
-                rencode.loads(zlib.decompress(data), decode_utf8=True)
-            )
+            if error is not None:
+                raise error
+            chunks.append(decompressor.flush())
+            self.message_received(rencode.loads(b''.join(chunks), decode_utf8=True))
         except Exception as ex:
             log.warning(
                 'Failed to decompress (%d bytes) and load serialized data with rencode: %s',
-                len(data),
+                message_length,
                 ex,
             )
 
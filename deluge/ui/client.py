@@ -16,8 +16,8 @@
 
 from deluge import error
 from deluge.common import VersionSplit, get_localhost_auth, get_version
-from deluge.decorators import deprecated
-from deluge.transfer import DelugeTransferProtocol
+from deluge.decorators import deprecated, maybe_coroutine
+from deluge.transfer import DelugeTransferProtocol, get_codec_names, select_codec
 
 RPC_RESPONSE = 1
 RPC_ERROR = 2
@@ -25,6 +25,9 @@
 
 log = logging.getLogger(__name__)
 
+# The number of torrents requested in each get_torrents_status_pages page.
+TORRENTS_STATUS_PAGE_SIZE = 1000
+
 
 def format_kwargs(kwargs):
     return ', '.join([key + '=' + str(value) for key, value in kwargs.items()])
@@ -110,13 +113,18 @@ def message_received(self, request):
         message_type = request[0]
 
         if message_type == RPC_EVENT:
-            event = request[1]
-            # log.debug('Received RPCEvent: %s', event)
-            # A RPCEvent was received from the daemon so run any handlers
-            # associated with it.
-            if event in self.factory.event_handlers:
-                for handler in self.factory.event_handlers[event]:
-                    reactor.callLater(0, handler, *request[2])
+            if request[1] is None:
+                # A batch of events as a list of (event, args).
+                events = request[2]
+            else:
+                events = [request[1:]]
+            for event, args in events:
+                # log.debug('Received RPCEvent: %s', event)
+                # A RPCEvent was received from the daemon so run any handlers
+                # associated with it.
+                if event in self.factory.event_handlers:
+                    for handler in self.factory.event_handlers[event]:
+                        reactor.callLater(0, handler, *args)
             return
 
         request_id = request[1]
@@ -272,6 +280,9 @@ def __init__(self, event_handlers=None):
         self.auth_levels_mapping = None
         self.auth_levels_mapping_reverse = None
 
+        # The compression level for the daemon to send messages with, None for default.
+        self.compress_level = None
+
     def connect(self, host, port):
         """
         Connects to a daemon at host:port
@@ -391,6 +402,14 @@ def __on_connect(self, result):
         log.debug('__on_connect called')
 
         def on_info(daemon_info):
+            # Older daemons ignore the codecs and only return the version.
+            if not isinstance(daemon_info, str):
+                daemon_info, daemon_codecs = daemon_info
+                codec = select_codec(
+                    [codec for codec in codecs if codec in daemon_codecs]
+                )
+                self.protocol.set_transfer_codec(codec)
+                log.debug('Using transfer codec: %s', codec)
             self.daemon_version = daemon_info
             log.debug('Got info from daemon: %s', daemon_info)
             self.daemon_info_deferred.callback(daemon_info)
@@ -400,7 +419,16 @@ def on_info_fail(reason):
             log.exception(reason)
             self.daemon_info_deferred.errback(reason)
 
-        self.call('daemon.info').addCallback(on_info).addErrback(on_info_fail)
+        codecs = get_codec_names()
+        if self.host in ('localhost', '127.0.0.1', '::1'):
+            # Compression is not worth the CPU time over the loopback interface.
+            codecs.remove('none')
+            codecs.insert(0, 'none')
+        kwargs = {'codecs': codecs, 'event_batch': True}
+        if self.compress_level is not None:
+            kwargs['compress_level'] = self.compress_level
+        d = self.call('daemon.info', **kwargs)
+        d.addCallback(on_info).addErrback(on_info_fail)
         return self.daemon_info_deferred
 
     def __on_connect_fail(self, reason):
@@ -790,6 +818,49 @@ def deregister_event_handler(self, event, handler):
         if self._daemon_proxy:
             self._daemon_proxy.deregister_event_handler(event, handler)
 
+    @maybe_coroutine
+    async def get_torrents_status_pages(
+        self,
+        filter_dict,
+        keys,
+        on_page,
+        sort_key=None,
+        reverse=False,
+        page_size=TORRENTS_STATUS_PAGE_SIZE,
+    ):
+        """Get the status of the torrents one page at a time.
+
+        The next page is requested before `on_page` is called with the current
+        one, so the first torrents can be shown while the rest are received.
+
+        Args:
+            filter_dict (dict): The filter the torrents must match.
+            keys (list): The status keys to get, empty for all keys.
+            on_page (func): Called for each page with the list of
+                ``[torrent_id, status]`` pairs and the total number of torrents.
+            sort_key (str, optional): The status key to sort the torrents by.
+            reverse (bool, optional): Sort in descending order.
+            page_size (int, optional): The number of torrents in a page.
+
+        Returns:
+            Deferred: Fires with the number of torrents received.
+
+        """
+        count = 0
+        page = await self.core.get_torrents_status_page(
+            filter_dict, keys, sort_key, reverse, None, page_size
+        )
+        while page:
+            next_page = None
+            if page['cursor'] is not None:
+                next_page = self.core.get_torrents_status_page(
+                    filter_dict, keys, sort_key, reverse, page['cursor'], page_size
+                )
+            on_page(page['torrents'], page['total'])
+            count += len(page['torrents'])
+            page = await next_page if next_page else None
+        return count
+
     def force_call(self, block=False):
         # no-op for now.. we'll see if we need this in the future
         pass
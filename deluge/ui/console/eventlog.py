@@ -21,6 +21,7 @@ def __init__(self):
             'TorrentAddedEvent': self.on_torrent_added,
             'PreTorrentRemovedEvent': self.on_torrent_removed,
             'TorrentStateChangedEvent': self.on_torrent_state_changed,
+            'TorrentStatesChangedEvent': self.on_torrent_states_changed,
             'TorrentFinishedEvent': self.on_torrent_finished,
             'NewVersionAvailableEvent': self.on_new_version_available,
             'SessionPausedEvent': self.on_session_paused,
@@ -70,6 +71,10 @@ def on_torrent_state_changed(self, torrent_id, state):
 
         self.write(f'{state}: {{!info!}}{t_name} ({{!cyan!}}{torrent_id}{{!info!}})')
 
+    def on_torrent_states_changed(self, torrent_states):
+        for torrent_id, state in torrent_states.items():
+            self.on_torrent_state_changed(torrent_id, state)
+
     def on_torrent_finished(self, torrent_id):
         if component.get('TorrentList').config['ring_bell']:
             import curses.beep
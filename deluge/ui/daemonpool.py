@@ -0,0 +1,259 @@
+#
+# This file is part of Deluge and is licensed under GNU General Public License 3.0, or later, with
+# the additional special exception to link portions of this program with the OpenSSL library.
+# See LICENSE for more details.
+#
+
+"""A pool of persistent daemon connections for querying several daemons.
+
+The connections are authenticated with the host list credentials and kept open
+so the status probes and queries of a daemon reuse one connection. The pool
+connections do not register for daemon events, the events are only handled for
+the daemon of the main `client` connection.
+
+"""
+
+import logging
+
+from twisted.internet import defer
+
+from deluge.common import get_localhost_auth
+from deluge.error import DelugeError
+from deluge.ui.client import DaemonSSLProxy, client
+from deluge.ui.hostlist import LOCALHOST
+
+log = logging.getLogger(__name__)
+
+
+class DaemonPool:
+    """Persistent daemon connections by host id.
+
+    Args:
+        hostlist (HostList): The host list with the daemon details.
+
+    Attributes:
+        proxies (dict): The connected daemon proxies ``{host_id: DaemonSSLProxy}``.
+
+    """
+
+    def __init__(self, hostlist):
+        self.hostlist = hostlist
+        self.proxies = {}
+        self._connecting = {}
+
+    def _get_host_entry(self, host_id):
+        for host_entry in self.hostlist.config['hosts']:
+            if host_entry[0] == host_id:
+                return host_entry
+        raise ValueError('Bad host id')
+
+    def is_client_host(self, host_id):
+        """Check if the main client is connected to a host.
+
+        Args:
+            host_id (str): The host id.
+
+        Returns:
+            bool: True if the main client is connected to the host.
+
+        """
+        if not client.connected():
+            return False
+        try:
+            dummy_id, host, port = self._get_host_entry(host_id)[:3]
+        except ValueError:
+            return False
+        return client.connection_info()[:2] == (host, port)
+
+    def connect(self, host_id):
+        """Get the pooled connection to a host, connecting if needed.
+
+        Args:
+            host_id (str): The host id.
+
+        Returns:
+            Deferred: Fires with the authenticated DaemonSSLProxy.
+
+        """
+        proxy = self.proxies.get(host_id)
+        if proxy and proxy.connected:
+            return defer.succeed(proxy)
+        if host_id in self._connecting:
+            # Share the pending connection.
+            d = defer.Deferred()
+            self._connecting[host_id].append(d)
+            return d
+
+        try:
+            dummy_id, host, port, username, password = self._get_host_entry(host_id)
+        except ValueError as ex:
+            return defer.fail(ex)
+        if not username and host in LOCALHOST:
+            username, password = get_localhost_auth()
+
+        proxy = DaemonSSLProxy()
+        self._connecting[host_id] = []
+
+        def on_disconnect():
+            if self.proxies.get(host_id) is proxy:
+                log.debug('Pooled connection to host %s closed', host_id)
+                del self.proxies[host_id]
+
+        def on_connected(result):
+            self.proxies[host_id] = proxy
+            proxy.set_disconnect_callback(on_disconnect)
+            for waiting in self._connecting.pop(host_id):
+                waiting.callback(proxy)
+            return proxy
+
+        def on_connect_failed(reason):
+            log.debug('Pooled connection to host %s failed: %s', host_id, reason.value)
+            if proxy.connected:
+                proxy.disconnect()
+            for waiting in self._connecting.pop(host_id):
+                waiting.errback(reason)
+            return reason
+
+        d = proxy.connect(host, port)
+        d.addCallback(lambda daemon_info: proxy.authenticate(username, password))
+        d.addCallbacks(on_connected, on_connect_failed)
+        return d
+
+    def call(self, host_id, method, *args, **kwargs):
+        """Call a daemon RPC method on a host.
+
+        The main client connection is used for its host.
+
+        Args:
+            host_id (str): The host id.
+            method (str): The RPC method, e.g. `core.get_torrents_status`.
+            *args: The method arguments.
+            **kwargs: The method keyword arguments.
+
+        Returns:
+            Deferred: Fires with the method result.
+
+        """
+        if self.is_client_host(host_id):
+            component, method_name = method.split('.')
+            return getattr(getattr(client, component), method_name)(*args, **kwargs)
+
+        d = self.connect(host_id)
+        d.addCallback(lambda proxy: proxy.call(method, *args, **kwargs))
+        return d
+
+    def disconnect(self, host_id):
+        """Close the pooled connection to a host, e.g. after editing the host.
+
+        Args:
+            host_id (str): The host id.
+
+        Returns:
+            Deferred: Fires when the connection is closed.
+
+        """
+        proxy = self.proxies.pop(host_id, None)
+        if proxy and proxy.connected:
+            return proxy.disconnect()
+        return defer.succeed(None)
+
+    def disconnect_all(self):
+        """Close all the pooled connections.
+
+        Returns:
+            Deferred: Fires when the connections are closed.
+
+        """
+        return defer.DeferredList(
+            [self.disconnect(host_id) for host_id in list(self.proxies)]
+        )
+
+    def get_host_status(self, host_id):
+        """Get the status of a host, probing it over the pooled connection.
+
+        Args:
+            host_id (str): The host id.
+
+        Returns:
+            Deferred: Fires with a tuple of strings (host_id, status, version),
+                the status is `Connected` for the host of the main client.
+
+        """
+        if self.is_client_host(host_id):
+            return client.daemon.info().addCallback(
+                lambda info: (host_id, 'Connected', info)
+            )
+
+        def on_info(info):
+            return host_id, 'Online', info
+
+        def on_info_failed(reason):
+            log.debug('Host status failed for %s: %s', host_id, reason.value)
+            if reason.check(DelugeError):
+                # The daemon is online but refused the host credentials.
+                return self.hostlist.get_host_status(host_id)
+            return host_id, 'Offline', ''
+
+        d = self.call(host_id, 'daemon.info')
+        d.addCallbacks(on_info, on_info_failed)
+        return d
+
+    def get_hosts_status(self, host_ids):
+        """Get the status of several hosts, probing them concurrently.
+
+        Args:
+            host_ids (list of str): The host ids.
+
+        Returns:
+            Deferred: Fires with a list of (host_id, status, version) tuples, in
+                the order of the host ids.
+
+        """
+        return defer.gatherResults(
+            [self.get_host_status(host_id) for host_id in host_ids]
+        )
+
+    def get_torrents_status(self, host_ids, filter_dict, keys):
+        """Get the torrents status of several hosts, querying them concurrently.
+
+        The statuses are merged, with a `host_id` key added to each. A torrent
+        on several of the hosts is returned once, from the first of the host
+        ids with the torrent.
+
+        Args:
+            host_ids (list of str): The host ids.
+            filter_dict (dict): The filter for the torrents.
+            keys (list of str): The status keys.
+
+        Returns:
+            Deferred: Fires with a dict of the merged torrents status and the
+                error of each host that failed.
+
+            The format of the dict::
+
+                {
+                    "torrents": {torrent_id: {status_dict}, ...},
+                    "errors": {host_id: str, ...}
+                }
+
+        """
+
+        def on_results(results):
+            torrents = {}
+            errors = {}
+            for host_id, (success, result) in zip(host_ids, results):
+                if not success:
+                    errors[host_id] = result.getErrorMessage()
+                    continue
+                for torrent_id, status in result.items():
+                    if torrent_id not in torrents:
+                        status['host_id'] = host_id
+                        torrents[torrent_id] = status
+            return {'torrents': torrents, 'errors': errors}
+
+        deferreds = [
+            self.call(host_id, 'core.get_torrents_status', dict(filter_dict), keys)
+            for host_id in host_ids
+        ]
+        d = defer.DeferredList(deferreds, consumeErrors=True)
+        return d.addCallback(on_results)
@@ -206,6 +206,9 @@ def start(self):
         client.register_event_handler(
             'TorrentStateChangedEvent', self.on_torrentstatechanged_event
         )
+        client.register_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrentstateschanged_event
+        )
         client.register_event_handler(
             'TorrentResumedEvent', self.on_torrentresumed_event
         )
@@ -220,6 +223,9 @@ def stop(self):
         client.deregister_event_handler(
             'TorrentStateChangedEvent', self.on_torrentstatechanged_event
         )
+        client.deregister_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrentstateschanged_event
+        )
         client.deregister_event_handler(
             'TorrentResumedEvent', self.on_torrentresumed_event
         )
@@ -261,6 +267,10 @@ def on_torrentstatechanged_event(self, torrent_id, state):
         if state == 'Paused':
             self.update_menu()
 
+    def on_torrentstateschanged_event(self, torrent_states):
+        if 'Paused' in torrent_states.values():
+            self.update_menu()
+
     def on_torrentresumed_event(self, torrent_id):
         self.update_menu()
 
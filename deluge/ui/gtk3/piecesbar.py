@@ -21,6 +21,7 @@
 from gi.repository.Pango import SCALE, Weight
 
 # isort:imports-firstparty
+from deluge.common import iter_piece_runs
 from deluge.configmanager import ConfigManager
 
 COLOR_STATES = ['missing', 'waiting', 'downloading', 'completed']
@@ -46,7 +47,7 @@ def __init__(self):
 
         self.width = self.prev_width = 0
         self.height = self.prev_height = 0
-        self.pieces = self.prev_pieces = ()
+        self.pieces = self.prev_pieces = []
         self.num_pieces = None
         self.text = self.prev_text = ''
         self.fraction = self.prev_fraction = 0
@@ -118,12 +119,12 @@ def draw_pieces(self, ctx):
             pieces_ctx = cairo.Context(self.pieces_overlay)
 
             if self.pieces:
-                pieces = self.pieces
-            elif self.num_pieces:
-                # Completed torrents do not send any pieces so create list using 'completed' state.
-                pieces = [COLOR_STATES.index('completed')] * self.num_pieces
+                piece_runs = iter_piece_runs(self.pieces)
+            else:
+                # Completed torrents do not send any pieces so use a single 'completed' run.
+                piece_runs = [(COLOR_STATES.index('completed'), self.num_pieces)]
             start_pos = 0
-            piece_width = self.width / len(pieces)
+            piece_width = self.width / self.num_pieces
             pieces_colors = [
                 [
                     color / 65535
@@ -131,11 +132,12 @@ def draw_pieces(self, ctx):
                 ]
                 for state in COLOR_STATES
             ]
-            for state in pieces:
+            for state, length in piece_runs:
+                run_width = piece_width * length
                 pieces_ctx.set_source_rgb(*pieces_colors[state])
-                pieces_ctx.rectangle(start_pos, 0, piece_width, self.height)
+                pieces_ctx.rectangle(start_pos, 0, run_width, self.height)
                 pieces_ctx.fill()
-                start_pos += piece_width
+                start_pos += run_width
 
         ctx.set_source_surface(self.pieces_overlay)
         ctx.paint()
@@ -206,6 +208,14 @@ def set_text(self, text):
         self.text = text
 
     def set_pieces(self, pieces, num_pieces):
+        """Set the pieces to draw.
+
+        Args:
+            pieces (list of int): The run-length encoded piece states, empty for a
+                completed torrent.
+            num_pieces (int): The number of pieces in the torrent.
+
+        """
         self.prev_pieces = self.pieces
         self.pieces = pieces
         self.num_pieces = num_pieces
@@ -214,7 +224,7 @@ def get_pieces(self):
         return self.pieces
 
     def clear(self):
-        self.pieces = self.prev_pieces = ()
+        self.pieces = self.prev_pieces = []
         self.num_pieces = None
         self.text = self.prev_text = ''
         self.fraction = self.prev_fraction = 0
@@ -9,7 +9,7 @@
 import logging
 
 import deluge.component as component
-from deluge.common import decode_bytes, fpeer
+from deluge.common import decode_bytes, encode_piece_runs, fpeer
 from deluge.configmanager import ConfigManager
 
 from .piecesbar import PiecesBar
@@ -35,6 +35,8 @@ def __init__(self):
 
         self.progressbar = self.main_builder.get_object('progressbar')
         self.piecesbar = None
+        # Older daemons without the 'pieces_runs' status send 'pieces' instead.
+        self.legacy_pieces = False
 
         self.add_tab_widget('summary_availability', fratio, ('distributed_copies',))
         self.add_tab_widget(
@@ -90,7 +92,8 @@ def update(self):
         # Get the torrent status
         status_keys = self.status_keys
         if self.config['show_piecesbar']:
-            status_keys.extend(['pieces', 'num_pieces'])
+            pieces_key = 'pieces' if self.legacy_pieces else 'pieces_runs'
+            status_keys = status_keys + [pieces_key, 'num_pieces']
 
         component.get('SessionProxy').get_torrent_status(
             selected, status_keys
@@ -113,17 +116,37 @@ def _on_get_torrent_status(self, status):
         if self.config['show_piecesbar']:
             if self.piecesbar.get_fraction() != fraction:
                 self.piecesbar.set_fraction(fraction)
+            pieces = self.get_piece_runs(status)
             if (
                 status['state'] != 'Checking'
-                and self.piecesbar.get_pieces() != status['pieces']
+                and pieces is not None
+                and self.piecesbar.get_pieces() != pieces
             ):
                 # Skip pieces assignment if checking torrent.
-                self.piecesbar.set_pieces(status['pieces'], status['num_pieces'])
+                self.piecesbar.set_pieces(pieces, status['num_pieces'])
             self.piecesbar.update()
         else:
             if self.progressbar.get_fraction() != fraction:
                 self.progressbar.set_fraction(fraction)
 
+    def get_piece_runs(self, status):
+        """Get the run-length encoded piece states from the torrent status.
+
+        Args:
+            status (dict): The torrent status.
+
+        Returns:
+            list of int: The piece runs, or None if not in the status.
+
+        """
+        if 'pieces_runs' in status:
+            return status['pieces_runs'] or []
+        if 'pieces' in status:
+            return encode_piece_runs(bytes(status['pieces'] or []))
+        # The daemon has no 'pieces_runs' status so request 'pieces'.
+        self.legacy_pieces = True
+        return None
+
     def on_show_piecesbar_config_changed(self, key, show):
         if show:
             self.show_piecesbar()
@@ -152,6 +175,9 @@ def hide_piecesbar(self):
     def clear(self):
         for widget in self.tab_widgets.values():
             widget[0].set_text('')
+        # Check for the 'pieces_runs' status again, e.g. after connecting to
+        # another daemon.
+        self.legacy_pieces = False
 
         if self.config['show_piecesbar']:
             self.piecesbar.clear()
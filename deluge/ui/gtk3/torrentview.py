@@ -18,7 +18,6 @@
 from twisted.internet import reactor
 
 import deluge.component as component
-from deluge.common import decode_bytes
 from deluge.ui.client import client
 
 from . import torrentview_data_funcs as funcs
@@ -144,7 +143,7 @@ def clear_search(self):
                 if torrent_id in self.prefiltered:
                     # Reset to previous filter state
                     self.prefiltered.pop(self.prefiltered.index(torrent_id))
-                    row[filter_column] = not row[filter_column]
+                    self.torrentview.set_row_filter(torrent_id, not row[filter_column])
 
         self.prefiltered = None
 
@@ -192,7 +191,7 @@ def prefilter_torrentview(self):
             if torrent_id in self.prefiltered:
                 # Reset to previous filter state
                 self.prefiltered.pop(self.prefiltered.index(torrent_id))
-                row[filter_column] = not row[filter_column]
+                self.torrentview.set_row_filter(torrent_id, not row[filter_column])
 
             if not row[filter_column]:
                 # Row is not visible(filtered out, but not by our filter), skip it
@@ -204,10 +203,10 @@ def prefilter_torrentview(self):
                 torrent_name = row[torrent_name_column].lower()
 
             if search_string in torrent_name and not row[filter_column]:
-                row[filter_column] = True
+                self.torrentview.set_row_filter(torrent_id, True)
                 self.prefiltered.append(torrent_id)
             elif search_string not in torrent_name and row[filter_column]:
-                row[filter_column] = False
+                self.torrentview.set_row_filter(torrent_id, False)
                 self.prefiltered.append(torrent_id)
 
     def on_close_search_button_clicked(self, widget):
@@ -257,6 +256,15 @@ def __init__(self):
         # We keep a copy of the previous status to compare for changes
         self.prev_status = {}
 
+        # The liststore row of each torrent {torrent_id: Gtk.TreeIter}, the
+        # iters of a Gtk.ListStore stay valid while the row exists.
+        self.rows = {}
+        # The values set in each row {torrent_id: {column_index: value}}, used
+        # to only set the changed cells instead of reading the liststore.
+        self.row_values = {}
+        # The torrents with the filter column set, i.e. the visible rows.
+        self.shown_rows = set()
+
         # Register the columns menu with the listview so it gets updated accordingly.
         self.register_checklist_menu(main_builder.get_object('menu_columns'))
 
@@ -468,6 +476,9 @@ def start(self):
         client.register_event_handler(
             'TorrentStateChangedEvent', self.on_torrentstatechanged_event
         )
+        client.register_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrentstateschanged_event
+        )
         client.register_event_handler('TorrentAddedEvent', self.on_torrentadded_event)
         client.register_event_handler(
             'TorrentRemovedEvent', self.on_torrentremoved_event
@@ -494,6 +505,9 @@ def stop(self):
         client.deregister_event_handler(
             'TorrentStateChangedEvent', self.on_torrentstatechanged_event
         )
+        client.deregister_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrentstateschanged_event
+        )
         client.deregister_event_handler('TorrentAddedEvent', self.on_torrentadded_event)
         client.deregister_event_handler(
             'TorrentRemovedEvent', self.on_torrentremoved_event
@@ -515,6 +529,9 @@ def stop(self):
         # so column sort details are correctly saved.
         self.save_state()
         self.liststore.clear()
+        self.rows = {}
+        self.row_values = {}
+        self.shown_rows = set()
         self.prev_status = {}
         self.filter = None
         self.search_box.hide()
@@ -623,9 +640,50 @@ def update(self, select_row=False):
             # Send a status request
             idle_add(self.send_status_request, None, select_row)
 
-    def update_view(self, load_new_list=False):
-        """Update the torrent view model with data we've received."""
+    def create_new_liststore(self):
+        """Creates a new liststore and rebuilds the row index for it"""
+        ListView.create_new_liststore(self)
+        self.rows = {}
+        self.shown_rows = set()
+        # The column indices may have changed so every cell is set again on the
+        # next update.
+        self.row_values = {}
+        self.prev_status = {}
+        if 'torrent_id' not in self.columns or 'filter' not in self.columns:
+            return
+
+        torrent_id_column = self.columns['torrent_id'].column_indices[0]
         filter_column = self.columns['filter'].column_indices[0]
+        for row in self.liststore:
+            torrent_id = row[torrent_id_column]
+            self.rows[torrent_id] = row.iter
+            if row[filter_column]:
+                self.shown_rows.add(torrent_id)
+
+    def set_row_filter(self, torrent_id, visible):
+        """Show or hide the row of a torrent with the filter column.
+
+        :param torrent_id: the torrent id
+        :type torrent_id: str
+        :param visible: if the row is shown
+        :type visible: bool
+
+        """
+        row = self.rows.get(torrent_id)
+        if row is None:
+            return
+        self.liststore.set_value(row, self.columns['filter'].column_indices[0], visible)
+        if visible:
+            self.shown_rows.add(torrent_id)
+        else:
+            self.shown_rows.discard(torrent_id)
+
+    def update_view(self, load_new_list=False):
+        """Update the torrent view model with data we've received.
+
+        Only the rows of torrents with a changed status are visited, and only
+        the cells with a value different to the one last set are updated.
+        """
         status = self.status
 
         if not load_new_list:
@@ -633,48 +691,42 @@ def update_view(self, load_new_list=False):
             self.treeview.freeze_child_notify()
 
         # Get the columns to update from one of the torrents
+        fields_to_update = []
         if status:
-            torrent_id = list(status)[0]
-            fields_to_update = []
+            first_status = next(iter(status.values()))
             for column in self.columns_to_update:
                 column_index = self.get_column_index(column)
                 for i, status_field in enumerate(self.columns[column].status_field):
                     # Only use columns that the torrent has in the state
-                    if status_field in status[torrent_id]:
+                    if status_field in first_status:
                         fields_to_update.append((column_index[i], status_field))
 
-        for row in self.liststore:
-            torrent_id = row[self.columns['torrent_id'].column_indices[0]]
-            # We expect the torrent_id to be in status and prev_status,
-            # as it will be as long as the list isn't changed by the user
-
-            torrent_id_in_status = False
-            try:
-                torrent_status = status[torrent_id]
-                torrent_id_in_status = True
-                if torrent_status == self.prev_status[torrent_id]:
-                    # The status dict is the same, so do nothing to update for this torrent
-                    continue
-            except KeyError:
-                pass
+        # Hide the rows of torrents no longer in the status
+        for torrent_id in self.shown_rows.difference(status):
+            self.set_row_filter(torrent_id, False)
 
-            if not torrent_id_in_status:
-                if row[filter_column] is True:
-                    row[filter_column] = False
-            else:
-                if row[filter_column] is False:
-                    row[filter_column] = True
-
-                # Find the fields to update
-                to_update = []
-                for i, status_field in fields_to_update:
-                    row_value = status[torrent_id][status_field]
-                    if decode_bytes(row[i]) != row_value:
-                        to_update.append(i)
-                        to_update.append(row_value)
-                # Update fields in the liststore
-                if to_update:
-                    self.liststore.set(row.iter, *to_update)
+        for torrent_id, torrent_status in status.items():
+            row = self.rows.get(torrent_id)
+            if row is None:
+                continue
+            if torrent_id not in self.shown_rows:
+                self.set_row_filter(torrent_id, True)
+            if torrent_status == self.prev_status.get(torrent_id):
+                # The status dict is the same, so do nothing to update for this torrent
+                continue
+
+            # Find the fields to update
+            row_values = self.row_values.setdefault(torrent_id, {})
+            to_update = []
+            for i, status_field in fields_to_update:
+                value = torrent_status[status_field]
+                if i not in row_values or row_values[i] != value:
+                    row_values[i] = value
+                    to_update.append(i)
+                    to_update.append(value)
+            # Update fields in the liststore
+            if to_update:
+                self.liststore.set(row, *to_update)
 
         if load_new_list:
             # Create the model filter. This sets the model for the treeview and enables sorting.
@@ -704,6 +756,8 @@ def add_rows(self, torrent_ids):
         dirty_column = self.columns['dirty'].column_indices[0]
         filter_column = self.columns['filter'].column_indices[0]
         for torrent_id in torrent_ids:
+            if torrent_id in self.rows:
+                continue
             # Insert a new row to the liststore
             row = self.liststore.append()
             self.liststore.set(
@@ -715,26 +769,28 @@ def add_rows(self, torrent_ids):
                 filter_column,
                 True,
             )
+            self.rows[torrent_id] = row
+            self.shown_rows.add(torrent_id)
 
     def remove_row(self, torrent_id):
         """Removes a row with torrent_id"""
-        for row in self.liststore:
-            if row[self.columns['torrent_id'].column_indices[0]] == torrent_id:
-                self.liststore.remove(row.iter)
-                # Force an update of the torrentview
-                self.update(select_row=True)
-                break
+        row = self.rows.pop(torrent_id, None)
+        if row is None:
+            return
+        self.row_values.pop(torrent_id, None)
+        self.shown_rows.discard(torrent_id)
+        self.liststore.remove(row)
+        # Force an update of the torrentview
+        self.update(select_row=True)
 
     def mark_dirty(self, torrent_id=None):
-        for row in self.liststore:
-            if (
-                not torrent_id
-                or row[self.columns['torrent_id'].column_indices[0]] == torrent_id
-            ):
-                # log.debug('marking %s dirty', torrent_id)
-                row[self.columns['dirty'].column_indices[0]] = True
-                if torrent_id:
-                    break
+        dirty_column = self.columns['dirty'].column_indices[0]
+        if not torrent_id:
+            for row in self.rows.values():
+                self.liststore.set_value(row, dirty_column, True)
+        elif torrent_id in self.rows:
+            # log.debug('marking %s dirty', torrent_id)
+            self.liststore.set_value(self.rows[torrent_id], dirty_column, True)
 
     def get_selected_torrent(self):
         """Returns a torrent_id or None.  If multiple torrents are selected,
@@ -846,19 +902,31 @@ def on_torrentremoved_event(self, torrent_id):
         self.remove_row(torrent_id)
 
     def on_torrentstatechanged_event(self, torrent_id, state):
-        # Update the torrents state
-        for row in self.liststore:
-            if torrent_id != row[self.columns['torrent_id'].column_indices[0]]:
+        self.on_torrentstateschanged_event({torrent_id: state})
+
+    def on_torrentstateschanged_event(self, torrent_states):
+        state_columns = []
+        for name in self.columns_to_update:
+            if not self.columns[name].status_field:
                 continue
+            for idx, status_field in enumerate(self.columns[name].status_field):
+                # Update all columns that use the state field to current state
+                if status_field == 'state':
+                    state_columns.append(self.get_column_index(name)[idx])
+        dirty_column = self.columns['dirty'].column_indices[0]
 
-            for name in self.columns_to_update:
-                if not self.columns[name].status_field:
-                    continue
-                for idx, status_field in enumerate(self.columns[name].status_field):
-                    # Update all columns that use the state field to current state
-                    if status_field != 'state':
-                        continue
-                    row[self.get_column_index(name)[idx]] = state
+        for torrent_id, state in torrent_states.items():
+            row = self.rows.get(torrent_id)
+            if row is None:
+                continue
+
+            row_values = self.row_values.setdefault(torrent_id, {})
+            to_update = [dirty_column, True]
+            for column_index in state_columns:
+                row_values[column_index] = state
+                to_update.append(column_index)
+                to_update.append(state)
+            self.liststore.set(row, *to_update)
 
             if self.filter.get('state', None) is not None:
                 # We have a filter set, let's see if theres anything to hide
@@ -867,11 +935,9 @@ def on_torrentstatechanged_event(self, torrent_id, state):
                     torrent_id in self.status
                     and self.status[torrent_id]['state'] != state
                 ):
-                    row[self.columns['filter'].column_indices[0]] = False
+                    self.set_row_filter(torrent_id, False)
                     del self.status[torrent_id]
 
-        self.mark_dirty(torrent_id)
-
     def on_sessionpaused_event(self):
         self.mark_dirty()
         self.update()
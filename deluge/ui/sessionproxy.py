@@ -6,15 +6,90 @@
 # See LICENSE for more details.
 #
 import logging
+import os
 from time import time
 
-from twisted.internet.defer import maybeDeferred, succeed
+from twisted.internet.defer import succeed
 
 import deluge.component as component
 from deluge.ui.client import client
 
 log = logging.getLogger(__name__)
 
+# The filter fields that are evaluated from the cached status, the other filters
+# are passed onto the core.
+LOCAL_FILTER_FIELDS = ('id', 'state', 'owner', 'tracker_host', 'label', 'name')
+
+# The number of removed torrents remembered for the changes since a revision,
+# changes since an older revision are returned in full.
+MAX_REMOVED_REVISIONS = 1000
+
+
+def get_filter_keys(filter_dict):
+    """The status keys needed to evaluate a filter with `match_filter`.
+
+    :param filter_dict: the filter with the values as lists
+    :type filter_dict: dict
+
+    :returns: the status keys
+    :rtype: set
+
+    """
+    keys = set()
+    for field, values in filter_dict.items():
+        if field == 'id':
+            continue
+        elif field == 'tracker_host' and values[0] == 'Error':
+            keys.add('tracker_status')
+            continue
+        elif field == 'state' and 'Active' in values:
+            keys.update(('download_payload_rate', 'upload_payload_rate'))
+        keys.add(field)
+    return keys
+
+
+def match_filter(status, filter_dict):
+    """
+    Check if a torrent status matches a filter, the same as the core FilterManager.
+
+    :param status: the torrent status with the keys from `get_filter_keys`
+    :type status: dict
+    :param filter_dict: the filter with the values as lists, except *id*
+    :type filter_dict: dict
+
+    :returns: True if the status matches the filter
+    :rtype: bool
+
+    """
+    for field, values in filter_dict.items():
+        if field == 'id':
+            continue
+        elif field == 'state':
+            states = [value for value in values if value != 'Active']
+            if len(states) != len(values) and not (
+                status.get('download_payload_rate') or status.get('upload_payload_rate')
+            ):
+                return False
+            if states and status.get('state') not in states:
+                return False
+        elif field == 'tracker_host':
+            if values[0] == 'Error':
+                if 'Error:' not in status.get('tracker_status', ''):
+                    return False
+            elif status.get('tracker_host') != values[0]:
+                return False
+        elif field == 'name':
+            search_string, match_case, dummy = values[0].partition('::match')
+            name = status.get('name', '')
+            if not match_case:
+                search_string = search_string.lower()
+                name = name.lower()
+            if search_string not in name:
+                return False
+        elif field not in status or status[field] not in values:
+            return False
+    return True
+
 
 class SessionProxy(component.Component):
     """
@@ -38,12 +113,33 @@ def __init__(self):
         self.torrents = {}
 
         # Holds the time of the last key update.. {torrent_id: {key1, time, ...}, ...}
+        # These are only set for the torrents fetched on their own or by id.
         self.cache_times = {}
 
+        # Holds the time each key was last fetched for all the torrents.. {key: time}
+        self.key_times = {}
+
+        # The torrents added since the last fetch of all the torrents.
+        self.new_torrents = set()
+
+        # The cache revision, incremented for each change of a torrent's status.
+        # The revisions are only comparable within the same cache_id.
+        self.cache_id = os.urandom(4).hex()
+        self.revision = 0
+        # The revision of the last change of each torrent.. {torrent_id: revision}
+        self.revisions = {}
+        # The revision each torrent was removed at.. {torrent_id: revision}
+        self.removed_revisions = {}
+        # The oldest revision the changes can be found since.
+        self.min_revision = 0
+
     def start(self):
         client.register_event_handler(
             'TorrentStateChangedEvent', self.on_torrent_state_changed
         )
+        client.register_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrent_states_changed
+        )
         client.register_event_handler('TorrentRemovedEvent', self.on_torrent_removed)
         client.register_event_handler('TorrentAddedEvent', self.on_torrent_added)
 
@@ -53,6 +149,8 @@ def on_get_session_state(torrent_ids):
                 # so that upcoming queries or status updates don't throw errors.
                 self.torrents.setdefault(torrent_id, [time(), {}])
                 self.cache_times.setdefault(torrent_id, {})
+                self.new_torrents.add(torrent_id)
+                self.mark_changed(torrent_id)
             return torrent_ids
 
         return client.core.get_session_state().addCallback(on_get_session_state)
@@ -61,9 +159,64 @@ def stop(self):
         client.deregister_event_handler(
             'TorrentStateChangedEvent', self.on_torrent_state_changed
         )
+        client.deregister_event_handler(
+            'TorrentStatesChangedEvent', self.on_torrent_states_changed
+        )
         client.deregister_event_handler('TorrentRemovedEvent', self.on_torrent_removed)
         client.deregister_event_handler('TorrentAddedEvent', self.on_torrent_added)
         self.torrents = {}
+        self.cache_times = {}
+        self.key_times = {}
+        self.new_torrents = set()
+        self.cache_id = os.urandom(4).hex()
+        self.revisions = {}
+        self.removed_revisions = {}
+        self.min_revision = self.revision
+
+    def mark_changed(self, torrent_id):
+        """
+        Record a change of a torrent's status at a new revision.
+
+        :param torrent_id: the torrent_id
+        :type torrent_id: string
+
+        """
+        self.revision += 1
+        self.revisions[torrent_id] = self.revision
+
+    def mark_removed(self, torrent_id):
+        """
+        Record the removal of a torrent at a new revision.
+
+        :param torrent_id: the torrent_id
+        :type torrent_id: string
+
+        """
+        self.revision += 1
+        self.revisions.pop(torrent_id, None)
+        self.removed_revisions.pop(torrent_id, None)
+        self.removed_revisions[torrent_id] = self.revision
+        if len(self.removed_revisions) > MAX_REMOVED_REVISIONS:
+            # Forget the oldest removal, the dict is in removal order.
+            oldest_id = next(iter(self.removed_revisions))
+            self.min_revision = self.removed_revisions.pop(oldest_id)
+
+    def update_status(self, torrent_id, status):
+        """
+        Update the cached status of a torrent, recording any change.
+
+        :param torrent_id: the torrent_id
+        :type torrent_id: string
+        :param status: the status keys and values to update
+        :type status: dict
+
+        """
+        cached_status = self.torrents[torrent_id][1]
+        for key, value in status.items():
+            if key not in cached_status or cached_status[key] != value:
+                cached_status.update(status)
+                self.mark_changed(torrent_id)
+                return
 
     def create_status_dict(self, torrent_ids, keys):
         """
@@ -128,16 +281,12 @@ def get_torrent_status(self, torrent_id, keys):
         """
         if torrent_id in self.torrents:
             # Keep track of keys we need to request from the core
-            keys_to_get = []
             if not keys:
                 keys = list(self.torrents[torrent_id][1])
 
-            for key in keys:
-                if (
-                    time() - self.cache_times[torrent_id].get(key, 0.0)
-                    > self.cache_time
-                ):
-                    keys_to_get.append(key)
+            keys_to_get = self.find_keys_to_fetch(
+                torrent_id, keys, self.find_expired_keys(keys)
+            )
             if not keys_to_get:
                 return succeed(self.create_status_dict([torrent_id], keys)[torrent_id])
             else:
@@ -147,7 +296,7 @@ def on_status(result, torrent_id):
                     t = time()
                     try:
                         self.torrents[torrent_id][0] = t
-                        self.torrents[torrent_id][1].update(result)
+                        self.update_status(torrent_id, result)
                         for key in keys_to_get:
                             self.cache_times[torrent_id][key] = t
                         return self.create_status_dict([torrent_id], keys)[torrent_id]
@@ -166,6 +315,7 @@ def on_status(result):
                     t = time()
                     self.torrents[torrent_id] = (t, result)
                     self.cache_times[torrent_id] = {}
+                    self.mark_changed(torrent_id)
                     for key in result:
                         self.cache_times[torrent_id][key] = t
 
@@ -173,13 +323,197 @@ def on_status(result):
 
             return d.addCallback(on_status)
 
+    def find_expired_keys(self, keys):
+        """
+        Find the keys that have expired since they were fetched for all the torrents.
+
+        :param keys: the status keys
+        :type keys: list of strings
+
+        :returns: the expired keys
+        :rtype: list of strings
+
+        """
+        t = time()
+        return [
+            key for key in keys if t - self.key_times.get(key, 0.0) > self.cache_time
+        ]
+
+    def find_keys_to_fetch(self, torrent_id, keys, expired_keys):
+        """
+        Find the keys of a torrent that are not in the cache.
+
+        :param torrent_id: the torrent_id
+        :type torrent_id: string
+        :param keys: the status keys
+        :type keys: list of strings
+        :param expired_keys: the keys from `find_expired_keys`
+        :type expired_keys: list of strings
+
+        :returns: the keys to fetch
+        :rtype: list of strings
+
+        """
+        if torrent_id in self.new_torrents:
+            # The keys were not fetched with all the torrents for new torrents
+            expired_keys = keys
+        t = time()
+        cache_times = self.cache_times[torrent_id]
+        return [
+            key
+            for key in expired_keys
+            if t - cache_times.get(key, 0.0) > self.cache_time
+        ]
+
+    def update_cache(self, result, keys=None):
+        """
+        Update the cached status with a status diff from the core.
+
+        :param result: the status diffs.. {torrent_id: {key: value}, ...}
+        :type result: dict
+        :param keys: the fetched keys to set the cache times of, or None if
+            they are covered by the time in *key_times*
+        :type keys: list of strings
+
+        """
+        t = time()
+        for torrent_id, status in result.items():
+            try:
+                torrent = self.torrents[torrent_id]
+            except KeyError:
+                # The torrent was removed
+                continue
+            torrent[0] = t
+            self.update_status(torrent_id, status)
+            if keys is not None:
+                # With a diff the unchanged keys are fetched but not in status
+                cache_times = self.cache_times[torrent_id]
+                for key in keys or status:
+                    cache_times[key] = t
+
+    def fetch_all(self, keys):
+        """
+        Fetch the expired keys for all the torrents in one call to the core.
+
+        :param keys: the status keys
+        :type keys: list of strings
+
+        :returns: a Deferred fired when the cache is updated
+        :rtype: Deferred
+
+        """
+        keys_to_get = self.find_expired_keys(keys)
+        new_torrents = self.new_torrents
+        if new_torrents:
+            # The new torrents need all the keys
+            keys_to_get = list(keys)
+            self.new_torrents = set()
+        elif not keys_to_get:
+            return succeed(None)
+
+        def on_status(result):
+            t = time()
+            self.update_cache(result)
+            for key in keys_to_get:
+                self.key_times[key] = t
+
+        def on_error(failure):
+            self.new_torrents.update(new_torrents & self.torrents.keys())
+            return failure
+
+        d = client.core.get_torrents_status({}, keys_to_get, True)
+        return d.addCallbacks(on_status, on_error)
+
+    def fetch_ids(self, torrent_ids, keys):
+        """
+        Fetch the keys of the torrents that are not in the cache in one call to
+        the core.
+
+        :param torrent_ids: the torrent_ids
+        :type torrent_ids: list of strings
+        :param keys: the status keys
+        :type keys: list of strings
+
+        :returns: a Deferred fired when the cache is updated
+        :rtype: Deferred
+
+        """
+        expired_keys = self.find_expired_keys(keys)
+        to_fetch = []
+        keys_to_get = set()
+        for torrent_id in torrent_ids:
+            if torrent_id not in self.torrents:
+                continue
+            torrent_keys = self.find_keys_to_fetch(torrent_id, keys, expired_keys)
+            if torrent_keys:
+                to_fetch.append(torrent_id)
+                keys_to_get.update(torrent_keys)
+        if not to_fetch:
+            return succeed(None)
+
+        keys_to_get = list(keys_to_get)
+        d = client.core.get_torrents_status({'id': to_fetch}, keys_to_get, True)
+        return d.addCallback(self.update_cache, keys_to_get)
+
+    def find_torrents(self, filter_dict, keys):
+        """
+        Update the cache with the keys of the torrents matching a filter.
+
+        The *id*, *state*, *owner*, *tracker_host*, *label* and *name* filters
+        are evaluated from the cache, only fetching the expired keys from the
+        core. The other filters are passed onto the core. The state filter can
+        be one of the torrent states or the special one *Active*. The *id* key
+        is simply a list of torrent_ids.
+
+        :param filter_dict: the filter used for this query
+        :type filter_dict: dict
+        :param keys: the status keys
+        :type keys: list of strings
+
+        :returns: the torrent_ids matching the filter
+        :rtype: list of strings
+
+        """
+        filter_dict = {
+            field: [values] if isinstance(values, str) else list(values)
+            for field, values in (filter_dict or {}).items()
+        }
+
+        if not keys or any(field not in LOCAL_FILTER_FIELDS for field in filter_dict):
+            # The core has to evaluate this filter or return all the keys
+            def on_status(result):
+                self.update_cache(result, keys)
+                return list(result)
+
+            d = client.core.get_torrents_status(filter_dict, keys, True)
+            return d.addCallback(on_status)
+
+        fetch_keys = list(set(keys) | get_filter_keys(filter_dict))
+        if 'id' in filter_dict:
+            torrent_ids = filter_dict['id']
+            d = self.fetch_ids(torrent_ids, fetch_keys)
+        else:
+            torrent_ids = None
+            d = self.fetch_all(fetch_keys)
+
+        def on_fetched(result):
+            ids = list(self.torrents) if torrent_ids is None else torrent_ids
+            if any(field != 'id' for field in filter_dict):
+                ids = [
+                    torrent_id
+                    for torrent_id in ids
+                    if torrent_id in self.torrents
+                    and match_filter(self.torrents[torrent_id][1], filter_dict)
+                ]
+            return ids
+
+        return d.addCallback(on_fetched)
+
     def get_torrents_status(self, filter_dict, keys):
         """
         Get a dict of torrent statuses.
 
-        The filter can take 2 keys, *state* and *id*.  The state filter can be
-        one of the torrent states or the special one *Active*.  The *id* key is
-        simply a list of torrent_ids.
+        The torrents are filtered as in `find_torrents`.
 
         :param filter_dict: the filter used for this query
         :type filter_dict: dict
@@ -190,86 +524,93 @@ def get_torrents_status(self, filter_dict, keys):
         :rtype: dict
 
         """
+        d = self.find_torrents(filter_dict, keys)
+        return d.addCallback(self.create_status_dict, keys)
 
-        # Helper functions and callbacks ---------------------------------------
-        def on_status(result, torrent_ids, keys):
-            # Update the internal torrent status dict with the update values
-            t = time()
-            for key, value in result.items():
-                try:
-                    self.torrents[key][0] = t
-                    self.torrents[key][1].update(value)
-                    for k in value:
-                        self.cache_times[key][k] = t
-                except KeyError:
-                    # The torrent was removed
-                    continue
-
-            # Create the status dict
-            if not torrent_ids:
-                torrent_ids = list(result)
-
-            return self.create_status_dict(torrent_ids, keys)
-
-        def find_torrents_to_fetch(torrent_ids):
-            to_fetch = []
-            t = time()
-            for torrent_id in torrent_ids:
-                torrent = self.torrents[torrent_id]
-                if t - torrent[0] > self.cache_time:
-                    to_fetch.append(torrent_id)
-                else:
-                    # We need to check if a key is expired
-                    for key in keys:
-                        if (
-                            t - self.cache_times[torrent_id].get(key, 0.0)
-                            > self.cache_time
-                        ):
-                            to_fetch.append(torrent_id)
-                            break
-
-            return to_fetch
-
-        # -----------------------------------------------------------------------
-
-        if not filter_dict:
-            # This means we want all the torrents status
-            # We get a list of any torrent_ids with expired status dicts
-            torrents_list = list(self.torrents)
-            to_fetch = find_torrents_to_fetch(torrents_list)
-            if to_fetch:
-                d = client.core.get_torrents_status({'id': to_fetch}, keys, True)
-                return d.addCallback(on_status, torrents_list, keys)
-
-            # Don't need to fetch anything
-            return maybeDeferred(self.create_status_dict, torrents_list, keys)
-
-        if len(filter_dict) == 1 and 'id' in filter_dict:
-            # At this point we should have a filter with just "id" in it
-            to_fetch = find_torrents_to_fetch(filter_dict['id'])
-            if to_fetch:
-                d = client.core.get_torrents_status({'id': to_fetch}, keys, True)
-                return d.addCallback(on_status, filter_dict['id'], keys)
-            else:
-                # Don't need to fetch anything, so just return data from the cache
-                return maybeDeferred(self.create_status_dict, filter_dict['id'], keys)
-        else:
-            # This is a keyworded filter so lets just pass it onto the core
-            # XXX: Add more caching here.
-            d = client.core.get_torrents_status(filter_dict, keys, True)
-            return d.addCallback(on_status, None, keys)
+    def get_torrents_changes(self, filter_dict, keys, revision=None):
+        """
+        Get the torrent statuses changed since a revision of the cache.
+
+        The torrents are filtered as in `find_torrents`. The changed torrents
+        that no longer match the filter are returned as removed. Without a
+        revision, or if the changes since it are no longer known, all the
+        matching torrents are returned.
+
+        :param filter_dict: the filter used for this query
+        :type filter_dict: dict
+        :param keys: the status keys
+        :type keys: list of strings
+        :param revision: the revision returned by an earlier call
+        :type revision: int
+
+        :returns: the changes and the revision to get the next changes since
+        :rtype: dict
+
+        The format of the dict::
+
+            {
+                "revision": int,
+                "full": bool,
+                "torrents": {torrent_id: {status_dict}, ...},
+                "removed": [torrent_id, ...]
+            }
+
+        """
+
+        def on_found(torrent_ids):
+            if revision is None or not self.min_revision <= revision <= self.revision:
+                return {
+                    'revision': self.revision,
+                    'full': True,
+                    'torrents': self.create_status_dict(torrent_ids, keys),
+                    'removed': [],
+                }
+
+            revisions = self.revisions
+            changed_ids = [
+                torrent_id
+                for torrent_id in torrent_ids
+                if revisions.get(torrent_id, 0) > revision
+            ]
+            removed = [
+                torrent_id
+                for torrent_id, removed_revision in self.removed_revisions.items()
+                if removed_revision > revision
+            ]
+            if filter_dict:
+                matching = set(torrent_ids)
+                removed.extend(
+                    torrent_id
+                    for torrent_id, changed_revision in revisions.items()
+                    if changed_revision > revision and torrent_id not in matching
+                )
+            return {
+                'revision': self.revision,
+                'full': False,
+                'torrents': self.create_status_dict(changed_ids, keys),
+                'removed': removed,
+            }
+
+        return self.find_torrents(filter_dict, keys).addCallback(on_found)
 
     def on_torrent_state_changed(self, torrent_id, state):
         if torrent_id in self.torrents:
-            self.torrents[torrent_id][1].setdefault('state', state)
+            self.update_status(torrent_id, {'state': state})
             self.cache_times.setdefault(torrent_id, {}).update(state=time())
 
+    def on_torrent_states_changed(self, torrent_states):
+        for torrent_id, state in torrent_states.items():
+            self.on_torrent_state_changed(torrent_id, state)
+
     def on_torrent_added(self, torrent_id, from_state):
         self.torrents[torrent_id] = [time() - self.cache_time - 1, {}]
         self.cache_times[torrent_id] = {}
+        self.new_torrents.add(torrent_id)
+        self.removed_revisions.pop(torrent_id, None)
+        self.mark_changed(torrent_id)
 
         def on_status(status):
-            self.torrents[torrent_id][1].update(status)
+            self.update_status(torrent_id, status)
             t = time()
             for key in status:
                 self.cache_times[torrent_id][key] = t
@@ -280,3 +621,5 @@ def on_torrent_removed(self, torrent_id):
         if torrent_id in self.torrents:
             del self.torrents[torrent_id]
             del self.cache_times[torrent_id]
+            self.new_torrents.discard(torrent_id)
+            self.mark_removed(torrent_id)
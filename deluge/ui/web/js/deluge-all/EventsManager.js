@@ -50,6 +50,19 @@ Deluge.EventsManager = Ext.extend(Ext.util.Observable, {
         });
     },
 
+    /**
+     * Opens a Server-Sent Events stream that receives the events as they
+     * occur, instead of polling for them.
+     */
+    openStream: function () {
+        this.source = new EventSource(deluge.config.base + 'events');
+        this.source.addEventListener(
+            'deluge',
+            this.onStreamEvent.createDelegate(this)
+        );
+        this.source.onerror = this.onStreamError.createDelegate(this);
+    },
+
     /**
      * Starts the EventsManagerManager checking for events.
      */
@@ -59,7 +72,11 @@ Deluge.EventsManager = Ext.extend(Ext.util.Observable, {
         });
         this.running = true;
         this.errorCount = 0;
-        this.getEvents();
+        if (window.EventSource) {
+            this.openStream();
+        } else {
+            this.getEvents();
+        }
     },
 
     /**
@@ -67,6 +84,10 @@ Deluge.EventsManager = Ext.extend(Ext.util.Observable, {
      */
     stop: function () {
         this.running = false;
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
     },
 
     // private
@@ -74,20 +95,42 @@ Deluge.EventsManager = Ext.extend(Ext.util.Observable, {
         this.start();
     },
 
+    // private
+    fireEvents: function (events) {
+        Ext.each(
+            events,
+            function (event) {
+                var name = event[0],
+                    args = event[1];
+                args.splice(0, 0, name);
+                this.fireEvent.apply(this, args);
+            },
+            this
+        );
+    },
+
     onGetEventsSuccess: function (events) {
         if (!this.running) return;
         if (events) {
-            Ext.each(
-                events,
-                function (event) {
-                    var name = event[0],
-                        args = event[1];
-                    args.splice(0, 0, name);
-                    this.fireEvent.apply(this, args);
-                },
-                this
-            );
+            this.fireEvents(events);
+        }
+        this.getEvents();
+    },
+
+    // private
+    onStreamEvent: function (e) {
+        if (!this.running) return;
+        this.fireEvents([Ext.decode(e.data)]);
+    },
+
+    // private
+    onStreamError: function () {
+        // The browser reconnects the stream unless it was refused, in which
+        // case fall back to polling for the events.
+        if (!this.running || this.source.readyState != EventSource.CLOSED) {
+            return;
         }
+        this.source = null;
         this.getEvents();
     },
 
@@ -119,6 +119,27 @@ Deluge.Sidebar = Ext.extend(Ext.Panel, {
         deluge.ui.update();
     },
 
+    /**
+     * Apply the filter tree changes since the previous update.
+     * @param {Object} filters The changed filters, null for a removed filter.
+     */
+    updateChanges: function (filters) {
+        for (var filter in filters) {
+            var states = filters[filter];
+            if (this.panels[filter]) {
+                if (states) {
+                    this.panels[filter].updateStates(states);
+                } else {
+                    this.remove(this.panels[filter]);
+                    this.doLayout();
+                    delete this.panels[filter];
+                }
+            } else if (states) {
+                this.createFilter(filter, states);
+            }
+        }
+    },
+
     update: function (filters) {
         for (var filter in filters) {
             var states = filters[filter];
@@ -451,6 +451,42 @@
                 this.torrents = {};
             }
 
+            this.updateRecords(torrents);
+
+            // Remove any torrents that should not be in the store.
+            store.each(function (record) {
+                if (!torrents[record.id]) {
+                    store.remove(record);
+                    delete this.torrents[record.id];
+                }
+            }, this);
+            store.commitChanges();
+
+            var sortState = store.getSortState();
+            if (!sortState) return;
+            store.sort(sortState.field, sortState.direction);
+        },
+
+        /**
+         * Apply the changes since the previous update.
+         * @param {Object} torrents The changed torrents.
+         * @param {Array} removed The ids of the torrents to remove.
+         */
+        updateChanges: function (torrents, removed) {
+            var store = this.getStore();
+            this.updateRecords(torrents);
+            this.onTorrentsRemoved(removed);
+            store.commitChanges();
+
+            var sortState = store.getSortState();
+            var changed = !Ext.isEmpty(removed) || Ext.getKeys(torrents).length;
+            if (!sortState || !changed) return;
+            store.sort(sortState.field, sortState.direction);
+        },
+
+        // private
+        updateRecords: function (torrents) {
+            var store = this.getStore();
             var newTorrents = [];
 
             // Update and add any new torrents.
@@ -474,19 +510,6 @@
                 }
             }
             store.add(newTorrents);
-
-            // Remove any torrents that should not be in the store.
-            store.each(function (record) {
-                if (!torrents[record.id]) {
-                    store.remove(record);
-                    delete this.torrents[record.id];
-                }
-            }, this);
-            store.commitChanges();
-
-            var sortState = store.getSortState();
-            if (!sortState) return;
-            store.sort(sortState.field, sortState.direction);
         },
 
         // private
@@ -502,6 +525,7 @@
                 torrentIds,
                 function (torrentId) {
                     var record = this.getStore().getById(torrentId);
+                    if (!record) return;
                     if (selModel.isSelected(record)) {
                         selModel.deselectRow(this.getStore().indexOf(record));
                     }
@@ -38,6 +38,11 @@ deluge.ui = {
 
     filters: null,
 
+    /**
+     * The revision of the last update, to only get the changes since then.
+     */
+    revision: null,
+
     /**
      * @description Create all the interface components, the json-rpc client
      * and set up various events that the UI will utilise.
@@ -126,7 +131,7 @@ deluge.ui = {
         this.oldFilters = this.filters;
         this.filters = filters;
 
-        deluge.client.web.update_ui(Deluge.Keys.Grid, filters, {
+        deluge.client.web.update_ui(Deluge.Keys.Grid, filters, this.revision, {
             success: this.onUpdate,
             failure: this.onUpdateError,
             scope: this,
@@ -203,13 +208,23 @@ deluge.ui = {
                 ' - ' +
                 this.originalTitle;
         }
-        if (Ext.areObjectsEqual(this.filters, this.oldFilters)) {
+        // Only the changes since the revision are sent unless full is set.
+        this.revision = data['revision'];
+        if (!data['full']) {
+            deluge.torrents.updateChanges(data['torrents'], data['removed']);
+        } else if (Ext.areObjectsEqual(this.filters, this.oldFilters)) {
             deluge.torrents.update(data['torrents']);
         } else {
             deluge.torrents.update(data['torrents'], true);
         }
         deluge.statusbar.update(data['stats']);
-        deluge.sidebar.update(data['filters']);
+        if (data['filters']) {
+            if (data['full']) {
+                deluge.sidebar.update(data['filters']);
+            } else {
+                deluge.sidebar.updateChanges(data['filters']);
+            }
+        }
         this.errorCount = 0;
     },
 
@@ -303,6 +318,7 @@ deluge.ui = {
             this.running = undefined;
             deluge.torrents.getStore().removeAll();
         }
+        this.revision = null;
     },
 };
 
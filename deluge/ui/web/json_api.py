@@ -7,6 +7,8 @@
 #
 
 import email.message
+import hashlib
+import itertools
 import json
 import logging
 import os
@@ -16,8 +18,11 @@
 from types import FunctionType
 
 from twisted.internet import defer, reactor
-from twisted.internet.defer import Deferred, DeferredList
+from twisted.internet.defer import Deferred, DeferredList, gatherResults, succeed
+from twisted.internet.interfaces import IPullProducer
+from twisted.internet.task import LoopingCall
 from twisted.web import http, resource, server
+from zope.interface import implementer
 
 from deluge import component, httpdownloader
 from deluge.common import AUTH_LEVEL_DEFAULT, get_magnet_info, is_magnet
@@ -28,11 +33,25 @@
 from deluge.ui.client import client
 from deluge.ui.common import FileTree2, TorrentInfo
 from deluge.ui.coreconfig import CoreConfig
+from deluge.ui.daemonpool import DaemonPool
 from deluge.ui.hostlist import HostList
 from deluge.ui.sessionproxy import SessionProxy
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 log = logging.getLogger(__name__)
 
+# The size of the chunks a JSON response is written in.
+JSON_CHUNK_SIZE = 64 * 1024
+# The nesting depth down to which the dicts and lists of a response are split
+# up, e.g. the batch, the response, the result and the torrents of a result.
+JSON_CHUNK_DEPTH = 4
+# The number of items of the deepest dicts and lists encoded together.
+JSON_SLICE_SIZE = 100
+
 
 class JSONComponent(component.Component):
     def __init__(self, name, interval=1, depend=None):
@@ -66,6 +85,145 @@ def wrap(func, *args, **kwargs):
         return wrap
 
 
+def json_loads(data):
+    """Decode JSON, with orjson if it is installed.
+
+    :param data: the JSON document
+    :type data: bytes or str
+    :raises ValueError: if the data is not valid JSON
+
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj):
+    """Encode an object to compact JSON, with orjson if it is installed.
+
+    :param obj: the object to encode
+    :returns: the JSON document
+    :rtype: bytes
+    :raises TypeError: if the object cannot be encoded
+
+    """
+    if orjson:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Fall back for the objects orjson does not handle, e.g. large ints.
+            pass
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def iter_json(obj, depth=JSON_CHUNK_DEPTH):
+    """Encode an object to JSON in fragments.
+
+    The dicts and lists down to `depth` are split up, the items of the deepest
+    and of the large ones are encoded a slice at a time, so a large result is
+    never held as a single JSON document.
+
+    :param obj: the object to encode
+    :param depth: the nesting depth of the dicts and lists to split up
+    :type depth: int
+    :returns: the JSON fragments
+    :rtype: iterator of bytes
+
+    """
+    if not depth or not isinstance(obj, (dict, list, tuple)):
+        yield json_dumps(obj)
+        return
+
+    is_dict = isinstance(obj, dict)
+    start, end = (b'{', b'}') if is_dict else (b'[', b']')
+    if not obj:
+        yield start + end
+        return
+
+    separator = start
+    if depth == 1 or len(obj) > JSON_SLICE_SIZE:
+        # Encode the items in slices, stripping the brackets of each slice.
+        items = iter(obj.items() if is_dict else obj)
+        container = dict if is_dict else list
+        items_slice = container(itertools.islice(items, JSON_SLICE_SIZE))
+        while items_slice:
+            yield separator + json_dumps(items_slice)[1:-1]
+            separator = b','
+            items_slice = container(itertools.islice(items, JSON_SLICE_SIZE))
+    elif is_dict:
+        for key, value in obj.items():
+            if not isinstance(key, str):
+                # Match the json module, which converts keys to strings.
+                key = json.dumps(key)
+            yield separator + json_dumps(key) + b':'
+            yield from iter_json(value, depth - 1)
+            separator = b','
+    else:
+        for value in obj:
+            yield separator
+            yield from iter_json(value, depth - 1)
+            separator = b','
+    yield end
+
+
+def iter_json_chunks(obj, chunk_size=JSON_CHUNK_SIZE):
+    """Encode an object to JSON in chunks of at least `chunk_size` bytes.
+
+    :param obj: the object to encode
+    :param chunk_size: the minimum size of the chunks, except the last one
+    :type chunk_size: int
+    :returns: the JSON chunks
+    :rtype: iterator of bytes
+
+    """
+    fragments = []
+    size = 0
+    for fragment in iter_json(obj):
+        fragments.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield b''.join(fragments)
+            fragments = []
+            size = 0
+    if fragments:
+        yield b''.join(fragments)
+
+
+@implementer(IPullProducer)
+class JSONResponseProducer:
+    """Writes the chunks of a JSON response as the client reads them.
+
+    :param request: the request to write the response to
+    :type request: twisted.web.http.Request
+    :param chunks: the JSON chunks
+    :type chunks: iterator of bytes
+
+    """
+
+    def __init__(self, request, chunks):
+        self.request = request
+        self.chunks = chunks
+
+    def start(self):
+        self.request.registerProducer(self, False)
+
+    def resumeProducing(self):  # NOQA: N802
+        if not self.request:
+            return
+        chunk = next(self.chunks, None)
+        if chunk is not None:
+            # The write can call resumeProducing again.
+            self.request.write(chunk)
+        else:
+            self.request.unregisterProducer()
+            self.request.finish()
+            self.stopProducing()
+
+    def stopProducing(self):  # NOQA: N802
+        self.chunks = iter(())
+        self.request = None
+
+
 class JSONException(Exception):
     def __init__(self, inner_exception):
         self.inner_exception = inner_exception
@@ -127,22 +285,33 @@ def _exec_remote(self, method, params, request):
         core_component, method = method.split('.')
         return getattr(getattr(client, core_component), method)(*params)
 
+    def _decode_request(self, request):
+        """
+        Decodes the json data of a request.
+        """
+        try:
+            return json_loads(request.json)
+        except (ValueError, TypeError):
+            raise JSONException('JSON not decodable')
+
     def _handle_request(self, request):
         """
         Takes some json data as a string and attempts to decode it, and process
         the rpc object that should be contained, returning a deferred for all
         procedure calls and the request id.
         """
-        try:
-            request_data = json.loads(request.json.decode())
-        except (ValueError, TypeError):
-            raise JSONException('JSON not decodable')
+        return self._handle_call(self._decode_request(request), request)
 
+    def _handle_call(self, request_data, request):
+        """
+        Processes a decoded rpc object, returning a deferred for all procedure
+        calls and the request id.
+        """
         try:
             method = request_data['method']
             params = request_data['params']
             request_id = request_data['id']
-        except KeyError as ex:
+        except (KeyError, TypeError) as ex:
             message = 'Invalid JSON request, missing param {} in {}'.format(
                 ex,
                 request_data,
@@ -168,14 +337,14 @@ def _handle_request(self, request):
 
         return request_id, result, error
 
-    def _on_rpc_request_finished(self, result, response, request):
+    def _on_rpc_request_finished(self, result, response):
         """
-        Sends the response of any rpc calls back to the json-rpc client.
+        Adds the result of an rpc call to its response.
         """
         response['result'] = result
-        return self._send_response(request, response)
+        return response
 
-    def _on_rpc_request_failed(self, reason, response, request):
+    def _on_rpc_request_failed(self, reason, response):
         """
         Handles any failures that occurred while making an rpc call.
         """
@@ -184,12 +353,50 @@ def _on_rpc_request_failed(self, reason, response, request):
             'message': f'{reason.__class__.__name__}: {str(reason)}',
             'code': 4,
         }
-        return self._send_response(request, response)
+        return response
+
+    def _call(self, request_data, request):
+        """
+        Executes the rpc object of a request, returning a deferred that fires
+        with the response of the call.
+        """
+        response = {'result': None, 'error': None, 'id': None}
+        response['id'], d, response['error'] = self._handle_call(request_data, request)
+
+        if isinstance(d, Deferred):
+            d.addCallback(self._on_rpc_request_finished, response)
+            d.addErrback(self._on_rpc_request_failed, response)
+            return d
+        else:
+            response['result'] = d
+            return succeed(response)
+
+    def _call_batch(self, batch, request):
+        """
+        Executes the rpc objects of a batch request concurrently, returning a
+        deferred that fires with the list of responses, in the batch order.
+        """
+        if not batch:
+            raise JSONException('Invalid JSON request, empty batch')
+
+        calls = []
+        for request_data in batch:
+            try:
+                calls.append(self._call(request_data, request))
+            except JSONException as ex:
+                request_id = None
+                if isinstance(request_data, dict):
+                    request_id = request_data.get('id')
+                error = {'message': f'{ex.__class__.__name__}: {str(ex)}', 'code': 5}
+                calls.append(
+                    succeed({'result': None, 'error': error, 'id': request_id})
+                )
+        return gatherResults(calls)
 
     def _on_json_request(self, request):
         """
-        Handler to take the json data as a string and pass it on to the
-        _handle_request method for further processing.
+        Handler to take the json data as a string, decode it and pass the rpc
+        object, or each rpc object of a batch, on for further processing.
         """
         message = email.message.EmailMessage()
         message['content-type'] = request.getHeader(b'content-type').decode()
@@ -199,16 +406,12 @@ def _on_json_request(self, request):
             raise JSONException(message)
 
         log.debug('json-request: %s', request.json)
-        response = {'result': None, 'error': None, 'id': None}
-        response['id'], d, response['error'] = self._handle_request(request)
-
-        if isinstance(d, Deferred):
-            d.addCallback(self._on_rpc_request_finished, response, request)
-            d.addErrback(self._on_rpc_request_failed, response, request)
-            return d
+        request_data = self._decode_request(request)
+        if isinstance(request_data, list):
+            d = self._call_batch(request_data, request)
         else:
-            response['result'] = d
-            return self._send_response(request, response)
+            d = self._call(request_data, request)
+        return d.addCallback(lambda response: self._send_response(request, response))
 
     def _on_json_request_failed(self, reason, request):
         """
@@ -228,10 +431,16 @@ def _on_json_request_failed(self, reason, request):
     def _send_response(self, request, response):
         if request._disconnected:
             return ''
-        response = json.dumps(response)
         request.setHeader(b'content-type', b'application/json')
-        request.write(response.encode())
-        request.finish()
+        chunks = iter_json_chunks(response)
+        request.write(next(chunks))
+        next_chunk = next(chunks, None)
+        if next_chunk is None:
+            request.finish()
+        else:
+            # Write the rest of a large response as the client reads it.
+            chunks = itertools.chain([next_chunk], chunks)
+            JSONResponseProducer(request, chunks).start()
         return server.NOT_DONE_YET
 
     def render(self, request):
@@ -287,17 +496,34 @@ def deregister_object(self, obj):
 FILES_KEYS = ['files', 'file_progress', 'file_priorities']
 
 
+# The time in seconds a get_events request waits for an event.
+EVENTS_TIMEOUT = 5
+# The interval in seconds of the comments that keep idle event streams open.
+EVENT_STREAM_KEEPALIVE = 30
+# The maximum number of torrent status pushes per second to the event streams.
+EVENT_STREAM_STATUS_RATE = 1.0
+
+
 class EventQueue:
     """
     This class subscribes to events from the core and stores them until all
     the subscribed listeners have received the events.
+
+    The events are passed on as they arrive to a waiting `get_events` request
+    or to the event streams of the listener.
     """
 
     def __init__(self):
         self.__events = {}
         self.__handlers = {}
         self.__queue = {}
+        # The waiting get_events requests {listener_id: [(Deferred, DelayedCall)]}
         self.__requests = {}
+        # The event streams {listener_id: [EventStreamWriter]}
+        self.__streams = {}
+        # The status keys the core pushes the torrent status changes for.
+        self.__status_keys = set()
+        self.__keepalive = LoopingCall(self._send_keepalive)
 
     def add_listener(self, listener_id, event):
         """
@@ -315,6 +541,7 @@ def on_event(*args):
                     if listener not in self.__queue:
                         self.__queue[listener] = []
                     self.__queue[listener].append((event, args))
+                    self._dispatch(listener)
 
             client.register_event_handler(event, on_event)
             self.__handlers[event] = on_event
@@ -322,10 +549,26 @@ def on_event(*args):
         elif listener_id not in self.__events[event]:
             self.__events[event].append(listener_id)
 
+    def _dispatch(self, listener_id):
+        """Pass the queued events of a listener to a stream or a waiting request."""
+        if self.__streams.get(listener_id):
+            queue = self.__queue.pop(listener_id)
+            for stream in self.__streams[listener_id]:
+                stream.send_events(queue)
+        elif self.__requests.get(listener_id):
+            d, timeout = self.__requests[listener_id].pop(0)
+            if not self.__requests[listener_id]:
+                del self.__requests[listener_id]
+            timeout.cancel()
+            d.callback(self.__queue.pop(listener_id))
+
     def get_events(self, listener_id):
         """
         Retrieve the pending events for the listener.
 
+        If there are no pending events the returned Deferred fires with the
+        next events, or None if there are none within `EVENTS_TIMEOUT`.
+
         :param listener_id: A unique id for the listener
         :type listener_id: string
         """
@@ -336,23 +579,24 @@ def get_events(self, listener_id):
             del self.__queue[listener_id]
             return queue
 
-        # Create a deferred to and check again in 100ms
         d = Deferred()
-        reactor.callLater(0.1, self._get_events, listener_id, 0, d)
+        timeout = reactor.callLater(
+            EVENTS_TIMEOUT, self._on_get_events_timeout, listener_id, d
+        )
+        self.__requests.setdefault(listener_id, []).append((d, timeout))
         return d
 
-    def _get_events(self, listener_id, count, d):
-        if listener_id in self.__queue:
-            queue = self.__queue[listener_id]
-            del self.__queue[listener_id]
-            d.callback(queue)
-        else:
-            # Prevent this loop going on indefinitely incase a client leaves
-            # the page or disconnects uncleanly.
-            if count >= 50:
-                d.callback(None)
-            else:
-                reactor.callLater(0.1, self._get_events, listener_id, count + 1, d)
+    def _on_get_events_timeout(self, listener_id, d):
+        # Prevent the request waiting indefinitely incase a client leaves
+        # the page or disconnects uncleanly.
+        requests = self.__requests.get(listener_id, [])
+        for request in requests:
+            if request[0] is d:
+                requests.remove(request)
+                break
+        if not requests:
+            self.__requests.pop(listener_id, None)
+        d.callback(None)
 
     def remove_listener(self, listener_id, event):
         """
@@ -369,6 +613,208 @@ def remove_listener(self, listener_id, event):
             del self.__events[event]
             del self.__handlers[event]
 
+    def add_stream(self, listener_id, stream):
+        """
+        Add an event stream of a listener, the events of the listener are sent
+        to the stream instead of queued for `get_events`.
+
+        :param listener_id: The unique id for the listener
+        :type listener_id: string
+        :param stream: The event stream
+        :type stream: EventStreamWriter
+        """
+        self.__streams.setdefault(listener_id, []).append(stream)
+        if not self.__keepalive.running:
+            self.__keepalive.start(EVENT_STREAM_KEEPALIVE, now=False)
+        if listener_id in self.__queue:
+            self._dispatch(listener_id)
+        if stream.status_keys:
+            self._subscribe_status(stream)
+
+    def remove_stream(self, listener_id, stream):
+        """
+        Remove an event stream of a listener.
+
+        :param listener_id: The unique id for the listener
+        :type listener_id: string
+        :param stream: The event stream
+        :type stream: EventStreamWriter
+        """
+        streams = self.__streams.get(listener_id, [])
+        if stream in streams:
+            streams.remove(stream)
+        if not streams:
+            self.__streams.pop(listener_id, None)
+        if not self.__streams and self.__keepalive.running:
+            self.__keepalive.stop()
+        if self.__status_keys and not any(
+            stream.status_keys for stream in self._get_streams()
+        ):
+            self.__status_keys = set()
+            client.deregister_event_handler(
+                'TorrentsStatusChangedEvent', self._on_torrents_status_changed
+            )
+            if client.connected():
+                client.core.unsubscribe_torrents_status()
+
+    def _get_streams(self):
+        for streams in self.__streams.values():
+            yield from streams
+
+    def _send_keepalive(self):
+        for stream in list(self._get_streams()):
+            stream.send_comment()
+
+    def _subscribe_status(self, stream):
+        """Send the torrents status to a new stream and push the changes."""
+        status_keys = self.__status_keys | set(stream.status_keys)
+        if status_keys != self.__status_keys:
+            if not self.__status_keys:
+                client.register_event_handler(
+                    'TorrentsStatusChangedEvent', self._on_torrents_status_changed
+                )
+            self.__status_keys = status_keys
+            d = self._subscribe()
+            d.addCallback(lambda result: self._send_status(stream))
+        else:
+            self._send_status(stream)
+
+    def _subscribe(self):
+        """
+        Subscribe to the torrents status changes of the stream status keys.
+
+        :returns: a Deferred fired when the SessionProxy cache is updated
+        :rtype: Deferred
+        """
+        status_keys = sorted(self.__status_keys)
+        d = client.core.subscribe_torrents_status(
+            {}, status_keys, EVENT_STREAM_STATUS_RATE
+        )
+        # The returned status is current, so the SessionProxy can serve it.
+        d.addCallback(component.get('SessionProxy').update_cache, status_keys)
+        return d
+
+    def resubscribe_status(self):
+        """
+        Subscribe again to the torrents status changes after connecting to a
+        daemon, sending the current status to the streams.
+
+        :returns: a Deferred fired when the status is sent
+        :rtype: Deferred
+        """
+        if not self.__status_keys:
+            return succeed(None)
+
+        def on_subscribed(result):
+            for stream in list(self._get_streams()):
+                if stream.status_keys:
+                    self._send_status(stream)
+
+        return self._subscribe().addCallback(on_subscribed)
+
+    def _send_status(self, stream):
+        d = component.get('SessionProxy').get_torrents_status({}, stream.status_keys)
+        d.addCallback(stream.send_status)
+
+    def _on_torrents_status_changed(self, status_dict):
+        # Keep the SessionProxy cache up to date with the pushed changes.
+        component.get('SessionProxy').update_cache(status_dict)
+        for stream in list(self._get_streams()):
+            if stream.status_keys:
+                stream.send_status(status_dict)
+
+
+class EventStreamWriter:
+    """
+    Writes events to an event stream request in the Server-Sent Events format.
+
+    :param request: The event stream request
+    :type request: twisted.web.http.Request
+    :param status_keys: The torrent status keys to send the changes of
+    :type status_keys: list
+    """
+
+    def __init__(self, request, status_keys):
+        self.request = request
+        self.status_keys = status_keys
+
+    def write(self, data):
+        if not self.request._disconnected:
+            self.request.write(data)
+
+    def send_events(self, events):
+        """Send the events as ``deluge`` events with the event name and args."""
+        self.write(
+            b''.join(
+                b'event: deluge\ndata: %s\n\n' % json_dumps([event, args])
+                for event, args in events
+            )
+        )
+
+    def send_status(self, status_dict):
+        """Send the status changes of the stream's keys as a ``torrents_status`` event."""
+        keys = self.status_keys
+        status_dict = {
+            torrent_id: {key: status[key] for key in keys if key in status}
+            for torrent_id, status in status_dict.items()
+        }
+        status_dict = {
+            torrent_id: status for torrent_id, status in status_dict.items() if status
+        }
+        if status_dict:
+            self.write(
+                b'event: torrents_status\ndata: %s\n\n' % json_dumps(status_dict)
+            )
+
+    def send_comment(self):
+        self.write(b':\n\n')
+
+
+class EventStream(resource.Resource):
+    """
+    A Twisted Web resource that streams the events of the session's event
+    listeners to web clients as Server-Sent Events, as an alternative to
+    polling ``web.get_events``.
+
+    The changes of the torrent status keys given in the comma-separated
+    ``status_keys`` query argument are also streamed, starting with the current
+    status of all torrents.
+    """
+
+    def render(self, request):
+        if request.method != b'GET':
+            request.setResponseCode(http.NOT_ALLOWED)
+            request.finish()
+            return server.NOT_DONE_YET
+
+        try:
+            component.get('Auth').check_request(request, level=AUTH_LEVEL_DEFAULT)
+        except NotAuthorizedError:
+            request.setResponseCode(http.UNAUTHORIZED)
+            request.finish()
+            return server.NOT_DONE_YET
+
+        status_keys = [
+            key
+            for arg in request.args.get(b'status_keys', [])
+            for key in arg.decode().split(',')
+            if key
+        ]
+        request.setHeader(b'content-type', b'text/event-stream')
+        request.setHeader(b'cache-control', b'no-cache')
+        # Stop proxies buffering the stream.
+        request.setHeader(b'x-accel-buffering', b'no')
+        stream = EventStreamWriter(request, status_keys)
+        stream.send_comment()
+
+        event_queue = component.get('Web').event_queue
+        listener_id = request.session_id
+        event_queue.add_stream(listener_id, stream)
+        request.notifyFinish().addBoth(
+            lambda result: event_queue.remove_stream(listener_id, stream)
+        )
+        return server.NOT_DONE_YET
+
 
 class WebApi(JSONComponent):
     """
@@ -380,6 +826,7 @@ class WebApi(JSONComponent):
     def __init__(self):
         super().__init__('Web', depend=['SessionProxy'])
         self.hostlist = HostList()
+        self.daemon_pool = DaemonPool(self.hostlist)
         self.core_config = CoreConfig()
         self.event_queue = EventQueue()
         try:
@@ -387,6 +834,13 @@ def __init__(self):
         except KeyError:
             self.sessionproxy = SessionProxy()
 
+        # The filter tree of the last update_ui and the revision each of its
+        # fields last changed at, for the SessionProxy cache_id.
+        self._filter_tree = {}
+        self._filter_revisions = {}
+        self._filter_revision = 0
+        self._filter_cache_id = None
+
     def disable(self):
         client.deregister_event_handler(
             'PluginEnabledEvent', self._json.get_remote_methods
@@ -394,6 +848,7 @@ def disable(self):
         client.deregister_event_handler(
             'PluginDisabledEvent', self._json.get_remote_methods
         )
+        self.daemon_pool.disconnect_all()
 
         if client.is_standalone():
             component.get('Web.PluginManager').stop()
@@ -441,7 +896,10 @@ def _on_client_disconnect(self, *args):
 
     def start(self):
         self.core_config.start()
-        return self.sessionproxy.start()
+        d = self.sessionproxy.start()
+        # The status subscription of the event streams ends with the connection.
+        d.addCallback(lambda result: self.event_queue.resubscribe_status())
+        return d
 
     def stop(self):
         self.core_config.stop()
@@ -486,15 +944,87 @@ def on_disconnect(reason):
         d.addCallback(on_disconnect)
         return d
 
+    def _get_query_digest(self, keys, filter_dict):
+        query = json.dumps([keys, filter_dict], sort_keys=True)
+        return hashlib.sha1(query.encode()).hexdigest()[:8]
+
+    def _make_revision(self, torrents_revision, filters_revision, query_digest):
+        return '%s.%d.%d.%s' % (
+            self.sessionproxy.cache_id,
+            torrents_revision,
+            filters_revision,
+            query_digest,
+        )
+
+    def _parse_revision(self, revision, query_digest):
+        """
+        Get the torrents and filter tree revisions from an update_ui revision.
+
+        :returns: the revisions or None if the revision is not for the current
+            SessionProxy cache or for a different query.
+        :rtype: tuple
+
+        """
+        try:
+            cache_id, torrents_revision, filters_revision, digest = revision.split('.')
+            torrents_revision = int(torrents_revision)
+            filters_revision = int(filters_revision)
+        except (AttributeError, ValueError):
+            return None
+        if cache_id != self.sessionproxy.cache_id or digest != query_digest:
+            return None
+        return torrents_revision, filters_revision
+
+    def _update_filter_tree(self, filter_tree):
+        """
+        Record the changes to the fields of the filter tree.
+        """
+        if self._filter_cache_id != self.sessionproxy.cache_id:
+            self._filter_cache_id = self.sessionproxy.cache_id
+            self._filter_tree = {}
+            self._filter_revisions = {}
+
+        for field, states in filter_tree.items():
+            if self._filter_tree.get(field) != states:
+                self._filter_revision += 1
+                self._filter_tree[field] = states
+                self._filter_revisions[field] = self._filter_revision
+
+        for field in set(self._filter_tree) - set(filter_tree):
+            self._filter_revision += 1
+            del self._filter_tree[field]
+            self._filter_revisions[field] = self._filter_revision
+
+    def _get_filter_tree_changes(self, revision):
+        """
+        Get the fields of the filter tree changed since a revision, the removed
+        fields are None.
+        """
+        return {
+            field: self._filter_tree.get(field)
+            for field, field_revision in self._filter_revisions.items()
+            if field_revision > revision
+        }
+
     @export
-    def update_ui(self, keys, filter_dict):
+    def update_ui(self, keys, filter_dict, revision=None):
         """
         Gather the information required for updating the web interface.
 
+        With the revision returned by the previous call, only the torrents and
+        the filter tree fields changed since then are returned. The *removed*
+        torrents are those removed or that no longer match the filter, the
+        removed filter tree fields are null. All the torrents and the complete
+        filter tree are returned, with *full* set, if the changes since the
+        revision are not known, e.g. after reconnecting to the daemon or if the
+        keys or filter are not the same.
+
         :param keys: the information about the torrents to gather
         :type keys: list
         :param filter_dict: the filters to apply when selecting torrents.
         :type filter_dict: dictionary
+        :param revision: the revision from the previous update_ui call
+        :type revision: string
         :returns: The torrent and UI information.
         :rtype: dictionary
         """
@@ -508,12 +1038,20 @@ def update_ui(self, keys, filter_dict):
                 'max_upload': self.core_config.get('max_upload_speed'),
                 'max_num_connections': self.core_config.get('max_connections_global'),
             },
+            'revision': revision,
+            'full': True,
+            'removed': [],
         }
 
         if not client.connected():
             d.callback(ui_info)
             return d
 
+        query_digest = self._get_query_digest(keys, filter_dict)
+        since = self._parse_revision(revision, query_digest)
+        torrents_since, filters_since = since if since else (None, 0)
+        revisions = {}
+
         def got_stats(stats):
             ui_info['stats']['num_connections'] = stats['peer.num_peers_connected']
             ui_info['stats']['upload_rate'] = stats['payload_upload_rate']
@@ -530,7 +1068,11 @@ def got_stats(stats):
             ]
 
         def got_filters(filters):
+            self._update_filter_tree(filters)
+            if since:
+                filters = self._get_filter_tree_changes(filters_since)
             ui_info['filters'] = filters
+            revisions['filters'] = self._filter_revision
 
         def got_free_space(free_space):
             ui_info['stats']['free_space'] = free_space
@@ -538,18 +1080,28 @@ def got_free_space(free_space):
         def got_external_ip(external_ip):
             ui_info['stats']['external_ip'] = external_ip
 
-        def got_torrents(torrents):
-            ui_info['torrents'] = torrents
+        def got_torrents(changes):
+            ui_info['torrents'] = changes['torrents']
+            ui_info['removed'] = changes['removed']
+            ui_info['full'] = changes['full']
+            revisions['torrents'] = changes['revision']
 
         def on_complete(result):
+            if since and ui_info['full'] and 'filters' in revisions:
+                # The torrent changes are not known so neither are the client's
+                # filter tree fields, send the complete filter tree.
+                ui_info['filters'] = dict(self._filter_tree)
+            if 'torrents' in revisions and 'filters' in revisions:
+                ui_info['revision'] = self._make_revision(
+                    revisions['torrents'], revisions['filters'], query_digest
+                )
             d.callback(ui_info)
 
-        d1 = component.get('SessionProxy').get_torrents_status(filter_dict, keys)
+        d1 = self.sessionproxy.get_torrents_changes(filter_dict, keys, torrents_since)
         d1.addCallback(got_torrents)
 
         d2 = client.core.get_filter_tree()
         d2.addCallback(got_filters)
-
         d3 = client.core.get_session_status(
             [
                 'peer.num_peers_connected',
@@ -580,6 +1132,7 @@ def _on_got_files(self, torrent, d):
 
         paths = []
         info = {}
+        dirs = {}
         for index, torrent_file in enumerate(files):
             path = torrent_file['path']
             paths.append(path)
@@ -590,25 +1143,31 @@ def _on_got_files(self, torrent, d):
             info[path] = torrent_file
 
             # update the directory info
+            done = torrent_file['size'] * torrent_file['progress'] / 100
             dirname = os.path.dirname(path)
             while dirname:
-                dirinfo = info.setdefault(dirname, {})
-                dirinfo['size'] = dirinfo.get('size', 0) + torrent_file['size']
-                if 'priority' not in dirinfo:
-                    dirinfo['priority'] = torrent_file['priority']
-                else:
-                    if dirinfo['priority'] != torrent_file['priority']:
-                        dirinfo['priority'] = 9
-
-                progresses = dirinfo.setdefault('progresses', [])
-                progresses.append(torrent_file['size'] * torrent_file['progress'] / 100)
-                if dirinfo['size'] > 0:
-                    dirinfo['progress'] = sum(progresses) / dirinfo['size'] * 100
-                else:
-                    dirinfo['progress'] = 100
-                dirinfo['path'] = dirname
+                dirinfo = dirs.get(dirname)
+                if dirinfo is None:
+                    dirinfo = dirs[dirname] = {
+                        'path': dirname,
+                        'size': 0,
+                        'done': 0,
+                        'priority': torrent_file['priority'],
+                    }
+                dirinfo['size'] += torrent_file['size']
+                dirinfo['done'] += done
+                if dirinfo['priority'] != torrent_file['priority']:
+                    dirinfo['priority'] = 9
                 dirname = os.path.dirname(dirname)
 
+        for dirname, dirinfo in dirs.items():
+            done = dirinfo.pop('done')
+            if dirinfo['size'] > 0:
+                dirinfo['progress'] = done / dirinfo['size'] * 100
+            else:
+                dirinfo['progress'] = 100
+            info[dirname] = dirinfo
+
         def walk(path, item):
             if item['type'] == 'dir':
                 item.update(info[path])
@@ -641,6 +1200,24 @@ def get_torrent_files(self, torrent_id):
         d.addCallback(self._on_got_files, main_deferred)
         return main_deferred
 
+    @export
+    def get_torrent_file_tree(self, torrent_id, path='', offset=0, limit=None):
+        """
+        Gets a page of the directories and files in a directory of a torrent.
+
+        :param torrent_id: the id of the torrent to retrieve.
+        :type torrent_id: string
+        :param path: the directory path, empty for the root
+        :type path: string
+        :param offset: the index of the first child to return
+        :type offset: int
+        :param limit: the maximum number of children to return
+        :type limit: int
+        :returns: The directory with its page of children
+        :rtype: dictionary
+        """
+        return client.core.get_torrent_file_tree(torrent_id, path, offset, limit)
+
     @export
     def download_torrent_from_url(self, url, cookie=None):
         """
@@ -764,10 +1341,51 @@ def get_host_status(self, host_id):
 
         """
 
-        def response(result):
-            return result
+        return self.daemon_pool.get_host_status(host_id)
+
+    @export
+    def get_hosts_status(self, host_ids=None):
+        """
+        Returns the current status for the specified hosts, probing them
+        concurrently over persistent connections.
+
+        :param host_ids: the hash ids of the hosts, defaults to all the hosts
+        :type host_ids: list
+        :returns: a list of (host_id, status, version) for the hosts
+        :rtype: list
 
-        return self.hostlist.get_host_status(host_id).addCallback(response)
+        """
+        if host_ids is None:
+            host_ids = [host_info[0] for host_info in self.hostlist.get_hosts_info()]
+        return self.daemon_pool.get_hosts_status(host_ids)
+
+    @export
+    def get_hosts_torrents_status(self, host_ids, filter_dict, keys):
+        """
+        Gets the torrents status of several hosts, querying them in parallel
+        and merging the results.
+
+        Each torrent status has a `host_id` key with the host of the torrent,
+        a torrent on several hosts is returned from the first of the hosts.
+
+        :param host_ids: the hash ids of the hosts
+        :type host_ids: list
+        :param filter_dict: the filters to apply to the torrents
+        :type filter_dict: dict
+        :param keys: the torrent status keys
+        :type keys: list
+        :returns: the merged torrents status and the error of each failed host
+        :rtype: dict
+
+        ::
+
+            {
+                "torrents": {torrent_id: {status_dict}, ...},
+                "errors": {host_id: str, ...}
+            }
+
+        """
+        return self.daemon_pool.get_torrents_status(host_ids, filter_dict, keys)
 
     @export
     def add_host(self, host, port, username='', password=''):
@@ -805,6 +1423,7 @@ def edit_host(self, host_id, host, port, username='', password=''):
             bool: True if successful, False otherwise.
 
         """
+        self.daemon_pool.disconnect(host_id)
         return self.hostlist.update_host(host_id, host, port, username, password)
 
     @export
@@ -818,6 +1437,7 @@ def remove_host(self, host_id):
             bool: True if successful, False otherwise.
 
         """
+        self.daemon_pool.disconnect(host_id)
         return self.hostlist.remove_host(host_id)
 
     @export
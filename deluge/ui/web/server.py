@@ -7,10 +7,13 @@
 #
 
 import fnmatch
+import gzip
+import hashlib
 import json
 import logging
 import mimetypes
 import os
+import stat
 import tempfile
 from pathlib import Path
 
@@ -27,11 +30,29 @@
 from deluge.ui.tracker_icons import TrackerIcons
 from deluge.ui.web.auth import Auth
 from deluge.ui.web.common import Template, _
-from deluge.ui.web.json_api import JSON, WebApi, WebUtils
+from deluge.ui.web.json_api import JSON, EventStream, WebApi, WebUtils
 from deluge.ui.web.pluginmanager import PluginManager
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 log = logging.getLogger(__name__)
 
+# Only text assets large enough to benefit are precompressed.
+COMPRESS_MIN_SIZE = 256
+COMPRESS_MIME_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+# The cache lifetime of an asset requested with its version, the url of the
+# asset changes with its contents.
+VERSIONED_MAX_AGE = 365 * 24 * 60 * 60
+
 CONFIG_DEFAULTS = {
     # Misc Settings
     'enabled_plugins': [],
@@ -89,6 +110,207 @@ def absolute_base_url(base):
     return base
 
 
+def parse_accept_encoding(header):
+    """Get the content codings accepted by a client.
+
+    Args:
+        header (bytes): The value of the Accept-Encoding header or None.
+
+    Returns:
+        set: The accepted content codings, lowercase.
+
+    """
+    codings = set()
+    if not header:
+        return codings
+
+    for item in header.split(b','):
+        coding, dummy_sep, params = item.partition(b';')
+        params = params.strip()
+        if params.startswith(b'q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(coding.strip().lower())
+    return codings
+
+
+class StaticAsset:
+    """A file held in memory with its precompressed variants.
+
+    Args:
+        path (str): The path of the file.
+
+    Attributes:
+        mtime_ns (int): The modification time of the file.
+        size (int): The size of the file.
+        mime_type (str): The mime type of the file.
+        version (str): A digest of the file contents.
+        variants (dict): The file contents by content coding, always with the
+            uncompressed `identity` contents.
+
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as _file:
+            file_stat = os.fstat(_file.fileno())
+            data = _file.read()
+
+        self.path = path
+        self.mtime_ns = file_stat.st_mtime_ns
+        self.size = file_stat.st_size
+        self.mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.version = hashlib.sha1(data).hexdigest()[:16]
+        self.variants = {b'identity': data}
+
+        if len(data) >= COMPRESS_MIN_SIZE and self.mime_type.startswith(
+            COMPRESS_MIME_TYPES
+        ):
+            self.variants[b'gzip'] = gzip.compress(data, 9, mtime=0)
+            if brotli:
+                self.variants[b'br'] = brotli.compress(data)
+
+    @property
+    def last_modified(self):
+        return self.mtime_ns // 1000000000
+
+    def get_etag(self, coding):
+        """The strong ETag of a variant, each variant has a different ETag."""
+        if coding == b'identity':
+            return b'"%s"' % self.version.encode()
+        return b'"%s-%s"' % (self.version.encode(), coding)
+
+    def select_coding(self, accept_encoding):
+        """Select the smallest variant accepted by the client.
+
+        Args:
+            accept_encoding (bytes): The value of the Accept-Encoding header.
+
+        Returns:
+            bytes: The content coding of the variant.
+
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        for coding in (b'br', b'gzip'):
+            if coding in self.variants and coding in accepted:
+                return coding
+        return b'identity'
+
+    def is_not_modified(self, request, etag):
+        """Check the conditional headers of a request against the asset.
+
+        If-Modified-Since is only used without If-None-Match.
+
+        Args:
+            request (twisted.web.http.Request): The request.
+            etag (bytes): The ETag of the variant served.
+
+        Returns:
+            bool: True if the client has the current variant.
+
+        """
+        if_none_match = request.getHeader(b'if-none-match')
+        if if_none_match is not None:
+            tags = {tag.strip() for tag in if_none_match.split(b',')}
+            # If-None-Match uses the weak comparison.
+            return b'*' in tags or etag in tags or b'W/' + etag in tags
+
+        if_modified_since = request.getHeader(b'if-modified-since')
+        if if_modified_since:
+            try:
+                since = http.stringToDatetime(if_modified_since)
+            except ValueError:
+                return False
+            return self.last_modified <= since
+        return False
+
+    def render(self, request):
+        """Write the headers and get the contents of the variant for a request.
+
+        The asset is cached by the client for a long time if requested with the
+        current version in the `v` argument, otherwise it is revalidated with
+        the ETag on each use.
+
+        Args:
+            request (twisted.web.http.Request): The request.
+
+        Returns:
+            bytes: The variant contents, empty for a not modified response.
+
+        """
+        coding = self.select_coding(request.getHeader(b'accept-encoding'))
+        etag = self.get_etag(coding)
+
+        request.setHeader(b'content-type', self.mime_type.encode())
+        request.setHeader(b'etag', etag)
+        request.setHeader(b'last-modified', http.datetimeToString(self.last_modified))
+        if len(self.variants) > 1:
+            request.setHeader(b'vary', b'accept-encoding')
+
+        version = request.args.get(b'v', [b''])[-1]
+        if version == self.version.encode():
+            request.setHeader(
+                b'cache-control',
+                b'public, max-age=%d, immutable' % VERSIONED_MAX_AGE,
+            )
+        else:
+            request.setHeader(b'cache-control', b'no-cache')
+
+        if self.is_not_modified(request, etag):
+            request.setResponseCode(http.NOT_MODIFIED)
+            return b''
+
+        if coding != b'identity':
+            request.setHeader(b'content-encoding', coding)
+        return self.variants[coding]
+
+
+class AssetCache:
+    """An in-memory cache of the static assets, by path and modification time.
+
+    A file is only read and compressed again after it is modified.
+    """
+
+    def __init__(self):
+        self._assets = {}
+
+    def get(self, path):
+        """Get the asset of a file.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            StaticAsset: The asset or None if the path is not a file.
+
+        """
+        try:
+            file_stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(file_stat.st_mode):
+            return None
+
+        asset = self._assets.get(path)
+        if (
+            asset is None
+            or asset.mtime_ns != file_stat.st_mtime_ns
+            or asset.size != file_stat.st_size
+        ):
+            try:
+                asset = StaticAsset(path)
+            except OSError as ex:
+                log.warning('Unable to read asset %s: %s', path, ex)
+                return None
+            self._assets[path] = asset
+        return asset
+
+    def clear(self):
+        self._assets.clear()
+
+
 class GetText(resource.Resource):
     def render(self, request):
         request.setHeader(b'content-type', b'text/javascript; encoding=utf-8')
@@ -251,6 +473,7 @@ def __init__(self, name, *directories):
         resource.Resource.__init__(self)
         component.Component.__init__(self, name)
 
+        self.assets = AssetCache()
         self.__paths = {}
         for directory in directories:
             self.add_directory(directory)
@@ -269,11 +492,7 @@ def getChild(self, path, request):  # NOQA: N802
             request.lookup_path = os.path.join(request.lookup_path, path)
         else:
             request.lookup_path = path
-
-        if request.uri.endswith(b'css'):
-            return EncodingResourceWrapper(self, [server.GzipEncoderFactory()])
-        else:
-            return self
+        return self
 
     def render(self, request):
         log.debug('Requested path: %s', request.lookup_path)
@@ -283,13 +502,10 @@ def render(self, request):
             filename = os.path.basename(request.path).decode()
             for directory in self.__paths[path]:
                 path = os.path.join(directory, filename)
-                if os.path.isfile(path):
+                asset = self.assets.get(path)
+                if asset:
                     log.debug('Serving path: %s', path)
-                    mime_type = mimetypes.guess_type(path)
-                    request.setHeader(b'content-type', mime_type[0].encode())
-                    with open(path, 'rb') as _file:
-                        data = _file.read()
-                    return data
+                    return asset.render(request)
 
         request.setResponseCode(http.NOT_FOUND)
         request.setHeader(b'content-type', b'text/html')
@@ -301,6 +517,7 @@ class ScriptResource(resource.Resource, component.Component):
     def __init__(self):
         resource.Resource.__init__(self)
         component.Component.__init__(self, 'Scripts')
+        self.assets = AssetCache()
         self.__scripts = {}
         for script_type in ['normal', 'debug', 'dev']:
             self.__scripts[script_type] = {
@@ -435,11 +652,18 @@ def getChild(self, path, request):  # NOQA: N802
             request.lookup_path += b'/' + path
         else:
             request.lookup_path = path
-        return EncodingResourceWrapper(self, [server.GzipEncoderFactory()])
+        return self
 
-    def render(self, request):
-        log.debug('Requested path: %s', request.lookup_path)
-        lookup_path = request.lookup_path.decode()
+    def find_script(self, lookup_path):
+        """Find the file of a script.
+
+        Args:
+            lookup_path (str): The path of the script, relative to `js/`.
+
+        Returns:
+            str: The path of the script file or None if there is no such script.
+
+        """
         for script_type in ('dev', 'debug', 'normal'):
             scripts = self.__scripts[script_type]['scripts']
             for pattern in scripts:
@@ -465,12 +689,35 @@ def render(self, request):
                     log.warning('Unable to serve script which does not exist: %s', path)
                     continue
 
-                log.debug('Serving path: %s', path)
-                mime_type = mimetypes.guess_type(path)
-                request.setHeader(b'content-type', mime_type[0].encode())
-                with open(path, 'rb') as _file:
-                    data = _file.read()
-                return data
+                return path
+        return None
+
+    def get_versioned_url(self, script):
+        """Get the url of a script with the version of its contents.
+
+        Args:
+            script (str): The url of the script, as returned by `get_scripts`.
+
+        Returns:
+            str: The url with a `v` argument or unchanged if it is not a script
+                served by this resource.
+
+        """
+        if not script.startswith('js/'):
+            return script
+        path = self.find_script(script[len('js/') :])
+        asset = self.assets.get(path) if path else None
+        if not asset:
+            return script
+        return f'{script}?v={asset.version}'
+
+    def render(self, request):
+        log.debug('Requested path: %s', request.lookup_path)
+        path = self.find_script(request.lookup_path.decode())
+        asset = self.assets.get(path) if path else None
+        if asset:
+            log.debug('Serving path: %s', path)
+            return asset.render(request)
 
         request.setResponseCode(http.NOT_FOUND)
         request.setHeader(b'content-type', b'text/html')
@@ -497,6 +744,7 @@ class TopLevel(resource.Resource):
     def __init__(self):
         super().__init__()
 
+        self.__index_template = None
         self.putChild(b'css', LookupResource('Css', rpath('css')))
         if os.path.isfile(rpath('js', 'gettext.js')):
             self.putChild(
@@ -558,6 +806,7 @@ def __init__(self):
 
         self.js = js
         self.putChild(b'js', js)
+        self.putChild(b'events', EventStream())
         self.putChild(
             b'json', EncodingResourceWrapper(JSON(), [server.GzipEncoderFactory()])
         )
@@ -612,6 +861,14 @@ def remove_script(self, script):
         self.__scripts.remove(script)
         self.__debug_scripts.remove(script)
 
+    def get_index_template(self):
+        """Get the index template, only compiled again after it is modified."""
+        filename = rpath('index.html')
+        mtime = os.stat(filename).st_mtime_ns
+        if self.__index_template is None or self.__index_template[0] != mtime:
+            self.__index_template = (mtime, Template(filename=filename))
+        return self.__index_template[1]
+
     def getChildWithDefault(self, path, request):  # NOQA: N802
         # Calculate the request base
         header = request.getHeader('x-deluge-base')
@@ -667,11 +924,17 @@ def render(self, request):
                         log.warning('WebUI falling back to "%s" mode.', script_type)
                     break
 
-        scripts = component.get('Scripts').get_scripts(script_type)
+        # The script urls carry the script versions so the browser can cache the
+        # scripts and only the index is fetched again after an upgrade.
+        scripts = [
+            self.js.get_versioned_url(script)
+            for script in component.get('Scripts').get_scripts(script_type)
+        ]
         scripts.insert(0, 'gettext.js')
 
-        template = Template(filename=rpath('index.html'))
+        template = self.get_index_template()
         request.setHeader(b'content-type', b'text/html; charset=utf-8')
+        request.setHeader(b'cache-control', b'no-cache')
 
         web_config = component.get('Web').get_config()
         web_config['base'] = request.base.decode()